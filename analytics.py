@@ -0,0 +1,306 @@
+"""Streaming revenue analytics over a purchase-history file.
+
+The history is a JSONL file of ledger records (see `ledger.py` and
+`main.py export-purchases`). It is read in byte chunks aligned to line
+boundaries. Each chunk is reduced to mergeable partial aggregates per time
+window (plain `Counter`s, so merging is addition), and the partials of all
+chunks are merged into the final report:
+
+- purchases, revenue and revenue per plan
+- memberships per plan and feature attach rates
+- purchases where the group discount fired: a plan bought in a quantity
+  that reaches one of the catalog's quantity breaks (`PricingRules`)
+- premium surcharge and special discount totals
+
+Stored prices are used as they are; no `Buyer` is rebuilt.
+
+Chunk results are cached in a JSON file keyed by the chunk byte range, the
+window size, a digest of the whole chunk and one of the quantity breaks.
+The history is append-only, so every chunk except the last keeps the same
+range and only the new tail is parsed on a refresh; cached chunks are still
+read to check their digest, which is much cheaper than decoding them.
+"""
+import hashlib
+import json
+import os
+import time
+from collections import Counter
+
+from catalog import get_catalog
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+WINDOWS = {"hour": 3600, "day": 86400, "week": 7 * 86400}
+# Ventana de las compras sin fecha
+UNDATED = "sin-fecha"
+CACHE_SUFFIX = ".analytics-cache"
+CACHE_FORMAT = 2
+# Tamaño de las lecturas al calcular la huella de un bloque
+FINGERPRINT_BLOCK = 1024 * 1024
+
+
+def new_partial():
+    """Return an empty partial aggregate."""
+    return {
+        "totals": Counter(),
+        "plan_memberships": Counter(),
+        "plan_revenue": Counter(),
+        "premium_surcharge_by_plan": Counter(),
+        "feature_attach": Counter(),
+    }
+
+
+def add_purchase(partial, record, rules=None):
+    """Add one ledger record to a partial aggregate.
+
+    `rules` (default: those of the current catalog) decide whether the
+    group discount applied.
+    """
+    if rules is None:
+        rules = get_catalog().pricing_rules
+    totals = partial["totals"]
+    items = record.get("items") or []
+    totals["purchases"] += 1
+    totals["revenue"] += record.get("total", 0.0)
+    # Un item con `quantity` cuenta como esa cantidad de membresías
+    plans = Counter()
+    for item in items:
+        quantity = item.get("quantity", 1)
+        plans[item.get("plan")] += quantity
+        features = (item.get("additional_features") or []) + (item.get("premium_features") or [])
+        partial["feature_attach"].update(dict.fromkeys(features, quantity))
+    totals["memberships"] += sum(plans.values())
+    partial["plan_memberships"].update(plans)
+    if any(rules.quantity_break(plan_name, quantity) for plan_name, quantity in plans.items()):
+        totals["group_discount_purchases"] += 1
+
+    partial["plan_revenue"].update(record.get("costs") or {})
+    surcharge = record.get("premium_surcharge") or 0.0
+    if surcharge:
+        totals["premium_surcharge"] += surcharge
+        totals["premium_surcharge_purchases"] += 1
+        partial["premium_surcharge_by_plan"].update(
+            record.get("premium_surcharge_breakdown") or {})
+    discount = record.get("special_discount") or 0.0
+    if discount:
+        totals["special_discount"] += discount
+        totals["special_discount_purchases"] += 1
+
+
+def merge_partials(target, source):
+    """Add `source` into `target` (both partial aggregates); returns target."""
+    for name, counter in source.items():
+        target[name].update(counter)
+    return target
+
+
+def _window_key(created_at, window_seconds):
+    if not isinstance(created_at, (int, float)):
+        return UNDATED
+    return str(int(created_at // window_seconds * window_seconds))
+
+
+def aggregate_lines(lines, window_seconds, rules=None):
+    """Reduce JSONL ledger lines to {window key: partial} (see `add_purchase`).
+
+    Raises:
+        ValueError: If a line is not a JSON object.
+    """
+    if rules is None:
+        rules = get_catalog().pricing_rules
+    windows = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if not isinstance(record, dict):
+            raise ValueError("Cada línea debe ser un objeto JSON")
+        key = _window_key(record.get("created_at"), window_seconds)
+        partial = windows.get(key)
+        if partial is None:
+            partial = windows[key] = new_partial()
+        add_purchase(partial, record, rules)
+    return windows
+
+
+def chunk_ranges(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Split `path` into (start, end) ranges of about `chunk_size` bytes.
+
+    Every range ends right after a newline (or at the end of the file), so
+    the boundaries of the complete chunks do not move when lines are
+    appended.
+    """
+    size = os.path.getsize(path)
+    ranges = []
+    start = 0
+    with open(path, "rb") as stream:
+        while start < size:
+            stream.seek(min(start + chunk_size, size) - 1)
+            stream.readline()
+            end = min(stream.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _read_chunk_lines(stream, start, end):
+    stream.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        line = stream.readline(remaining)
+        if not line:
+            break
+        remaining -= len(line)
+        yield line.decode("utf-8")
+
+
+def fingerprint(stream, start, end):
+    """Content digest of the bytes [start, end) of `stream`."""
+    digest = hashlib.blake2b(digest_size=16)
+    stream.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        block = stream.read(min(FINGERPRINT_BLOCK, remaining))
+        if not block:
+            break
+        digest.update(block)
+        remaining -= len(block)
+    return digest.hexdigest()
+
+
+def _rules_fingerprint(rules):
+    """Hash of the quantity breaks, which decide the group-discount counts."""
+    default_breaks, plan_breaks = rules.quantity_breaks()
+    data = json.dumps([default_breaks, sorted(plan_breaks.items())])
+    return hashlib.blake2b(data.encode(), digest_size=8).hexdigest()
+
+
+def _load_cache(cache_path):
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("format") != CACHE_FORMAT:
+        return {}
+    return data.get("chunks") or {}
+
+
+def _save_cache(cache_path, chunks):
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"format": CACHE_FORMAT, "chunks": chunks}, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # Sin caché si no se puede escribir
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def _partials_from_json(windows):
+    return {key: {name: Counter(values) for name, values in partial.items()}
+            for key, partial in windows.items()}
+
+
+def aggregate_file(path, window="day", chunk_size=DEFAULT_CHUNK_SIZE,
+                   cache_path=None, use_cache=True):
+    """Aggregate a purchase-history file into per-window partials.
+
+    The group discount is judged with the rules of the current catalog
+    (see `add_purchase`).
+
+    Returns:
+        tuple: ({window key: partial}, stats) where stats counts the chunks
+        read and the chunks taken from the cache.
+
+    Raises:
+        ValueError: On an unknown window or an invalid line.
+    """
+    if window not in WINDOWS:
+        raise ValueError(f"Ventana desconocida '{window}'; use {', '.join(WINDOWS)}")
+    window_seconds = WINDOWS[window]
+    rules = get_catalog().pricing_rules
+    rules_key = _rules_fingerprint(rules)
+    cache_path = cache_path or path + CACHE_SUFFIX
+    cached = _load_cache(cache_path) if use_cache else {}
+    chunks = {}
+    merged = {}
+    stats = {"chunks": 0, "cached_chunks": 0, "bytes_scanned": 0}
+
+    with open(path, "rb") as stream:
+        for start, end in chunk_ranges(path, chunk_size):
+            key = f"{start}:{end}:{window}:{rules_key}:{fingerprint(stream, start, end)}"
+            stats["chunks"] += 1
+            windows = cached.get(key)
+            if windows is not None:
+                stats["cached_chunks"] += 1
+            else:
+                try:
+                    windows = aggregate_lines(_read_chunk_lines(stream, start, end),
+                                              window_seconds, rules)
+                except ValueError as e:
+                    raise ValueError(f"Bloque en el byte {start}: {e}") from e
+                stats["bytes_scanned"] += end - start
+            chunks[key] = windows
+            for window_key, partial in _partials_from_json(windows).items():
+                if window_key in merged:
+                    merge_partials(merged[window_key], partial)
+                else:
+                    merged[window_key] = partial
+
+    if use_cache and stats["cached_chunks"] < stats["chunks"]:
+        # Solo se guardan los bloques actuales: los antiguos se descartan
+        _save_cache(cache_path, chunks)
+    return merged, stats
+
+
+def summarize(partial):
+    """Turn a partial aggregate into the report metrics."""
+    totals = partial["totals"]
+    memberships = totals["memberships"]
+    purchases = totals["purchases"]
+    return {
+        "purchases": purchases,
+        "memberships": memberships,
+        "revenue": round(totals["revenue"], 2),
+        "plan_memberships": dict(sorted(partial["plan_memberships"].items())),
+        "plan_revenue": {plan: round(value, 2)
+                         for plan, value in sorted(partial["plan_revenue"].items())},
+        "feature_attach_rate": {
+            feature: round(count / memberships, 4) if memberships else 0.0
+            for feature, count in sorted(partial["feature_attach"].items())
+        },
+        "group_discount_purchases": totals["group_discount_purchases"],
+        "group_discount_rate": (round(totals["group_discount_purchases"] / purchases, 4)
+                                if purchases else 0.0),
+        "premium_surcharge": round(totals["premium_surcharge"], 2),
+        "premium_surcharge_purchases": totals["premium_surcharge_purchases"],
+        "premium_surcharge_by_plan": {
+            plan: round(value, 2)
+            for plan, value in sorted(partial["premium_surcharge_by_plan"].items())
+        },
+        "special_discount": round(totals["special_discount"], 2),
+        "special_discount_purchases": totals["special_discount_purchases"],
+    }
+
+
+def _window_label(key):
+    if key == UNDATED:
+        return UNDATED
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(int(key)))
+
+
+def build_report(merged):
+    """Return the report: one summary per window (in time order) and a total."""
+    dated = sorted((key for key in merged if key != UNDATED), key=int)
+    keys = dated + ([UNDATED] if UNDATED in merged else [])
+    total = new_partial()
+    windows = []
+    for key in keys:
+        merge_partials(total, merged[key])
+        summary = {"window": _window_label(key)}
+        summary.update(summarize(merged[key]))
+        windows.append(summary)
+    return {"windows": windows, "total": summarize(total)}
@@ -0,0 +1,91 @@
+"""Compare `models.price_baskets` against the per-basket `Buyer` path.
+
+Both paths are timed `--repeat` times, alternating so that both see the same
+machine load, and the best run of each is kept; a small batch is priced
+first so the one-off NumPy import is not counted. Exits with code
+1 if `price_baskets` is not `--min-speedup` times faster than `Buyer` or if
+any total differs.
+
+Uso:
+    PYTHONPATH=. python benchmarks/bench_batch_pricing.py --baskets 1000000
+"""
+import argparse
+import random
+import sys
+import time
+
+from models import Item, Buyer, price_baskets
+
+
+def generate_baskets(n_baskets, seed=0):
+    """Generate `n_baskets` random baskets with 1 to 4 items each."""
+    rng = random.Random(seed)
+    plans = list(Item.plan)
+    additional = list(Item.ADDITIONAL_FEATURES)
+    premium = list(Item.PREMIUM_FEATURES)
+    baskets = []
+    for _ in range(n_baskets):
+        basket = []
+        for _ in range(rng.randint(1, 4)):
+            basket.append((
+                rng.choice(plans),
+                rng.sample(additional, rng.randint(0, 2)),
+                rng.sample(premium, rng.randint(0, 1)),
+            ))
+        baskets.append(basket)
+    return baskets
+
+
+def price_with_buyer(baskets):
+    """Price every basket through `Buyer`, one at a time."""
+    totals = []
+    for basket in baskets:
+        buyer = Buyer([Item(plan_name, additional, premium)
+                       for plan_name, additional, premium in basket])
+        totals.append(buyer.sum_costs(buyer.calculate_costs()))
+    return totals
+
+
+def best_times(funcs, baskets, repeat):
+    """Best seconds and last result of each of `funcs`, called in turns."""
+    best = [float("inf")] * len(funcs)
+    results = [None] * len(funcs)
+    for _ in range(repeat):
+        for index, func in enumerate(funcs):
+            start = time.perf_counter()
+            results[index] = func(baskets)
+            best[index] = min(best[index], time.perf_counter() - start)
+    return best, results
+
+
+def main(argv=None):
+    """Run the benchmark, print timings and speedup, return the exit code."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--baskets", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--min-speedup", type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    baskets = generate_baskets(args.baskets, args.seed)
+    price_baskets(baskets[:100])
+
+    (buyer_time, batch_time), (expected, result) = best_times(
+        (price_with_buyer, price_baskets), baskets, args.repeat)
+
+    mismatches = sum(1 for a, b in zip(expected, result.totals) if a != b)
+    speedup = buyer_time / batch_time
+    print(f"Baskets:        {args.baskets}")
+    print(f"Buyer path:     {buyer_time:.3f}s")
+    print(f"price_baskets:  {batch_time:.3f}s")
+    print(f"Speedup:        {speedup:.1f}x")
+    print(f"Mismatches:     {mismatches}")
+    if mismatches or speedup < args.min_speedup:
+        print(f"ERROR: se esperaba al menos {args.min_speedup:.0f}x sin diferencias",
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+"""Compare the integer-cent `Buyer` with the float and Decimal arithmetic.
+
+The paths price the same random baskets with the same rules (group
+discount, premium surcharge with its per-plan breakdown, special discount)
+and the same catalog:
+
+- float: `FloatBuyer`, the float `Buyer` as it was before `cents.py`, with
+  the breakdown rounded to 2 decimals and the drift added to the first plan
+- Decimal: every amount quantized to the cent, rounding half up
+- Buyer: `models.Buyer`, `calculate_costs` followed by `sum_costs`
+- quote: `models.Buyer.quote`
+
+Buyer and quote run the real classes, so the pricing rules, the price table
+and the stage hooks of `metrics.py` are all in their times. The paths are
+timed `--repeat` times, alternating so that all of them see the same
+machine load, and the best run of each is kept; the items are built before
+timing. Totals are also priced again with every basket reversed, to count
+the results that change with the order of the items; with the integer
+prices of the default catalog float sums are exact, so use `--extra-cents`
+to add some cents to every price.
+
+Uso:
+    PYTHONPATH=. python benchmarks/bench_cents.py --baskets 200000
+"""
+import argparse
+from decimal import ROUND_HALF_UP, Decimal
+
+from benchmarks.bench_batch_pricing import best_times, generate_baskets
+from catalog import Catalog, get_catalog
+from models import Item, Buyer
+
+CENT = Decimal("0.01")
+# Reglas de precios por defecto del catálogo
+GROUP_DISCOUNT_RATE = Decimal("0.10")
+PREMIUM_SURCHARGE_RATE = Decimal("0.15")
+
+
+class FloatBuyer:
+    """The float `Buyer` that `cents.py` replaced, kept as a reference."""
+
+    DISCOUNT_GROUP_MEMBERSHIP = 0.10
+    PREMIUM_SURCHARGE_RATE = 0.15
+
+    def __init__(self, items, catalog):
+        self.items = items
+        self.catalog = catalog
+        self.special_discount_amount = 0.0
+        self.premium_surcharge_amount = 0.0
+        self.premium_surcharge_breakdown = {}
+
+    def count_membership(self):
+        """Count how many memberships of each plan are in the purchase."""
+        plan_counts = {}
+        for item in self.items:
+            if item.plan_name in plan_counts:
+                plan_counts[item.plan_name] += 1
+            else:
+                plan_counts[item.plan_name] = 1
+        return plan_counts
+
+    def calculate_costs(self):
+        """Float costs per plan of the catalog, with group discounts."""
+        plan_counts = self.count_membership()
+        costs = dict.fromkeys(self.catalog.plans, 0.0)
+        for item in self.items:
+            cost = item.get_plan_cost(self.catalog) + item.get_features_cost(self.catalog)
+            if item.plan_name in costs:
+                costs[item.plan_name] += cost
+        for plan_name, count in plan_counts.items():
+            if count > 1 and plan_name in costs:
+                costs[plan_name] -= costs[plan_name] * self.DISCOUNT_GROUP_MEMBERSHIP
+        return costs
+
+    def sum_costs(self, costs):
+        """Float total with the surcharge breakdown patched after rounding."""
+        self.premium_surcharge_amount = 0.0
+        self.premium_surcharge_breakdown = {}
+        total = 0.0
+        for plan_name in costs:
+            total += costs[plan_name]
+        if self.has_premium_features():
+            self.premium_surcharge_amount = total * self.PREMIUM_SURCHARGE_RATE
+            if total > 0:
+                for plan_name, plan_cost in costs.items():
+                    self.premium_surcharge_breakdown[plan_name] = round(
+                        self.premium_surcharge_amount * plan_cost / total, 2)
+                diff = round(self.premium_surcharge_amount
+                             - sum(self.premium_surcharge_breakdown.values()), 2)
+                if diff != 0:
+                    for plan_name in costs:
+                        if costs[plan_name] > 0:
+                            self.premium_surcharge_breakdown[plan_name] += diff
+                            break
+            total += self.premium_surcharge_amount
+        self.special_discount_amount = 50.0 if total > 400 else 20.0 if total > 200 else 0.0
+        return max(0.0, total - self.special_discount_amount)
+
+    def has_premium_features(self):
+        """Check if any item has premium features."""
+        premium_features = self.catalog.premium_features
+        for item in self.items:
+            for feature in item.premium_membership_features:
+                if feature in premium_features:
+                    return True
+        return False
+
+
+def with_extra_cents(catalog, extra_cents):
+    """Return a catalog like `catalog` with `extra_cents` added to every price."""
+    if not extra_cents:
+        return catalog
+    extra = Decimal(extra_cents).scaleb(-2)
+
+    def raised(cost):
+        return float(Decimal(repr(cost)) + extra)
+
+    return Catalog({
+        "plan": {name: {**plan, "cost": raised(plan["cost"])}
+                 for name, plan in catalog.plans.items()},
+        "additional_features": {name: raised(cost)
+                                for name, cost in catalog.additional_features.items()},
+        "premium_features": {name: raised(cost)
+                             for name, cost in catalog.premium_features.items()},
+    })
+
+
+def decimal_prices(catalog):
+    """Return ({plan: cost}, {feature: cost}) of `catalog` as Decimal."""
+    return tuple({name: Decimal(cents).scaleb(-2) for name, cents in prices.items()}
+                 for prices in catalog.cent_prices())
+
+
+def price_decimal(basket, prices, premium_features):
+    """Price a basket of items with Decimal amounts quantized to the cent."""
+    zero = Decimal(0)
+    plans, features = prices
+    costs = {}
+    counts = {}
+    premium = False
+    for item in basket:
+        counts[item.plan_name] = counts.get(item.plan_name, 0) + 1
+        cost = plans.get(item.plan_name, zero)
+        for feature in item.additional_features:
+            cost += features.get(feature, zero)
+        for feature in item.premium_membership_features:
+            cost += features.get(feature, zero)
+            premium = premium or feature in premium_features
+        if item.plan_name in plans:
+            costs[item.plan_name] = costs.get(item.plan_name, zero) + cost
+    for plan_name, cost in costs.items():
+        if counts[plan_name] > 1:
+            costs[plan_name] = cost - (cost * GROUP_DISCOUNT_RATE).quantize(CENT, ROUND_HALF_UP)
+    total = sum(costs.values(), zero)
+    breakdown = {}
+    if premium:
+        surcharge = (total * PREMIUM_SURCHARGE_RATE).quantize(CENT, ROUND_HALF_UP)
+        if total > 0:
+            breakdown = {p: (surcharge * c / total).quantize(CENT, ROUND_HALF_UP)
+                         for p, c in costs.items()}
+            diff = surcharge - sum(breakdown.values(), zero)
+            if diff:
+                for plan_name, cost in costs.items():
+                    if cost > 0:
+                        breakdown[plan_name] += diff
+                        break
+        total += surcharge
+    discount = Decimal(50) if total > 400 else Decimal(20) if total > 200 else zero
+    return max(zero, total - discount), breakdown
+
+
+def path_functions(catalog):
+    """Return {name: function(list of baskets of items) -> totals}."""
+    def float_path(baskets):
+        totals = []
+        for basket in baskets:
+            buyer = FloatBuyer(basket, catalog)
+            totals.append(buyer.sum_costs(buyer.calculate_costs()))
+        return totals
+
+    prices = decimal_prices(catalog)
+
+    def decimal_path(baskets):
+        return [price_decimal(basket, prices, catalog.premium_features)[0]
+                for basket in baskets]
+
+    def buyer_path(baskets):
+        totals = []
+        for basket in baskets:
+            buyer = Buyer(basket, catalog)
+            totals.append(buyer.sum_costs(buyer.calculate_costs()))
+        return totals
+
+    def quote_path(baskets):
+        return [Buyer(basket, catalog).quote().total for basket in baskets]
+
+    return {"float": float_path, "Decimal": decimal_path,
+            "Buyer": buyer_path, "quote": quote_path}
+
+
+def run(baskets, catalog, repeat=3):
+    """Time every path; returns {name: (best seconds, totals, reversed totals)}."""
+    items = [[Item(plan_name, additional, premium)
+              for plan_name, additional, premium in basket] for basket in baskets]
+    paths = path_functions(catalog)
+    seconds, totals = best_times(tuple(paths.values()), items, repeat)
+    reversed_items = [basket[::-1] for basket in items]
+    return {name: (elapsed, result, func(reversed_items))
+            for (name, func), elapsed, result in zip(paths.items(), seconds, totals)}
+
+
+def main():
+    """Run the comparison and print timings and order-dependent results."""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baskets", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--extra-cents", type=int, default=0,
+                        help="céntimos que se suman a cada precio del catálogo")
+    args = parser.parse_args()
+
+    baskets = generate_baskets(args.baskets, args.seed)
+    results = run(baskets, with_extra_cents(get_catalog(), args.extra_cents), args.repeat)
+    float_seconds = results["float"][0]
+    for name, (seconds, totals, reversed_totals) in results.items():
+        changed = sum(1 for a, b in zip(totals, reversed_totals) if a != b)
+        print(f"{name:<8} {seconds:8.3f} s  {seconds / float_seconds:5.2f}x float"
+              f"  cambian con el orden: {changed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Compare reporting over a JSONL purchase history with the columnar format.
+
+Generates `--purchases` priced baskets (with `models.price_baskets`), writes
+them both as JSONL ledger records and as a `.gcol` file, and times a full
+report over each: JSON parsing plus `analytics.aggregate_lines`, against
+memory-mapping the columnar file plus `ColumnarHistory.summary`. File sizes
+are reported too.
+
+Uso:
+    PYTHONPATH=. python benchmarks/bench_columnar.py --purchases 1000000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from analytics import WINDOWS, aggregate_lines
+from benchmarks.bench_batch_pricing import generate_baskets
+from columnar import ColumnarHistory, ColumnarWriter
+from models import price_baskets
+
+
+def write_history(baskets, jsonl_path, gcol_path):
+    """Price `baskets` and write them in both formats."""
+    pricing = price_baskets(baskets)
+    subtotals = pricing.costs.sum(axis=1).tolist()
+    with open(jsonl_path, "w", encoding="utf-8") as out, ColumnarWriter(gcol_path) as writer:
+        for idx, basket in enumerate(baskets):
+            totals = (subtotals[idx], float(pricing.premium_surcharge[idx]),
+                      float(pricing.special_discount[idx]), float(pricing.totals[idx]))
+            writer.add_purchase(basket, totals, created_at=idx)
+            out.write(json.dumps({
+                "created_at": idx,
+                "items": [{"plan": plan, "additional_features": additional,
+                           "premium_features": premium}
+                          for plan, additional, premium in basket],
+                "costs": pricing.basket_costs(idx),
+                "premium_surcharge": totals[1],
+                "special_discount": totals[2],
+                "total": totals[3],
+            }) + "\n")
+
+
+def report_from_jsonl(path):
+    """Aggregate the JSONL history into a single window."""
+    with open(path, "r", encoding="utf-8") as f:
+        return aggregate_lines(f, WINDOWS["week"] * 10_000)
+
+
+def report_from_columnar(path):
+    """Summarize the columnar history."""
+    with ColumnarHistory(path) as history:
+        return history.summary()
+
+
+def main():
+    """Run the comparison in a temporary directory."""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--purchases", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        jsonl_path = os.path.join(tmp, "history.jsonl")
+        gcol_path = os.path.join(tmp, "history.gcol")
+        write_history(generate_baskets(args.purchases), jsonl_path, gcol_path)
+
+        rows = (("JSONL", jsonl_path, report_from_jsonl),
+                ("columnar", gcol_path, report_from_columnar))
+        for label, path, func in rows:
+            start = time.perf_counter()
+            func(path)
+            elapsed = time.perf_counter() - start
+            print(f"{label:<9} {os.path.getsize(path) / 1e6:9.1f} MB en disco"
+                  f" {elapsed:9.3f} s")
+
+
+if __name__ == "__main__":
+    main()
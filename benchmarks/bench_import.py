@@ -0,0 +1,110 @@
+"""Startup benchmark: library import time and first-price latency.
+
+Each scenario runs in a fresh interpreter (`python -X importtime`) so module
+caches do not hide the cost. Scenarios:
+
+- lazy import: `import gym_membership` (catalog and menu not loaded).
+- eager import: what importing the package used to do, i.e. also import
+  `menu` and NumPy and read the catalog.
+- first price: lazy import plus pricing one basket (loads the catalog).
+
+Config loading is also timed with and without the precompiled cache.
+
+Uso:
+    PYTHONPATH=. python benchmarks/bench_import.py --runs 20
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from config_manager import load_config
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "lazy import": "import gym_membership",
+    "eager import": (
+        "import gym_membership, menu, numpy\n"
+        "gym_membership.Item.plan"
+    ),
+    "first price": (
+        "import gym_membership\n"
+        "b = gym_membership.Buyer([gym_membership.Item('Basic', [], [])])\n"
+        "b.sum_costs(b.calculate_costs())"
+    ),
+    "cli startup": "import main",
+}
+
+
+def run_scenario(code):
+    """Run `code` in a fresh interpreter and return (seconds, importtime lines)."""
+    timed = (
+        "import time\n"
+        "_start = time.perf_counter()\n"
+        f"{code}\n"
+        "print(time.perf_counter() - _start)\n"
+    )
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", timed],
+        capture_output=True, text=True, check=True, cwd=ROOT, env=env,
+    )
+    return float(proc.stdout.strip()), proc.stderr.splitlines()
+
+
+def slowest_imports(importtime_lines, top=5):
+    """Return the `top` modules with the largest self import time."""
+    rows = []
+    for line in importtime_lines:
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def time_config_load(runs):
+    """Median seconds of `load_config` with and without the cache."""
+    load_config()  # generar la caché
+    results = {}
+    for label, use_cache in (("json", False), ("cache", True)):
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            load_config(use_cache=use_cache)
+            samples.append(time.perf_counter() - start)
+        results[label] = statistics.median(samples)
+    return results
+
+
+def main():
+    """Run every scenario and print median timings."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    medians = {}
+    for name, code in SCENARIOS.items():
+        samples = []
+        lines = []
+        for _ in range(args.runs):
+            seconds, lines = run_scenario(code)
+            samples.append(seconds)
+        medians[name] = statistics.median(samples)
+        print(f"{name:>13}: {medians[name] * 1000:8.2f} ms")
+        for self_us, module in slowest_imports(lines, top=3):
+            print(f"{'':>15}{module} ({self_us} us)")
+
+    print(f"\nAhorro del import perezoso: "
+          f"{medians['eager import'] / medians['lazy import']:.1f}x")
+
+    config_times = time_config_load(args.runs * 10)
+    print(f"load_config JSON:  {config_times['json'] * 1e6:8.1f} us")
+    print(f"load_config caché: {config_times['cache'] * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
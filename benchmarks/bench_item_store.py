@@ -0,0 +1,87 @@
+"""Compare the memory and pricing time of `Item` lists and `ItemStore`.
+
+Builds `--memberships` random memberships (see `benchmarks.suite.make_items`)
+as a list of `Item` objects and as an `ItemStore`, measures with
+`tracemalloc` the memory each one allocates, and times pricing them as one
+purchase with `Buyer.quote` and `ItemStore.quote`.
+
+Uso:
+    PYTHONPATH=. python benchmarks/bench_item_store.py --memberships 1000000
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from catalog import get_catalog
+from item_store import ItemStore
+from models import Item, Buyer
+
+
+def make_lines(n_lines, seed=0):
+    """Random (plan, additional, premium) lines; about a third carry premium features."""
+    catalog = get_catalog()
+    rng = random.Random(seed)
+    plans = list(catalog.plans)
+    additional = list(catalog.additional_features)
+    premium = list(catalog.premium_features)
+    return [(rng.choice(plans), rng.sample(additional, rng.randint(0, 3)),
+             rng.sample(premium, 1) if rng.random() < 0.33 else [])
+            for _ in range(n_lines)]
+
+
+def build_items(lines):
+    """One `Item` per line, with its own feature lists (as the menu builds them)."""
+    return [Item(plan_name, list(additional), list(premium))
+            for plan_name, additional, premium in lines]
+
+
+def build_store(lines):
+    """An `ItemStore` with one row per line."""
+    store = ItemStore()
+    for plan_name, additional, premium in lines:
+        store.append(plan_name, additional, premium)
+    return store
+
+
+def measure(build, lines):
+    """Return (object, bytes allocated by `build(lines)`)."""
+    tracemalloc.start()
+    try:
+        result = build(lines)
+        allocated = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return result, allocated
+
+
+def main():
+    """Run the comparison and print bytes per membership and pricing times."""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--memberships", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    lines = make_lines(args.memberships, args.seed)
+    items, items_bytes = measure(build_items, lines)
+    store, store_bytes = measure(build_store, lines)
+
+    start = time.perf_counter()
+    expected = Buyer(items).quote()
+    buyer_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    quote = store.quote()
+    store_seconds = time.perf_counter() - start
+    assert quote == expected
+
+    n_items = len(items)
+    print(f"Item      {items_bytes / n_items:8.1f} bytes/membresía"
+          f"  quote {buyer_seconds:7.3f} s")
+    print(f"ItemStore {store_bytes / n_items:8.1f} bytes/membresía"
+          f"  quote {store_seconds:7.3f} s")
+    print(f"Memoria: {items_bytes / store_bytes:.1f}x menos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Ledger write throughput: one commit per purchase vs group commit.
+
+`--threads` confirm purchases concurrently through `Ledger.record_purchase`
+(each waits until its purchase is durable). With `batch_size=1` every
+purchase pays its own fsync; the default batches everything queued while
+the previous commit runs. A bulk import of the same purchases is timed too.
+
+Uso:
+    PYTHONPATH=. python benchmarks/bench_ledger.py --purchases 20000 --threads 32
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_batch_pricing import generate_baskets
+from ledger import Ledger, record_from_quote
+from models import Item, Buyer
+
+
+def make_records(n_records, seed=0):
+    """Price `n_records` random baskets and return their ledger records."""
+    records = []
+    for basket in generate_baskets(n_records, seed):
+        items = [Item(plan_name, additional, premium)
+                 for plan_name, additional, premium in basket]
+        records.append(record_from_quote(items, Buyer(items).quote()))
+    return records
+
+
+def confirm_concurrently(ledger, records, n_threads):
+    """Record `records` from `n_threads` threads; returns elapsed seconds."""
+    def worker(chunk):
+        for record in chunk:
+            ledger.record_purchase(record)
+
+    threads = [threading.Thread(target=worker, args=(records[idx::n_threads],))
+               for idx in range(n_threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def main():
+    """Run the benchmark in a temporary directory."""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--purchases", type=int, default=20_000)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--single-commit-purchases", type=int, default=1_000,
+                        help="Compras para el caso de un commit por compra (es lento).")
+    args = parser.parse_args()
+
+    records = make_records(args.purchases)
+    with tempfile.TemporaryDirectory() as tmp:
+        single = records[:args.single_commit_purchases]
+        with Ledger(os.path.join(tmp, "single.db"), batch_size=1) as ledger:
+            elapsed = confirm_concurrently(ledger, single, args.threads)
+        print(f"Un commit por compra:   {len(single) / elapsed:10,.0f} compras/s")
+
+        with Ledger(os.path.join(tmp, "group.db")) as ledger:
+            elapsed = confirm_concurrently(ledger, records, args.threads)
+            commits = ledger.stats["commits"]
+        print(f"Commit en grupo:        {len(records) / elapsed:10,.0f} compras/s"
+              f" ({len(records) / commits:.1f} compras por commit)")
+
+        with Ledger(os.path.join(tmp, "import.db")) as ledger:
+            start = time.perf_counter()
+            ledger.bulk_import(records)
+            elapsed = time.perf_counter() - start
+        print(f"Importación masiva:     {len(records) / elapsed:10,.0f} compras/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Load-test client for the HTTP quote server (`server.py`).
+
+Opens `--connections` keep-alive connections; each one sends its quotes in
+pipelined batches of `--pipeline` requests and reads the responses back in
+order. Reports throughput (quotes/s) and per-request latency percentiles.
+
+Without `--port` a server is started in a child process (`main.py serve
+--port 0`) and stopped with SIGTERM at the end, which also exercises the
+graceful drain.
+
+Uso:
+    PYTHONPATH=. python benchmarks/bench_server.py --requests 20000
+    PYTHONPATH=. python benchmarks/bench_server.py --port 8080 --connections 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.bench_batch_pricing import generate_baskets
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Cestas distintas que se reparten entre las peticiones
+DISTINCT_BASKETS = 200
+
+
+def build_requests(n_distinct, host, seed=0):
+    """Return `n_distinct` encoded POST /quote requests."""
+    requests = []
+    for idx, basket in enumerate(generate_baskets(n_distinct, seed)):
+        body = json.dumps({
+            "buyer": f"C-{idx}",
+            "items": [{"plan": plan, "additional_features": additional,
+                       "premium_features": premium}
+                      for plan, additional, premium in basket],
+        }).encode("utf-8")
+        head = (f"POST /quote HTTP/1.1\r\nHost: {host}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+        requests.append(head.encode("latin-1") + body)
+    return requests
+
+
+async def read_response(reader):
+    """Read one response; returns (status, body)."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    match = re.search(rb"(?i)content-length:\s*(\d+)", head)
+    body = await reader.readexactly(int(match.group(1))) if match else b""
+    return status, body
+
+
+async def _client(address, requests, n_requests, pipeline, results):
+    reader, writer = await asyncio.open_connection(*address)
+    try:
+        sent = 0
+        while sent < n_requests:
+            batch = min(pipeline, n_requests - sent)
+            payload = b"".join(requests[(sent + i) % len(requests)] for i in range(batch))
+            start = time.perf_counter()
+            writer.write(payload)
+            await writer.drain()
+            for _ in range(batch):
+                status, _body = await read_response(reader)
+                results["latencies"].append(time.perf_counter() - start)
+                if status != 200:
+                    results["errors"].append(status)
+            sent += batch
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def load_test(address, n_requests, connections, pipeline):
+    """Run the load test against (host, port) and return a summary dict."""
+    requests = build_requests(DISTINCT_BASKETS, address[0])
+    per_connection = [n_requests // connections] * connections
+    for idx in range(n_requests % connections):
+        per_connection[idx] += 1
+    # Cada conexión empieza en una cesta distinta
+    random.Random(0).shuffle(requests)
+    results = {"latencies": [], "errors": []}
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _client(address, requests[idx:] + requests[:idx], count, pipeline, results)
+        for idx, count in enumerate(per_connection) if count
+    ))
+    elapsed = time.perf_counter() - start
+    latencies = sorted(results["latencies"])
+    return {
+        "requests": len(latencies),
+        "errors": len(results["errors"]),
+        "seconds": elapsed,
+        "quotes_per_second": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1e3,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1e3,
+        "max_ms": latencies[-1] * 1e3,
+    }
+
+
+def start_server_process(extra_args=()):
+    """Start `main.py serve --port 0` and return (process, port)."""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    process = subprocess.Popen(  # pylint: disable=consider-using-with
+        [sys.executable, os.path.join(ROOT, "main.py"), "serve", "--port", "0",
+         *extra_args],
+        stderr=subprocess.PIPE, text=True, env=env)
+    line = process.stderr.readline()
+    match = re.search(r":(\d+)\s*$", line)
+    if not match:
+        process.kill()
+        raise RuntimeError(f"El servidor no arrancó: {line!r}")
+    return process, int(match.group(1))
+
+
+def main():
+    """Run the load test against a given or freshly started server."""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="Servidor ya en marcha.")
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--pipeline", type=int, default=16)
+    args = parser.parse_args()
+
+    process = None
+    port = args.port
+    if port is None:
+        process, port = start_server_process()
+    try:
+        summary = asyncio.run(load_test((args.host, port), args.requests,
+                                        args.connections, args.pipeline))
+    finally:
+        if process is not None:
+            process.send_signal(signal.SIGTERM)
+            process.wait(timeout=30)
+    print(f"Peticiones:        {summary['requests']} ({summary['errors']} errores)")
+    print(f"Cotizaciones/s:    {summary['quotes_per_second']:,.0f}")
+    print(f"Latencia p50/p99:  {summary['p50_ms']:.2f} / {summary['p99_ms']:.2f} ms"
+          f" (máx {summary['max_ms']:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""Pricing benchmark suite with a regression gate.
+
+Benchmarks `Item.calculate_total_membership_cost`, `Buyer.calculate_costs`,
+`Buyer.sum_costs` (with premium surcharge breakdown), `utils.select_features`,
+`utils.classify_features` and `utils.validar_plan` over synthetic baskets of
+several sizes, saves the results as JSON and compares them with a stored
+baseline.
+
+Uso:
+    # Guardar una línea base
+    PYTHONPATH=. python -m benchmarks.suite --output baseline.json
+
+    # Comparar: sale con código 1 si algo empeora más de un 15%
+    PYTHONPATH=. python -m benchmarks.suite --baseline baseline.json --threshold 0.15
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import timeit
+
+from models import Item, Buyer
+from utils import classify_features, select_features, validar_plan
+
+DEFAULT_SIZES = (1, 100, 10_000, 1_000_000)
+DEFAULT_THRESHOLD = 0.10
+# Tiempo mínimo de cada repetición, para que los tamaños pequeños sean medibles
+MIN_REPEAT_SECONDS = 0.05
+
+
+def make_items(n_items, seed=0):
+    """Generate `n_items` random items; about a third carry premium features."""
+    rng = random.Random(seed)
+    plans = list(Item.plan)
+    additional = list(Item.ADDITIONAL_FEATURES)
+    premium = list(Item.PREMIUM_FEATURES)
+    return [
+        Item(rng.choice(plans),
+             rng.sample(additional, rng.randint(0, 3)),
+             rng.sample(premium, 1) if rng.random() < 0.33 else [])
+        for _ in range(n_items)
+    ]
+
+
+def make_feature_inputs(n_inputs, seed=0):
+    """Generate raw feature inputs as typed by users (case, spaces, typos)."""
+    rng = random.Random(seed)
+    names = list(Item.ADDITIONAL_FEATURES) + list(Item.PREMIUM_FEATURES)
+    variants = [name.lower() for name in names] + [f"  {name} " for name in names]
+    return [rng.choice(variants + ["Free Massage"]) for _ in range(n_inputs)]
+
+
+def make_plan_inputs(n_inputs, seed=0):
+    """Generate raw plan inputs as typed by users."""
+    rng = random.Random(seed)
+    names = list(Item.plan)
+    variants = [name.lower() for name in names] + [f" {name.upper()} " for name in names]
+    return [rng.choice(variants + ["gold", ""]) for _ in range(n_inputs)]
+
+
+def _bench_item_cost(n_items):
+    items = make_items(n_items)
+
+    def run():
+        for item in items:
+            item.calculate_total_membership_cost()
+    return run
+
+
+def _bench_calculate_costs(n_items):
+    buyer = Buyer(make_items(n_items))
+    return buyer.calculate_costs
+
+
+def _bench_sum_costs(n_items):
+    items = make_items(n_items)
+    # Garantizar el recargo premium para medir también el desglose
+    items[0] = Item("Basic", [], ["Exclusive Gym Facilities"])
+    buyer = Buyer(items)
+    costs = buyer.calculate_costs()
+    return lambda: buyer.sum_costs(costs)
+
+
+def _bench_select_features(n_inputs):
+    inputs = make_feature_inputs(n_inputs)
+    return lambda: select_features(inputs)
+
+
+def _bench_classify_features(n_inputs):
+    inputs = make_feature_inputs(n_inputs)
+    return lambda: classify_features(inputs)
+
+
+def _bench_validar_plan(n_inputs):
+    inputs = make_plan_inputs(n_inputs)
+
+    def run():
+        for plan_input in inputs:
+            validar_plan(plan_input)
+    return run
+
+
+# nombre -> fábrica que recibe el tamaño y devuelve la función a medir
+BENCHMARKS = {
+    "item_total_membership_cost": _bench_item_cost,
+    "buyer_calculate_costs": _bench_calculate_costs,
+    "buyer_sum_costs": _bench_sum_costs,
+    "select_features": _bench_select_features,
+    "classify_features": _bench_classify_features,
+    "validar_plan": _bench_validar_plan,
+}
+
+
+def measure(func, repeat=5):
+    """Return the median seconds per call of `func` over `repeat` repetitions."""
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    if elapsed < MIN_REPEAT_SECONDS:
+        number = max(number, int(number * MIN_REPEAT_SECONDS / max(elapsed, 1e-9)))
+    samples = timer.repeat(repeat=repeat, number=number)
+    return statistics.median(samples) / number
+
+
+def run_suite(sizes=DEFAULT_SIZES, names=None, repeat=5, progress=None):
+    """Run the selected benchmarks for every size.
+
+    Returns:
+        dict: JSON-serializable results with a `results` map keyed by
+        "<benchmark>[n=<size>]".
+    """
+    results = {}
+    for name, factory in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        for size in sizes:
+            seconds = measure(factory(size), repeat)
+            key = f"{name}[n={size}]"
+            results[key] = {
+                "benchmark": name,
+                "size": size,
+                "seconds": seconds,
+                "ns_per_item": seconds / size * 1e9,
+            }
+            if progress:
+                progress(key, results[key])
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """Compare results with a baseline.
+
+    Only benchmarks present in both are tracked. A benchmark regresses when
+    it is slower than the baseline by more than `threshold` (0.10 = 10%).
+
+    Returns:
+        list: One dict per tracked benchmark with `key`, `baseline`,
+        `current`, `change` and `regressed`.
+    """
+    rows = []
+    for key, base in baseline.get("results", {}).items():
+        now = current.get("results", {}).get(key)
+        if now is None or not base["seconds"]:
+            continue
+        change = now["seconds"] / base["seconds"] - 1
+        rows.append({
+            "key": key,
+            "baseline": base["seconds"],
+            "current": now["seconds"],
+            "change": change,
+            "regressed": change > threshold,
+        })
+    return rows
+
+
+def _print_result(key, result):
+    print(f"{key:<45} {result['seconds'] * 1e3:12.4f} ms"
+          f" {result['ns_per_item']:10.1f} ns/item", flush=True)
+
+
+def main(argv=None):
+    """Run the suite; return 1 if a tracked benchmark regressed."""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS),
+                        help="Ejecutar solo estos benchmarks.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Guardar los resultados en este JSON.")
+    parser.add_argument("--baseline", help="JSON de línea base con el que comparar.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Empeoramiento relativo tolerado (0.10 = 10%%).")
+    args = parser.parse_args(argv)
+
+    current = run_suite(args.sizes, args.only, args.repeat, progress=_print_result)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    rows = compare(current, baseline, args.threshold)
+    print(f"\nComparación con {args.baseline} (umbral {args.threshold:.0%}):")
+    for row in rows:
+        flag = "REGRESIÓN" if row["regressed"] else "ok"
+        print(f"{row['key']:<45} {row['change']:+8.1%}  {flag}")
+    regressions = [row for row in rows if row["regressed"]]
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) empeoraron más del umbral.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+"""Resumable monthly renewal billing, priced in fixed-size chunks.
+
+`run_billing(roster_path, invoices_path)` reprices every active membership
+of a roster with the current catalog and writes one invoice per buyer:
+
+- The roster is JSONL in the format of the `quote` command (see
+  `pipeline.py`): one line per membership, and consecutive lines of the same
+  `buyer` form one basket. Lines with `"active": false` are not billed.
+- Baskets are priced through `Item`/`Buyer` (`pipeline.price_purchase`,
+  with a `QuoteCache`, since renewals repeat a lot) in chunks of
+  `chunk_size` baskets.
+- After each chunk the invoices are flushed to disk and a checkpoint is
+  replaced atomically (temporary file + `os.replace`) with the roster byte
+  offset, the length of the invoices file and the running totals.
+- Running again with the same checkpoint resumes: the invoices file is cut
+  back to its committed length, dropping a half-written chunk, and the
+  roster is read from the committed offset, so no invoice is lost or
+  written twice. A finished run is not billed again.
+- Every chunk reports its throughput and an ETA from the roster bytes left.
+
+Each invoice is the `quote` result of the basket plus its number and period:
+
+    {"invoice": 1, "period": "2026-10", "buyer": "C-1", "items": 2,
+     "costs": {"Premium": 54.0}, ..., "total": 54.0}
+"""
+import json
+import os
+import time
+
+from cents import to_amount, to_cents
+from pipeline import price_purchase
+from quote_cache import DEFAULT_MAXSIZE, QuoteCache
+
+DEFAULT_CHUNK_SIZE = 1000
+CHECKPOINT_FORMAT = 1
+
+
+def checkpoint_path_for(invoices_path):
+    """Default checkpoint file of an invoices file."""
+    return f"{invoices_path}.checkpoint"
+
+
+def _roster_stamp(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def read_baskets(stream, offset=0):
+    """Read the baskets of a roster opened in binary mode, from byte `offset`.
+
+    Consecutive lines of one buyer form a basket; a line without `buyer`
+    is a basket of its own.
+
+    Yields:
+        tuple: (buyer_id, order lines, byte offset just after the basket).
+
+    Raises:
+        ValueError: If a line is not a JSON object.
+    """
+    stream.seek(offset)
+    position = end = offset
+    buyer_id = orders = None
+    for line in stream:
+        start, position = position, position + len(line)
+        if not line.strip():
+            continue
+        try:
+            order = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"Byte {start}: JSON inválido ({e})") from e
+        if not isinstance(order, dict):
+            raise ValueError(f"Byte {start}: se esperaba un objeto JSON")
+        # Una línea sin `buyer` es una compra aparte (ver `pipeline.group_by_buyer`)
+        if orders is not None and (buyer_id is None or order.get("buyer") != buyer_id):
+            yield buyer_id, orders, end
+            orders = None
+        if orders is None:
+            buyer_id, orders = order.get("buyer"), []
+        orders.append(order)
+        end = position
+    if orders is not None:
+        yield buyer_id, orders, end
+
+
+def load_checkpoint(path):
+    """Return the checkpoint stored at `path`, or None if there is none.
+
+    Raises:
+        ValueError: If the file exists but is not a billing checkpoint.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Checkpoint ilegible '{path}': {e}") from e
+    if not isinstance(checkpoint, dict) or checkpoint.get("format") != CHECKPOINT_FORMAT:
+        raise ValueError(f"'{path}' no es un checkpoint de facturación")
+    return checkpoint
+
+
+def save_checkpoint(path, checkpoint):
+    """Replace the checkpoint at `path` atomically."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except OSError:
+        # El checkpoint anterior sigue siendo válido
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _start(roster_path, invoices_path, checkpoint_path, period, restart):
+    """Checkpoint to continue from: the stored one or a fresh one."""
+    checkpoint = None if restart else load_checkpoint(checkpoint_path)
+    if checkpoint is None:
+        return {
+            "format": CHECKPOINT_FORMAT,
+            "roster": os.path.abspath(roster_path),
+            "roster_stamp": _roster_stamp(roster_path),
+            "invoices_path": os.path.abspath(invoices_path),
+            "period": period or time.strftime("%Y-%m"),
+            "roster_offset": 0,
+            "invoices_offset": 0,
+            "invoices": 0,
+            "errors": 0,
+            "inactive": 0,
+            "chunks": 0,
+            "total_cents": 0,
+            "completed": False,
+        }, False
+    if (checkpoint.get("roster") != os.path.abspath(roster_path)
+            or checkpoint.get("roster_stamp") != _roster_stamp(roster_path)
+            or checkpoint.get("invoices_path") != os.path.abspath(invoices_path)):
+        raise ValueError("El checkpoint corresponde a otro padrón o a otra versión del "
+                         "padrón; use --restart para empezar de nuevo")
+    if period and period != checkpoint["period"]:
+        raise ValueError(f"El checkpoint es del periodo {checkpoint['period']}; "
+                         "use --restart para facturar otro periodo")
+    return checkpoint, True
+
+
+def _invoice_lines(baskets, checkpoint, cache):
+    """Price a chunk of baskets; returns (encoded invoice lines, chunk totals)."""
+    lines = []
+    totals = {"invoices": 0, "errors": 0, "inactive": 0, "total_cents": 0}
+    for buyer_id, orders in baskets:
+        active = [order for order in orders if order.get("active", True) is not False]
+        totals["inactive"] += len(orders) - len(active)
+        if not active:
+            continue
+        result = price_purchase(buyer_id, active, cache)
+        totals["invoices"] += 1
+        if "error" in result:
+            totals["errors"] += 1
+        else:
+            # El total de un Quote son céntimos enteros / 100: vuelve exacto
+            totals["total_cents"] += to_cents(result["total"])
+        invoice = {"invoice": checkpoint["invoices"] + totals["invoices"],
+                   "period": checkpoint["period"]}
+        invoice.update(result)
+        lines.append((json.dumps(invoice, ensure_ascii=False) + "\n").encode("utf-8"))
+    return lines, totals
+
+
+class BillingRun:  # pylint: disable=too-few-public-methods
+    """Billing run of one roster into one invoices file, resumable by checkpoint.
+
+    Attributes:
+        roster_path: Roster JSONL file (see module doc).
+        invoices_path: Invoices JSONL file, created or resumed.
+        chunk_size: Baskets priced between two checkpoints.
+        checkpoint_path: Checkpoint file (default: `checkpoint_path_for`).
+        checkpoint: State of the run, as stored in the checkpoint file.
+    """
+
+    def __init__(self, roster_path, invoices_path, chunk_size=DEFAULT_CHUNK_SIZE,
+                 checkpoint_path=None):
+        if chunk_size < 1:
+            raise ValueError("chunk_size debe ser al menos 1")
+        self.roster_path = roster_path
+        self.invoices_path = invoices_path
+        self.chunk_size = chunk_size
+        self.checkpoint_path = checkpoint_path or checkpoint_path_for(invoices_path)
+        self.checkpoint = None
+        # (caché, progress, instante de inicio, offset del padrón al empezar)
+        self._session = (None, None, 0.0, 0)
+
+    def run(self, period=None, restart=False, cache_size=DEFAULT_MAXSIZE, progress=None):
+        """Bill every active basket not billed yet.
+
+        Args:
+            period: Billed period (default: the checkpoint's, or the current
+                month as "YYYY-MM").
+            restart: Ignore an existing checkpoint and bill from the start.
+            cache_size: Distinct baskets kept in the `QuoteCache` (0 disables it).
+            progress: Optional callable receiving a dict per committed chunk
+                (chunk, baskets, invoices, seconds, invoices_per_second,
+                percent, eta_seconds).
+
+        Returns:
+            dict: Report with invoices, errors, inactive lines, chunks,
+            billed total, whether the run resumed, seconds and invoices per
+            second of this execution.
+
+        Raises:
+            ValueError: If the roster has a malformed line or the checkpoint
+                belongs to another run.
+        """
+        self.checkpoint, resumed = _start(self.roster_path, self.invoices_path,
+                                          self.checkpoint_path, period, restart)
+        self._session = (QuoteCache(cache_size) if cache_size > 0 else None, progress,
+                         time.perf_counter(), self.checkpoint["roster_offset"])
+        first_invoices = self.checkpoint["invoices"]
+
+        if not self.checkpoint["completed"]:
+            offset = self.checkpoint["invoices_offset"]
+            mode = "r+b" if resumed and os.path.exists(self.invoices_path) else "wb"
+            with open(self.roster_path, "rb") as roster, \
+                    open(self.invoices_path, mode) as invoices:
+                # Descartar lo escrito después del último checkpoint
+                invoices.truncate(offset)
+                invoices.seek(offset)
+                chunk = []
+                for buyer_id, orders, end in read_baskets(roster,
+                                                          self.checkpoint["roster_offset"]):
+                    chunk.append((buyer_id, orders))
+                    if len(chunk) == self.chunk_size:
+                        self._commit(chunk, end, invoices)
+                        chunk = []
+                self._commit(chunk, self.checkpoint["roster_stamp"][0], invoices,
+                             completed=True)
+
+        seconds = time.perf_counter() - self._session[2]
+        billed = self.checkpoint["invoices"] - first_invoices
+        return {
+            "period": self.checkpoint["period"],
+            "invoices": self.checkpoint["invoices"],
+            "billed_now": billed,
+            "errors": self.checkpoint["errors"],
+            "inactive": self.checkpoint["inactive"],
+            "chunks": self.checkpoint["chunks"],
+            "total": to_amount(self.checkpoint["total_cents"]),
+            "resumed": resumed,
+            "seconds": round(seconds, 6),
+            "invoices_per_second": round(billed / seconds, 1) if seconds > 0 else 0.0,
+        }
+
+    def _commit(self, chunk, end, invoices, completed=False):
+        """Price and write one chunk, make it durable and checkpoint it."""
+        start = time.perf_counter()
+        checkpoint = self.checkpoint
+        cache, progress, _started, _first_offset = self._session
+        lines, totals = _invoice_lines(chunk, checkpoint, cache)
+        invoices.writelines(lines)
+        invoices.flush()
+        os.fsync(invoices.fileno())
+        for key, value in totals.items():
+            checkpoint[key] += value
+        checkpoint["invoices_offset"] = invoices.tell()
+        checkpoint["roster_offset"] = end
+        checkpoint["completed"] = completed
+        if chunk:
+            checkpoint["chunks"] += 1
+        save_checkpoint(self.checkpoint_path, checkpoint)
+        if progress is not None and chunk:
+            seconds = time.perf_counter() - start
+            progress(self._chunk_stats(len(chunk), totals["invoices"], seconds))
+
+    def _chunk_stats(self, baskets, invoices, seconds):
+        """Throughput of the last chunk plus percent done and ETA of the run."""
+        _cache, _progress, started, first_offset = self._session
+        offset = self.checkpoint["roster_offset"]
+        roster_size = self.checkpoint["roster_stamp"][0]
+        elapsed = time.perf_counter() - started
+        # Bytes del padrón por segundo en esta ejecución
+        rate = (offset - first_offset) / elapsed if elapsed > 0 else 0.0
+        return {
+            "chunk": self.checkpoint["chunks"],
+            "baskets": baskets,
+            "invoices": invoices,
+            "seconds": round(seconds, 6),
+            "invoices_per_second": round(invoices / seconds, 1) if seconds > 0 else 0.0,
+            "percent": round(100 * offset / roster_size, 1) if roster_size else 100.0,
+            "eta_seconds": round((roster_size - offset) / rate, 3) if rate > 0 else None,
+        }
+
+
+def run_billing(roster_path, invoices_path, chunk_size=DEFAULT_CHUNK_SIZE, **options):
+    """Run a `BillingRun`; `options` are those of `BillingRun.run` plus `checkpoint_path`."""
+    checkpoint_path = options.pop("checkpoint_path", None)
+    return BillingRun(roster_path, invoices_path, chunk_size, checkpoint_path).run(**options)
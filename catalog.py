@@ -0,0 +1,477 @@
+"""Immutable, versioned catalog snapshots with hot reload.
+
+The catalog (plans, features and availability maps) is published as an
+immutable `Catalog` snapshot. Reloading builds a new snapshot with the next
+version number and swaps the reference in one assignment, so a reader that
+took a snapshot keeps seeing one consistent set of prices.
+
+`config/config.json` is reloaded when its mtime or size changes, either on
+demand with `refresh_catalog()` or from a background thread started with
+`start_auto_reload()`. Availability is toggled at runtime with
+`set_availability()`, which publishes a copy of the current snapshot the same
+way (copy-on-write): readers never lock and never see a half-applied change.
+"""
+import os
+import threading
+from collections.abc import Mapping
+
+from cents import to_cents
+from config_manager import load_config, CONFIG_PATH
+from price_table import PriceTable
+from pricing_rules import compile_rules
+
+# Configuración embebida, usada cuando no hay `config/config.json`
+DEFAULT_CONFIG = {
+    "plan": {
+        "Basic": {
+            "benefits": 'Access to standard gym equipment and locker room.',
+            "cost": 25
+        },
+        "Premium": {
+            "benefits": 'Includes Basic + Sauna access and free towel service.',
+            "cost": 30
+        },
+        "Student": {
+            "benefits": 'Access to standard gym equipment and locker room + early hours access.',
+            "cost": 20
+        },
+        "Family": {
+            "benefits": 'Access for up to 4 family members + Pool access.',
+            "cost": 40
+        }
+    },
+    "additional_features": {
+        'Personal Training': 30,
+        'Group Classes': 20,
+        'Access to Pool': 15,
+        'Specialized Program': 40
+    },
+    "premium_features": {
+        'Exclusive Gym Facilities': 100,
+        'Specialized Training Programs': 80
+    },
+    # Mapas de disponibilidad opcionales: vacío = todo disponible
+    "plan_available": {},
+    "feature_available": {},
+    # Descuentos y recargos (ver pricing_rules.py)
+    "pricing_rules": [
+        {"type": "quantity_discount", "name": "group_discount",
+         "breaks": [{"min_quantity": 2, "percent": 10}]},
+        {"type": "percentage", "name": "premium_surcharge", "effect": "surcharge",
+         "when": "premium", "percent": 15},
+        {"type": "tiered", "name": "special_discount", "effect": "discount",
+         "tiers": [{"above": 200, "amount": 20}, {"above": 400, "amount": 50}]},
+    ],
+}
+
+# Tipos de feature en el índice de búsqueda
+ADDITIONAL = "additional"
+PREMIUM = "premium"
+
+
+def _section(config, key):
+    """Return `config[key]` if it is a dict, else the embedded default."""
+    value = config.get(key) if config else None
+    if isinstance(value, dict):
+        return value
+    return DEFAULT_CONFIG[key]
+
+
+class FrozenDict(dict):
+    """Read-only dict used for catalog data.
+
+    It is still a `dict` (so existing code and `json.dumps` keep working),
+    but every mutating method raises `TypeError`.
+    """
+
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Catalog data is read-only; publish a new catalog instead")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+def _check_feature_names(additional, premium):
+    """Reject feature names used twice, ignoring case, across both sections.
+
+    Feature lookups are case-insensitive and each name maps to one kind and
+    one price, so a repeated name would be ambiguous.
+    """
+    seen = set()
+    for name in list(additional) + list(premium):
+        if name.lower() in seen:
+            raise ValueError(f"La característica '{name}' está repetida en el catálogo")
+        seen.add(name.lower())
+
+
+def _freeze(mapping):
+    """Return a read-only copy of a (possibly nested) dict."""
+    return FrozenDict({
+        key: _freeze(value) if isinstance(value, dict) else value
+        for key, value in mapping.items()
+    })
+
+
+class Catalog:
+    """Immutable snapshot of plans, features and availability maps.
+
+    Attributes:
+        version: Monotonic version number of the snapshot.
+        plans: { plan_name: { "benefits": str, "cost": number } }
+        additional_features: { feature_name: cost }
+        premium_features: { feature_name: cost }
+        plan_available: { plan_name: bool }
+        feature_available: { feature_name: bool }
+        source_stamp: (mtime_ns, size) of the config file it was built from,
+            or None for the embedded configuration.
+        pricing_rules: `pricing_rules.PricingRules` compiled from the
+            `pricing_rules` list of the configuration.
+
+    Raises:
+        ValueError: If the pricing rules of `config` are malformed or a
+            feature name appears twice (in any case, in either section).
+    """
+
+    __slots__ = (
+        "version", "plans", "additional_features", "premium_features",
+        "plan_available", "feature_available", "source_stamp", "pricing_rules",
+        "_feature_index", "_cent_prices", "_price_table",
+    )
+    version: int
+    plans: dict
+    additional_features: dict
+    premium_features: dict
+    plan_available: dict
+    feature_available: dict
+    source_stamp: tuple
+    pricing_rules: object
+    _feature_index: dict
+    _cent_prices: tuple
+    _price_table: object
+
+    def __init__(self, config=None, version=1, source_stamp=None):
+        _check_feature_names(_section(config, "additional_features"),
+                             _section(config, "premium_features"))
+        values = {
+            "version": version,
+            "plans": _freeze(_section(config, "plan")),
+            "additional_features": _freeze(_section(config, "additional_features")),
+            "premium_features": _freeze(_section(config, "premium_features")),
+            "plan_available": _freeze((config or {}).get("plan_available") or {}),
+            "feature_available": _freeze((config or {}).get("feature_available") or {}),
+            "source_stamp": source_stamp,
+            # Se compilan una vez por versión del catálogo
+            "pricing_rules": compile_rules(
+                (config or {}).get("pricing_rules", DEFAULT_CONFIG["pricing_rules"])),
+            "_feature_index": None,
+            "_cent_prices": None,
+            "_price_table": None,
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Catalog snapshots are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Catalog snapshots are immutable")
+
+    def __repr__(self):
+        return f"Catalog(version={self.version}, plans={list(self.plans)})"
+
+    def with_availability(self, plan_available, feature_available, version):
+        """Return a copy of this snapshot with other availability maps.
+
+        Prices, compiled pricing rules and lookup caches are shared with this
+        snapshot, since availability does not change them; the caches are
+        built first so that later copies do not rebuild them either.
+        """
+        self.feature_index()
+        self.price_table()
+        catalog = object.__new__(Catalog)
+        for name in Catalog.__slots__:
+            object.__setattr__(catalog, name, getattr(self, name))
+        object.__setattr__(catalog, "version", version)
+        object.__setattr__(catalog, "plan_available", _freeze(plan_available))
+        object.__setattr__(catalog, "feature_available", _freeze(feature_available))
+        return catalog
+
+    def plan_cost(self, plan_name):
+        """Return the cost of a plan, or 0 if the plan does not exist."""
+        if plan_name in self.plans:
+            return self.plans[plan_name]["cost"]
+        return 0
+
+    def feature_cost(self, feature):
+        """Return the cost of an additional or premium feature, or 0."""
+        if feature in self.additional_features:
+            return self.additional_features[feature]
+        if feature in self.premium_features:
+            return self.premium_features[feature]
+        return 0
+
+    def feature_index(self):
+        """Return the case-insensitive feature lookup index of this snapshot.
+
+        Maps each lower-case feature name to (canonical name, kind, cost),
+        where kind is `ADDITIONAL` or `PREMIUM` (names are unique across both
+        sections, see `_check_feature_names`). It is built on first use and lives
+        as long as the snapshot, so a reload always gets a fresh index.
+        """
+        index = self._feature_index
+        if index is None:
+            index = {name.lower(): (name, ADDITIONAL, cost)
+                     for name, cost in self.additional_features.items()}
+            index.update({name.lower(): (name, PREMIUM, cost)
+                          for name, cost in self.premium_features.items()})
+            index = FrozenDict(index)
+            # Una carrera entre hilos solo construye dos índices iguales
+            object.__setattr__(self, "_feature_index", index)
+        return index
+
+    def cent_prices(self):
+        """Return the prices of this snapshot in integer cents.
+
+        Returns (plan cents, feature cents), two read-only dicts keyed by
+        name.
+        Built on first use, like `feature_index`.
+        """
+        prices = self._cent_prices
+        if prices is None:
+            features = {name: to_cents(cost) for name, cost in self.premium_features.items()}
+            features.update((name, to_cents(cost))
+                            for name, cost in self.additional_features.items())
+            prices = (FrozenDict({name: to_cents(plan["cost"])
+                                  for name, plan in self.plans.items()}),
+                      FrozenDict(features))
+            object.__setattr__(self, "_cent_prices", prices)
+        return prices
+
+    def price_table(self):
+        """Return the compiled `price_table.PriceTable` of this snapshot.
+
+        Built on first use from `cent_prices`, like `feature_index`.
+        """
+        table = self._price_table
+        if table is None:
+            table = PriceTable(*self.cent_prices(), self.premium_features)
+            object.__setattr__(self, "_price_table", table)
+        return table
+
+
+def _file_stamp(path):
+    """Return (mtime_ns, size) of `path`, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class CatalogStore:
+    """Holds the current catalog snapshot and reloads it when the file changes.
+
+    Reads (`current`) take no lock: they return the snapshot referenced at
+    that moment. Writes (reloads and `set_availability`) are serialized by a
+    lock and publish the new snapshot with a single reference assignment.
+    """
+
+    def __init__(self, config_path=None):
+        self.config_path = config_path or CONFIG_PATH
+        self._catalog = None
+        # Cambios de disponibilidad hechos en caliente; sobreviven a las recargas
+        self._plan_overrides = {}
+        self._feature_overrides = {}
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def current(self):
+        """Return the current snapshot, loading it on first use."""
+        catalog = self._catalog
+        if catalog is None:
+            self.refresh()
+            catalog = self._catalog
+        return catalog
+
+    def refresh(self, force=False):
+        """Reload the config file if its mtime or size changed.
+
+        If the file exists but cannot be parsed (e.g. it is being written) or
+        its pricing rules are malformed, the current snapshot is kept and the
+        reload is retried next time; without a current snapshot the embedded
+        configuration is used.
+
+        Returns:
+            bool: True if a new snapshot was published.
+        """
+        with self._lock:
+            stamp = _file_stamp(self.config_path)
+            current = self._catalog
+            if (not force and current is not None
+                    and current.source_stamp == stamp):
+                return False
+
+            config = load_config(self.config_path) if stamp else None
+            if stamp and config is None and current is not None:
+                return False
+
+            version = current.version + 1 if current else 1
+            try:
+                catalog = Catalog(config, version, stamp if config else None)
+            except ValueError:
+                if current is not None:
+                    return False
+                catalog = Catalog(None, version)
+            if self._plan_overrides or self._feature_overrides:
+                catalog = catalog.with_availability(
+                    {**catalog.plan_available, **self._plan_overrides},
+                    {**catalog.feature_available, **self._feature_overrides},
+                    version)
+            self._catalog = catalog
+            return True
+
+    def set_availability(self, plans=None, features=None):
+        """Mark plans and features as available or not and publish the change.
+
+        Args:
+            plans: { plan_name: bool }
+            features: { feature_name: bool }
+
+        The new snapshot is a copy of the current one with the merged
+        availability maps and the next version; snapshots already taken are
+        not modified. The changes are kept when the config file is reloaded.
+
+        Returns:
+            Catalog: The published snapshot.
+
+        Raises:
+            ValueError: If a name is not in the catalog or a value is not a bool.
+        """
+        plans = dict(plans or {})
+        features = dict(features or {})
+        self.current()
+        with self._lock:
+            current = self._catalog
+            for name, value in plans.items():
+                if name not in current.plans:
+                    raise ValueError(f"El plan '{name}' no existe")
+                if not isinstance(value, bool):
+                    raise ValueError(f"Disponibilidad inválida para '{name}': {value!r}")
+            for name, value in features.items():
+                if name not in current.additional_features and \
+                        name not in current.premium_features:
+                    raise ValueError(f"La característica '{name}' no existe")
+                if not isinstance(value, bool):
+                    raise ValueError(f"Disponibilidad inválida para '{name}': {value!r}")
+            self._plan_overrides.update(plans)
+            self._feature_overrides.update(features)
+            self._catalog = current.with_availability(
+                {**current.plan_available, **plans},
+                {**current.feature_available, **features},
+                current.version + 1)
+            return self._catalog
+
+    def start_watching(self, interval=1.0):
+        """Start a daemon thread that calls `refresh` every `interval` seconds."""
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval,),
+            name="catalog-reload", daemon=True,
+        )
+        self._watcher.start()
+
+    def stop_watching(self):
+        """Stop the background reload thread, if running."""
+        self._stop.set()
+        if self._watcher:
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self, interval):
+        while not self._stop.wait(interval):
+            self.refresh()
+
+
+# Almacén por defecto, asociado a `config/config.json`
+_store = CatalogStore()
+
+
+def get_catalog():
+    """Return the current catalog snapshot."""
+    return _store.current()
+
+
+def refresh_catalog(force=False):
+    """Reload the catalog if `config/config.json` changed.
+
+    Returns:
+        bool: True if a new snapshot was published.
+    """
+    return _store.refresh(force)
+
+
+def set_availability(plans=None, features=None):
+    """Publish a catalog version with the given plan/feature availability.
+
+    See `CatalogStore.set_availability`.
+    """
+    return _store.set_availability(plans, features)
+
+
+def start_auto_reload(interval=1.0):
+    """Reload the catalog in the background when the config file changes."""
+    _store.start_watching(interval)
+
+
+def stop_auto_reload():
+    """Stop the background catalog reload."""
+    _store.stop_watching()
+
+
+class CatalogField:  # pylint: disable=too-few-public-methods
+    """Class attribute that reads one field of the current catalog.
+
+    Used by `Item` so that `Item.plan`, `Item.ADDITIONAL_FEATURES`, etc. keep
+    working while the data lives in the catalog snapshot.
+    """
+
+    def __init__(self, field):
+        self.field = field
+
+    def __get__(self, instance, owner=None):
+        return getattr(get_catalog(), self.field)
+
+
+class CatalogMapping(Mapping):
+    """Read-only mapping that always reflects one field of the current catalog.
+
+    Unlike binding `Item.plan` to a module variable, it does not load the
+    catalog until it is first read and never goes stale after a reload.
+    """
+
+    def __init__(self, field):
+        self.field = field
+
+    def _current(self):
+        return getattr(get_catalog(), self.field)
+
+    def __getitem__(self, key):
+        return self._current()[key]
+
+    def __iter__(self):
+        return iter(self._current())
+
+    def __len__(self):
+        return len(self._current())
+
+    def __repr__(self):
+        return repr(self._current())
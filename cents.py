@@ -0,0 +1,82 @@
+"""Integer-cent fixed-point pricing core.
+
+Every pricing step works on integer numbers of cents, so results do not
+depend on float rounding or on the order in which amounts are added. The
+rounding rules are:
+
+- Catalog prices and other external amounts are converted to cents once,
+  from their decimal representation, rounding half up (`to_cents`).
+- Rates are expressed in basis points (1/100 of a percent). A percentage of
+  an amount is rounded half up to the cent (`apply_rate`).
+- The premium surcharge is apportioned across plans with the largest
+  remainder method (`apportion`): each plan gets the floor of its exact
+  share and the cents left over go, one each, to the plans with the largest
+  remainders; ties go to the plan that comes first. The shares always add
+  up to the surcharge.
+
+The discount and surcharge rules themselves come from the catalog (see
+`pricing_rules.py`). `Buyer`, `IncrementalBuyer` and `price_baskets` (see
+`models.py`) price through these functions and only turn cents back into
+amounts at the end.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+CENTS_PER_UNIT = 100
+BASIS_POINTS = 10000
+
+
+def to_cents(amount):
+    """Convert a money amount to integer cents, rounding half up.
+
+    Floats are converted from their shortest decimal representation, so
+    19.995 becomes 2000 cents and not 1999.
+    """
+    if isinstance(amount, int):
+        return amount * CENTS_PER_UNIT
+    exact = Decimal(repr(amount)) if isinstance(amount, float) else Decimal(amount)
+    return int((exact * CENTS_PER_UNIT).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def to_amount(cents):
+    """Convert integer cents back to a money amount."""
+    return cents / CENTS_PER_UNIT
+
+
+def basis_points(rate):
+    """Convert a rate such as 0.15 to basis points (1500)."""
+    return round(rate * BASIS_POINTS)
+
+
+def apply_rate(cents, rate_bp):
+    """Return `rate_bp` basis points of `cents`, rounded half up to the cent."""
+    return (cents * rate_bp + BASIS_POINTS // 2) // BASIS_POINTS
+
+
+def apportion(amount, weights):
+    """Split `amount` cents in proportion to `weights` (largest remainder).
+
+    Args:
+        amount: Cents to split.
+        weights: {key: non-negative cents}, in priority order for ties.
+
+    Returns:
+        dict: {key: cents} with the same keys; the values add up to `amount`
+        when the weights add up to more than zero, otherwise all are 0.
+    """
+    total = sum(weights.values())
+    if total <= 0:
+        return dict.fromkeys(weights, 0)
+    if len(weights) == 1:
+        # Una sola clave se lleva todo
+        return dict.fromkeys(weights, amount)
+    shares = {}
+    remainders = {}
+    left = amount
+    for key, weight in weights.items():
+        shares[key], remainders[key] = divmod(amount * weight, total)
+        left -= shares[key]
+    if left:
+        # sorted es estable: en un empate gana la clave que va antes
+        for key in sorted(remainders, key=remainders.__getitem__, reverse=True)[:left]:
+            shares[key] += 1
+    return shares
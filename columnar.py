@@ -0,0 +1,282 @@
+"""Compact binary columnar format for priced purchase history.
+
+A `.gcol` file stores priced purchases as fixed-width little-endian columns
+instead of objects or JSON:
+
+- per purchase: `created_at` (float64 epoch seconds, NaN if unknown),
+  `item_offsets` (int64, n + 1 entries), and `subtotal_cents`,
+  `surcharge_cents`, `discount_cents`, `total_cents` (int64 cents)
+- per item: `plan_id` (uint16), `feature_mask` (uint64, one bit per
+  feature) and `quantity` (uint32, memberships of the line)
+
+Layout: an 8-byte magic, a uint32 header length, a JSON header (plan and
+feature dictionaries, row counts and the offset of each column) and the
+columns, each aligned to 64 bytes. Files of format version 1 have no
+`quantity` column; every item of them is one membership.
+
+`ColumnarWriter` spills every column to its own temporary file, so writing
+millions of purchases uses constant memory. `ColumnarHistory` memory-maps
+the file and exposes every column as a read-only NumPy view without
+copying, so reports are vectorized scans.
+"""
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+from cents import to_cents
+
+MAGIC = b"GYMCOL1\0"
+FORMAT_VERSION = 2
+ALIGNMENT = 64
+MAX_FEATURES = 64
+MAX_QUANTITY = (1 << 32) - 1
+# Filas que se acumulan en memoria antes de volcarlas al archivo temporal
+SPILL_ROWS = 65536
+
+# nombre -> (typecode de `array`, dtype de NumPy)
+COLUMNS = {
+    "created_at": ("d", "<f8"),
+    "item_offsets": ("q", "<i8"),
+    "subtotal_cents": ("q", "<i8"),
+    "surcharge_cents": ("q", "<i8"),
+    "discount_cents": ("q", "<i8"),
+    "total_cents": ("q", "<i8"),
+    "plan_id": ("H", "<u2"),
+    "feature_mask": ("Q", "<u8"),
+    "quantity": ("I", "<u4"),
+}
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+class ColumnarWriter:
+    """Write priced purchases to a `.gcol` file.
+
+    The file is written to a temporary name and renamed on `close`, so a
+    reader never sees a half-written file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.plans = {}
+        self.features = {}
+        self.counts = {"purchases": 0, "items": 0}
+        directory = os.path.dirname(os.path.abspath(path))
+        self._spill = {
+            name: (array(typecode), tempfile.TemporaryFile(dir=directory))
+            for name, (typecode, _dtype) in COLUMNS.items()
+        }
+        self._spill["item_offsets"][0].append(0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def _code(self, mapping, name, limit):
+        code = mapping.get(name)
+        if code is None:
+            if len(mapping) >= limit:
+                raise ValueError(f"Demasiados valores distintos (máximo {limit}): '{name}'")
+            code = mapping[name] = len(mapping)
+        return code
+
+    def add_purchase(self, items, totals, created_at=None):
+        """Append one priced purchase.
+
+        Args:
+            items: Sequence of (plan_name, additional_features,
+                premium_features) or (..., quantity) tuples; a line with a
+                quantity is stored once, with that many memberships.
+            totals: (subtotal, surcharge, discount, total) money amounts,
+                stored in cents with the rounding of `cents.to_cents`.
+            created_at: Epoch seconds of the purchase, or None.
+        """
+        subtotal, surcharge, discount, total = totals
+        for plan_name, additional, premium, *quantity in items:
+            quantity = quantity[0] if quantity else 1
+            if (isinstance(quantity, bool) or not isinstance(quantity, int)
+                    or not 1 <= quantity <= MAX_QUANTITY):
+                raise ValueError(f"La cantidad '{quantity}' no es válida")
+            mask = 0
+            for feature in list(additional) + list(premium):
+                mask |= 1 << self._code(self.features, feature, MAX_FEATURES)
+            self._append("plan_id", self._code(self.plans, plan_name, 1 << 16))
+            self._append("feature_mask", mask)
+            self._append("quantity", quantity)
+            self.counts["items"] += 1
+        self._append("item_offsets", self.counts["items"])
+        self._append("created_at", math.nan if created_at is None else float(created_at))
+        self._append("subtotal_cents", to_cents(subtotal))
+        self._append("surcharge_cents", to_cents(surcharge))
+        self._append("discount_cents", to_cents(discount))
+        self._append("total_cents", to_cents(total))
+        self.counts["purchases"] += 1
+
+    def add(self, record):
+        """Append a ledger record (see `ledger.record_from_quote`)."""
+        self.add_purchase(
+            [(item["plan"], item.get("additional_features") or [],
+              item.get("premium_features") or [], item.get("quantity", 1))
+             for item in record["items"]],
+            (sum((record.get("costs") or {}).values()),
+             record.get("premium_surcharge") or 0.0,
+             record.get("special_discount") or 0.0,
+             record["total"]),
+            record.get("created_at"),
+        )
+
+    def _append(self, name, value):
+        buffer, spill = self._spill[name]
+        buffer.append(value)
+        if len(buffer) >= SPILL_ROWS:
+            _write_array(spill, buffer)
+            del buffer[:]
+
+    def close(self):
+        """Write the header and the columns and publish the file."""
+        columns = {}
+        offset = 0
+        for name, (buffer, spill) in self._spill.items():
+            _write_array(spill, buffer)
+            del buffer[:]
+            size = spill.tell()
+            columns[name] = {"dtype": COLUMNS[name][1], "offset": offset,
+                             "count": size // array(COLUMNS[name][0]).itemsize}
+            offset = _aligned(offset + size)
+        header = json.dumps({
+            "version": FORMAT_VERSION,
+            "purchases": self.counts["purchases"],
+            "items": self.counts["items"],
+            "plans": list(self.plans),
+            "features": list(self.features),
+            "columns": columns,
+        }).encode("utf-8")
+        data_start = _aligned(len(MAGIC) + 4 + len(header))
+
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as out:
+            out.write(MAGIC + struct.pack("<I", len(header)) + header)
+            for name, (_buffer, spill) in self._spill.items():
+                out.seek(data_start + columns[name]["offset"])
+                spill.seek(0)
+                while True:
+                    block = spill.read(1 << 20)
+                    if not block:
+                        break
+                    out.write(block)
+            out.truncate(data_start + offset)
+        os.replace(tmp_path, self.path)
+        self.discard()
+
+    def discard(self):
+        """Drop the temporary column files without publishing anything."""
+        for _buffer, spill in self._spill.values():
+            spill.close()
+
+
+def _write_array(stream, buffer):
+    if sys.byteorder == "big":
+        buffer = array(buffer.typecode, buffer)
+        buffer.byteswap()
+    buffer.tofile(stream)
+
+
+class ColumnarHistory:
+    """Memory-mapped, read-only view of a `.gcol` file.
+
+    Columns are NumPy arrays backed directly by the mapped file; they must
+    not be used after `close`.
+
+    Attributes:
+        plans: Plan names; `plan_id` indexes this list.
+        features: Feature names; bit i of `feature_mask` is features[i].
+        columns: {name: read-only NumPy view}. Version 1 files get a
+            `quantity` column of ones.
+    """
+
+    def __init__(self, path):
+        import numpy as np  # pylint: disable=import-outside-toplevel
+
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            self._map.close()
+            raise ValueError(f"'{path}' no es un archivo columnar de compras")
+        (header_length,) = struct.unpack_from("<I", self._map, len(MAGIC))
+        header_start = len(MAGIC) + 4
+        header = json.loads(self._map[header_start:header_start + header_length])
+        data_start = _aligned(header_start + header_length)
+        self.plans = header["plans"]
+        self.features = header["features"]
+        self.columns = {
+            name: np.frombuffer(self._map, dtype=spec["dtype"], count=spec["count"],
+                                offset=data_start + spec["offset"])
+            for name, spec in header["columns"].items()
+        }
+        if "quantity" not in self.columns:
+            self.columns["quantity"] = np.ones(len(self.columns["plan_id"]), dtype="<u4")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self.columns["total_cents"])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def close(self):
+        """Release the views and unmap the file."""
+        self.columns = {}
+        try:
+            self._map.close()
+        except BufferError:
+            # Aún hay vistas fuera del lector: se libera cuando desaparezcan
+            pass
+
+    def summary(self):
+        """Vectorized report over the whole history."""
+        import numpy as np  # pylint: disable=import-outside-toplevel
+
+        plan_ids = self.columns["plan_id"]
+        masks = self.columns["feature_mask"]
+        quantities = self.columns["quantity"].astype(np.int64)
+        plan_counts = np.bincount(plan_ids, weights=quantities, minlength=len(self.plans))
+        return {
+            "purchases": len(self),
+            "memberships": int(quantities.sum()),
+            "revenue": int(self.columns["total_cents"].sum()) / 100,
+            "subtotal": int(self.columns["subtotal_cents"].sum()) / 100,
+            "premium_surcharge": int(self.columns["surcharge_cents"].sum()) / 100,
+            "premium_surcharge_purchases": int(np.count_nonzero(self.columns["surcharge_cents"])),
+            "special_discount": int(self.columns["discount_cents"].sum()) / 100,
+            "plan_memberships": {plan: int(plan_counts[idx])
+                                 for idx, plan in enumerate(self.plans)},
+            "feature_attach": {
+                feature: int(quantities[(masks & np.uint64(1 << bit)) != 0].sum())
+                for bit, feature in enumerate(self.features)
+            },
+        }
+
+
+def write_records(records, path):
+    """Write an iterable of ledger records to `path`; returns the count."""
+    with ColumnarWriter(path) as writer:
+        for record in records:
+            writer.add(record)
+    return writer.counts["purchases"]
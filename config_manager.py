@@ -2,31 +2,85 @@
 
 La carga es opcional: si no existe el archivo o hay errores,
 se devuelve None y el sistema usa la configuración embebida.
+
+Para acelerar el arranque se guarda una copia precompilada (`marshal`) del
+JSON en `config/config.json.cache`. La caché solo se usa si el mtime y el
+tamaño del JSON coinciden con los registrados al generarla.
 """
-import json
+from __future__ import annotations
+
+import marshal
 import os
-from typing import Optional, Dict
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "config", "config.json")
+CACHE_SUFFIX = ".cache"
+# Se incrementa si cambia el formato de la caché
+CACHE_FORMAT = 1
+
+
+def _read_cache(cache_path: str, stamp: tuple) -> dict | None:
+    """Devuelve la configuración cacheada si corresponde a `stamp`."""
+    try:
+        with open(cache_path, "rb") as f:
+            cache_format, cached_stamp, data = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if cache_format != CACHE_FORMAT or tuple(cached_stamp) != stamp:
+        return None
+    return data if isinstance(data, dict) else None
 
 
-def load_config() -> Optional[Dict]:
+def _write_cache(cache_path: str, stamp: tuple, data: dict) -> None:
+    """Guarda la configuración precompilada; los errores se ignoran."""
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(marshal.dumps((CACHE_FORMAT, stamp, data)))
+        os.replace(tmp_path, cache_path)
+    except (OSError, ValueError):
+        # Directorio de solo lectura o datos no serializables: sin caché
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def load_config(config_path: str | None = None,
+                use_cache: bool = True) -> dict | None:
     """Carga y devuelve la configuración como dict si existe.
 
-    Busca `config/config.json` en la raíz del proyecto. Si el archivo no existe
-    o no es válido, devuelve None.
+    Por defecto busca `config/config.json` en la raíz del proyecto. Si el
+    archivo no existe o no es válido, devuelve None. Con `use_cache` se lee
+    la copia precompilada cuando está al día y se regenera cuando no.
     """
-    config_path = os.path.join(os.path.dirname(__file__), "config", "config.json")
-    if not os.path.exists(config_path):
+    config_path = config_path or CONFIG_PATH
+    try:
+        stat = os.stat(config_path)
+    except OSError:
         return None
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cache_path = config_path + CACHE_SUFFIX
+
+    if use_cache:
+        cached = _read_cache(cache_path, stamp)
+        if cached is not None:
+            return cached
+
+    # `json` solo se importa si la caché no está al día
+    import json  # pylint: disable=import-outside-toplevel
 
     try:
         with open(config_path, "r", encoding="utf-8") as f:
             data = json.load(f)
         if not isinstance(data, dict):
             return None
-        return data
     except (json.JSONDecodeError, OSError, ValueError):
         return None
 
+    if use_cache:
+        _write_cache(cache_path, stamp, data)
+    return data
+
 
 if __name__ == "__main__":
     cfg = load_config()
@@ -4,16 +4,18 @@ Note: According to requirement 4, the menu can handle multiple membership purcha
 Classes Item and Buyer were created to fulfill the 4th requirement.
 
 This module re-exports all functionality from models, utils, and menu modules
-for backward compatibility.
+for backward compatibility. Importing it is cheap: the catalog is read on
+first use, and the interactive `menu` is no longer part of the library
+surface (`__all__`); `gym_membership.menu` still works but imports it lazily.
 """
 
 # Import all classes and functions from organized modules
 from models import Item, Buyer
 from utils import validar_plan, select_features, show_options, get_plan_cost
-from menu import menu
+from catalog import CatalogMapping
 
-# Re-export for backward compatibility
-plan = Item.plan
+# Re-export for backward compatibility (read lazily from the current catalog)
+plan = CatalogMapping("plans")
 
 __all__ = [
     'Item',
@@ -22,12 +24,21 @@ __all__ = [
     'select_features',
     'show_options',
     'get_plan_cost',
-    'menu',
     'plan'
 ]
 
 
+def __getattr__(name):
+    """Resolve the lazy `menu` re-export (PEP 562)."""
+    if name == 'menu':
+        # El menú interactivo solo se importa si se usa
+        from menu import menu  # pylint: disable=import-outside-toplevel
+        return menu
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 # No ejecutar menu() automáticamente cuando se importa el módulo
 # Solo ejecutar si se ejecuta directamente este archivo
 if __name__ == "__main__":
-    menu()
+    from menu import menu as run_menu
+    run_menu()
@@ -0,0 +1,214 @@
+"""Compact, array-backed store of membership lines.
+
+An `Item` is a Python object with a `__dict__` and two lists of names, a few
+hundred bytes per membership. `ItemStore` keeps the same data as columns of
+typed arrays, using the IDs and bits of the catalog's price table (see
+`price_table.py`):
+
+- plan_id: plan ID (2 bytes)
+- additional_mask, premium_mask: feature bitmasks (4 bytes each, 8 for
+  catalogs of more than 32 features)
+- quantity: memberships of the line (4 bytes)
+
+Indexing or iterating the store returns `ItemView` objects, slotted views
+with the attributes of `Item`, so code written for items (`Buyer`, the
+ledger) keeps working. `ItemStore.quote()` prices the whole store straight
+from the columns, with NumPy when it is installed, and gives the same
+`Quote` as `Buyer(list(store)).quote()`.
+
+Uso:
+    store = ItemStore.from_items(items)
+    quote = store.quote()
+"""
+from array import array
+
+from catalog import get_catalog
+from models import Item, Quote
+
+# Bits por tipo de máscara
+_MASK_TYPECODES = (("I", 32), ("Q", 64))
+
+
+def _mask_typecode(n_features):
+    for typecode, width in _MASK_TYPECODES:
+        if n_features <= width <= array(typecode).itemsize * 8:
+            return typecode
+    raise ValueError(f"El catálogo tiene demasiadas características ({n_features})")
+
+
+class ItemView:
+    """Read-only view of one line of an `ItemStore`, with the attributes of `Item`."""
+
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+
+    @property
+    def plan_name(self):
+        """Plan name of the line."""
+        return self._store.table.plan_names[self._store.plan_ids[self._index]]
+
+    @property
+    def additional_features(self):
+        """Additional feature names, in catalog order."""
+        return self._store.feature_names(self._store.additional_masks[self._index])
+
+    @property
+    def premium_membership_features(self):
+        """Premium feature names, in catalog order."""
+        return self._store.feature_names(self._store.premium_masks[self._index])
+
+    @property
+    def quantity(self):
+        """Memberships of the line."""
+        return self._store.quantities[self._index]
+
+    def to_item(self):
+        """Return the line as a standalone `Item`."""
+        return Item(self.plan_name, self.additional_features,
+                    self.premium_membership_features, self.quantity)
+
+    def __repr__(self):
+        return (f"ItemView({self.plan_name!r}, {self.additional_features!r}, "
+                f"{self.premium_membership_features!r}, quantity={self.quantity})")
+
+
+class ItemStore:
+    """Struct-of-arrays store of membership lines priced with one catalog snapshot.
+
+    Attributes:
+        catalog: Catalog snapshot whose IDs and prices the store uses.
+        table: `price_table.PriceTable` of that snapshot.
+        plan_ids, additional_masks, premium_masks, quantities: The columns,
+            as `array.array` objects.
+    """
+
+    def __init__(self, catalog=None):
+        self.catalog = catalog or get_catalog()
+        self.table = self.catalog.price_table()
+        mask_typecode = _mask_typecode(len(self.table.feature_bits))
+        self.plan_ids = array("H")
+        self.additional_masks = array(mask_typecode)
+        self.premium_masks = array(mask_typecode)
+        self.quantities = array("I")
+
+    @classmethod
+    def from_items(cls, items, catalog=None):
+        """Build a store from `Item` objects (or anything with their attributes)."""
+        store = cls(catalog)
+        for item in items:
+            store.append(item.plan_name, item.additional_features,
+                         item.premium_membership_features, getattr(item, "quantity", 1))
+        return store
+
+    def _mask(self, names):
+        bits = self.table.feature_bits
+        mask = 0
+        for name in names:
+            bit = bits.get(name)
+            if bit is None:
+                raise ValueError(f"La característica '{name}' no existe")
+            if mask & bit:
+                raise ValueError(f"La característica '{name}' está repetida")
+            mask |= bit
+        return mask
+
+    def append(self, plan_name, additional_features=(), premium_features=(), quantity=1):
+        """Add a line of `quantity` memberships.
+
+        Raises:
+            ValueError: If the plan or a feature is not in the catalog, a
+                feature is repeated or the quantity is not a positive integer.
+        """
+        plan_id = self.table.plan_ids.get(plan_name)
+        if plan_id is None:
+            raise ValueError(f"El plan '{plan_name}' no existe")
+        additional = self._mask(additional_features)
+        premium = self._mask(premium_features)
+        if additional & premium:
+            raise ValueError("Una característica no puede ser adicional y premium a la vez")
+        if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity < 1:
+            raise ValueError(f"La cantidad '{quantity}' no es válida")
+        self.plan_ids.append(plan_id)
+        self.additional_masks.append(additional)
+        self.premium_masks.append(premium)
+        self.quantities.append(quantity)
+
+    def feature_names(self, mask):
+        """Names of the features of `mask`, in catalog order."""
+        return [name for bit, name in enumerate(self.table.feature_names) if mask >> bit & 1]
+
+    def __len__(self):
+        return len(self.plan_ids)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ItemStore index out of range")
+        return ItemView(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield ItemView(self, index)
+
+    def nbytes(self):
+        """Bytes used by the columns."""
+        return sum(column.itemsize * len(column) for column in
+                   (self.plan_ids, self.additional_masks, self.premium_masks, self.quantities))
+
+    def quote(self):
+        """Price every line of the store as one purchase.
+
+        Returns:
+            Quote: The same quote as `Buyer(list(self), self.catalog).quote()`.
+        """
+        try:
+            counts, subtotals, has_premium = self._totals_with_numpy()
+        except ImportError:
+            counts, subtotals, has_premium = self._totals()
+        rules = self.catalog.pricing_rules
+        # Planes con alguna membresía, en orden de catálogo, como en Buyer
+        costs_cents = {}
+        for plan_id, plan_name in enumerate(self.table.plan_names):
+            if not counts[plan_id]:
+                continue
+            cost = subtotals[plan_id]
+            if counts[plan_id] > 1:
+                cost -= rules.quantity_discount(plan_name, counts[plan_id], cost)
+            costs_cents[plan_name] = cost
+        return Quote(costs_cents, rules.settle(costs_cents, has_premium), self.catalog.version)
+
+    def _totals(self):
+        """Per-plan-ID memberships and cents, and whether there is any premium feature."""
+        n_plans = len(self.table.plan_names)
+        counts = [0] * n_plans
+        subtotals = [0] * n_plans
+        mask_cents = self.table.mask_cents
+        premium_bits = self.table.premium_mask
+        has_premium = False
+        for plan_id, additional, premium, quantity in zip(
+                self.plan_ids, self.additional_masks, self.premium_masks, self.quantities):
+            counts[plan_id] += quantity
+            subtotals[plan_id] += mask_cents(plan_id, additional | premium) * quantity
+            has_premium = has_premium or bool(premium & premium_bits)
+        return counts, subtotals, has_premium
+
+    def _totals_with_numpy(self):
+        """`_totals` with NumPy over zero-copy views of the columns."""
+        import numpy as np  # pylint: disable=import-outside-toplevel
+        plan_ids = np.frombuffer(self.plan_ids, dtype=np.uint16)
+        additional = np.frombuffer(self.additional_masks, dtype=self.additional_masks.typecode)
+        premium = np.frombuffer(self.premium_masks, dtype=self.premium_masks.typecode)
+        quantities = np.frombuffer(self.quantities, dtype=np.uint32).astype(np.int64)
+        n_plans = len(self.table.plan_names)
+        cents = self.table.mask_cents_array(plan_ids, additional | premium) * quantities
+        # Enteros exactos: np.add.at en lugar de bincount con pesos float
+        subtotals = np.zeros(n_plans, dtype=np.int64)
+        np.add.at(subtotals, plan_ids, cents)
+        counts = np.zeros(n_plans, dtype=np.int64)
+        np.add.at(counts, plan_ids, quantities)
+        has_premium = bool(np.any(premium & self.table.premium_mask))
+        return [int(c) for c in counts], [int(s) for s in subtotals], has_premium
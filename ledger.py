@@ -0,0 +1,483 @@
+"""Durable purchase ledger backed by SQLite.
+
+Every confirmed purchase is stored with its items, `costs` breakdown, premium
+surcharge (and its per-plan breakdown), special discount and total.
+
+The database runs in WAL mode with `synchronous=FULL`, so a purchase is on
+disk once its commit returns. To keep thousands of confirmations per second
+from each paying for an fsync, writes go through a single writer thread that
+groups every purchase queued while the previous commit was running into the
+next transaction (group commit). Readers use a small connection pool and are
+never blocked by the writer.
+
+Uso:
+    ledger = Ledger("data/ledger.db")
+    purchase_id = ledger.record_purchase(record_from_quote(items, quote))
+    ledger.close()
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from pipeline import build_item
+from quote_cache import price_items
+
+DEFAULT_POOL_SIZE = 4
+# Compras como máximo por transacción de grupo
+DEFAULT_BATCH_SIZE = 512
+# Filas por transacción en la importación masiva
+IMPORT_CHUNK_SIZE = 10_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS purchases (
+    id INTEGER PRIMARY KEY,
+    buyer TEXT,
+    created_at REAL NOT NULL,
+    catalog_version INTEGER,
+    costs TEXT NOT NULL,
+    premium_surcharge REAL NOT NULL,
+    premium_surcharge_breakdown TEXT NOT NULL,
+    special_discount REAL NOT NULL,
+    total REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS purchase_items (
+    purchase_id INTEGER NOT NULL REFERENCES purchases(id),
+    position INTEGER NOT NULL,
+    plan TEXT NOT NULL,
+    additional_features TEXT NOT NULL,
+    premium_features TEXT NOT NULL,
+    quantity INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (purchase_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS purchases_buyer ON purchases(buyer);
+"""
+
+_INSERT_PURCHASE = (
+    "INSERT INTO purchases (id, buyer, created_at, catalog_version, costs,"
+    " premium_surcharge, premium_surcharge_breakdown, special_discount, total)"
+    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+_INSERT_ITEM = (
+    "INSERT INTO purchase_items (purchase_id, position, plan, additional_features,"
+    " premium_features, quantity) VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+_SELECT_PURCHASES = (
+    "SELECT id, buyer, created_at, catalog_version, costs, premium_surcharge,"
+    " premium_surcharge_breakdown, special_discount, total FROM purchases"
+)
+_SELECT_ITEMS = (
+    "SELECT purchase_id, plan, additional_features, premium_features, quantity"
+    " FROM purchase_items"
+)
+
+# Marca de fin para el hilo escritor
+_STOP = object()
+
+
+class LedgerError(Exception):
+    """A purchase could not be committed by the writer thread.
+
+    The original error (SQLite or any other) is chained as `__cause__`.
+    """
+
+
+def connect(path, synchronous="FULL"):
+    """Open a connection in autocommit mode with the ledger pragmas."""
+    conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={synchronous}")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+class ConnectionPool:
+    """Fixed-size pool of SQLite connections shared by reader threads."""
+
+    def __init__(self, path, size=DEFAULT_POOL_SIZE, synchronous="FULL"):
+        if size < 1:
+            raise ValueError("size debe ser al menos 1")
+        self._idle = queue.Queue()
+        for _ in range(size):
+            self._idle.put(connect(path, synchronous))
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a `with` block."""
+        conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        """Close every idle connection."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def _item_record(item):
+    record = {"plan": item.plan_name,
+              "additional_features": list(item.additional_features),
+              "premium_features": list(item.premium_membership_features)}
+    # Solo las líneas con varias membresías llevan `quantity`
+    if item.quantity != 1:
+        record["quantity"] = item.quantity
+    return record
+
+
+def record_from_quote(items, quote, buyer_id=None):
+    """Build a ledger record from the items of a purchase and their `Quote`."""
+    return {
+        "buyer": buyer_id,
+        "created_at": time.time(),
+        "catalog_version": quote.catalog_version,
+        "items": [_item_record(item) for item in items],
+        "costs": dict(quote.costs),
+        "premium_surcharge": quote.premium_surcharge,
+        "premium_surcharge_breakdown": dict(quote.premium_surcharge_breakdown),
+        "special_discount": quote.special_discount,
+        "total": quote.total,
+    }
+
+
+def _validate_record(record):
+    """Check the fields that the ledger needs; raises ValueError."""
+    if not isinstance(record, dict):
+        raise ValueError("La compra debe ser un objeto JSON")
+    items = record.get("items")
+    if not isinstance(items, list) or not items:
+        raise ValueError("La compra necesita una lista 'items' no vacía")
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get("plan"), str):
+            raise ValueError("Cada item necesita un 'plan'")
+        quantity = item.get("quantity", 1)
+        if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity < 1:
+            raise ValueError(f"La cantidad '{quantity}' no es válida")
+    if not isinstance(record.get("total"), (int, float)):
+        raise ValueError("La compra necesita un 'total' numérico")
+
+
+def _purchase_row(purchase_id, record):
+    return (
+        purchase_id,
+        record.get("buyer"),
+        record.get("created_at") or time.time(),
+        record.get("catalog_version"),
+        json.dumps(record.get("costs") or {}),
+        record.get("premium_surcharge", 0.0),
+        json.dumps(record.get("premium_surcharge_breakdown") or {}),
+        record.get("special_discount", 0.0),
+        record["total"],
+    )
+
+
+def _item_rows(purchase_id, record):
+    return [
+        (purchase_id, position, item["plan"],
+         json.dumps(item.get("additional_features") or []),
+         json.dumps(item.get("premium_features") or []),
+         item.get("quantity", 1))
+        for position, item in enumerate(record["items"])
+    ]
+
+
+def _encode_record(record):
+    """Validate a record and serialize it to its SQLite rows; raises ValueError.
+
+    Returns (purchase row, item rows) without the purchase id, so a record
+    that cannot be stored is refused in `Ledger.submit` instead of failing
+    the whole group commit it would have joined.
+    """
+    _validate_record(record)
+    try:
+        row = _purchase_row(None, record)[1:]
+        items = [item_row[1:] for item_row in _item_rows(None, record)]
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"La compra no se puede guardar: {e}") from e
+    for value in row + tuple(value for item_row in items for value in item_row):
+        if value is not None and not isinstance(value, (str, int, float)):
+            raise ValueError(f"La compra no se puede guardar: valor {value!r} no admitido")
+    return row, items
+
+
+def _stored_item(plan, additional, premium, quantity):
+    item = {"plan": plan,
+            "additional_features": json.loads(additional),
+            "premium_features": json.loads(premium)}
+    if quantity != 1:
+        item["quantity"] = quantity
+    return item
+
+
+def _purchase_from_rows(row, items):
+    """Build a purchase dict from a purchases row and its item rows."""
+    return {
+        "id": row[0],
+        "buyer": row[1],
+        "created_at": row[2],
+        "catalog_version": row[3],
+        "items": [
+            _stored_item(plan, additional, premium, quantity)
+            for _purchase_id, plan, additional, premium, quantity in items
+        ],
+        "costs": json.loads(row[4]),
+        "premium_surcharge": row[5],
+        "premium_surcharge_breakdown": json.loads(row[6]),
+        "special_discount": row[7],
+        "total": row[8],
+    }
+
+
+def historical_record(raw):
+    """Normalize one historical purchase for `Ledger.bulk_import`.
+
+    Records that already carry a `total` keep their stored prices; the
+    others are validated and priced with the current catalog (unknown
+    features are dropped, as in the quote pipeline).
+    """
+    if isinstance(raw, dict) and "total" not in raw and isinstance(raw.get("items"), list):
+        items = [build_item(order)[0] for order in raw["items"]]
+        priced = record_from_quote(items, price_items(items))
+        # El comprador y la fecha son los del registro histórico
+        del priced["buyer"], priced["created_at"]
+        record = dict(raw)
+        record.update(priced)
+        raw = record
+    _validate_record(raw)
+    return raw
+
+
+def _migrate(conn):
+    """Add the columns that ledgers created by older versions lack."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(purchase_items)")}
+    if "quantity" not in columns:
+        conn.execute("ALTER TABLE purchase_items"
+                     " ADD COLUMN quantity INTEGER NOT NULL DEFAULT 1")
+
+
+class Ledger:
+    """Append-only store of confirmed purchases.
+
+    Attributes:
+        path: SQLite database file.
+        batch_size: Maximum purchases committed in one group commit.
+        stats: Counters of committed purchases and group commits.
+    """
+
+    def __init__(self, path, pool_size=DEFAULT_POOL_SIZE,
+                 batch_size=DEFAULT_BATCH_SIZE, synchronous="FULL"):
+        if batch_size < 1:
+            raise ValueError("batch_size debe ser al menos 1")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.stats = {"purchases": 0, "commits": 0}
+        self._pool = ConnectionPool(path, pool_size, synchronous)
+        with self._pool.connection() as conn:
+            conn.executescript(_SCHEMA)
+            _migrate(conn)
+        # Serializa las transacciones del escritor y de la importación masiva
+        self._write_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(
+            target=self._write_loop, args=(connect(path, synchronous),),
+            name="ledger-writer", daemon=True)
+        self._writer.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def submit(self, record):
+        """Queue a purchase for the next group commit.
+
+        Returns:
+            Future: Resolves to the purchase id once it is durable, or
+            raises `LedgerError` if its group commit fails.
+
+        Raises:
+            ValueError: If the record is invalid or the ledger is closed.
+        """
+        rows = _encode_record(record)
+        if not self._writer.is_alive():
+            raise ValueError("El registro de compras está cerrado")
+        future = Future()
+        self._queue.put((rows, future))
+        return future
+
+    def record_purchase(self, record, timeout=None):
+        """Store a purchase and wait until it is committed; returns its id.
+
+        Raises:
+            ValueError: If the record is invalid or the ledger is closed.
+            LedgerError: If the group commit of the purchase failed.
+        """
+        return self.submit(record).result(timeout)
+
+    def _write_loop(self, conn):
+        """Writer thread: commit everything queued as one transaction."""
+        stopping = False
+        while not stopping:
+            entry = self._queue.get()
+            if entry is _STOP:
+                break
+            batch = [entry]
+            while len(batch) < self.batch_size:
+                try:
+                    entry = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+            self._commit_batch(conn, batch)
+        conn.close()
+
+    def _commit_batch(self, conn, batch):
+        ids = []
+        with self._write_lock:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                for (row, items), _future in batch:
+                    purchase_id = conn.execute(_INSERT_PURCHASE, (None, *row)).lastrowid
+                    conn.executemany(_INSERT_ITEM,
+                                     ((purchase_id, *item_row) for item_row in items))
+                    ids.append(purchase_id)
+                conn.execute("COMMIT")
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                # El hilo escritor no puede morir: cada futuro recibe el error
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                for _rows, future in batch:
+                    error = LedgerError(f"No se pudo guardar la compra: {e}")
+                    error.__cause__ = e
+                    future.set_exception(error)
+                return
+            self.stats["purchases"] += len(batch)
+            self.stats["commits"] += 1
+        for (_rows, future), purchase_id in zip(batch, ids):
+            future.set_result(purchase_id)
+
+    def bulk_import(self, records):
+        """Import historical purchases in large transactions.
+
+        Args:
+            records: Iterable of purchase dicts already normalized by
+                `historical_record` (as `read_purchases` yields them); they
+                are only serialized here, not priced again.
+
+        Returns:
+            int: Number of purchases imported.
+        """
+        imported = 0
+        chunk = []
+        for record in records:
+            chunk.append(_encode_record(record))
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                imported += self._import_chunk(chunk)
+                chunk = []
+        if chunk:
+            imported += self._import_chunk(chunk)
+        return imported
+
+    def _import_chunk(self, chunk):
+        with self._write_lock, self._pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                first_id = conn.execute(
+                    "SELECT COALESCE(MAX(id), 0) + 1 FROM purchases").fetchone()[0]
+                ids = range(first_id, first_id + len(chunk))
+                conn.executemany(_INSERT_PURCHASE, (
+                    (purchase_id, *row) for purchase_id, (row, _items) in zip(ids, chunk)))
+                conn.executemany(_INSERT_ITEM, (
+                    (purchase_id, *item_row) for purchase_id, (_row, items) in zip(ids, chunk)
+                    for item_row in items))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            self.stats["purchases"] += len(chunk)
+            self.stats["commits"] += 1
+        return len(chunk)
+
+    def count(self):
+        """Return the number of stored purchases."""
+        with self._pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM purchases").fetchone()[0]
+
+    def get_purchase(self, purchase_id):
+        """Return a stored purchase as a dict, or None if it does not exist."""
+        with self._pool.connection() as conn:
+            row = conn.execute(_SELECT_PURCHASES + " WHERE id = ?",
+                               (purchase_id,)).fetchone()
+            if row is None:
+                return None
+            items = conn.execute(_SELECT_ITEMS + " WHERE purchase_id = ? ORDER BY position",
+                                 (purchase_id,)).fetchall()
+        return _purchase_from_rows(row, items)
+
+    def iter_purchases(self, after_id=0, page_size=1000):
+        """Yield the stored purchases with id > `after_id`, in id order.
+
+        Purchases are read in pages of `page_size`, so memory use does not
+        depend on the size of the ledger.
+        """
+        while True:
+            with self._pool.connection() as conn:
+                rows = conn.execute(
+                    _SELECT_PURCHASES + " WHERE id > ? ORDER BY id LIMIT ?",
+                    (after_id, page_size)).fetchall()
+                if not rows:
+                    return
+                items = {}
+                for item in conn.execute(
+                        _SELECT_ITEMS + " WHERE purchase_id BETWEEN ? AND ?"
+                        " ORDER BY purchase_id, position", (rows[0][0], rows[-1][0])):
+                    items.setdefault(item[0], []).append(item)
+            for row in rows:
+                yield _purchase_from_rows(row, items.get(row[0], []))
+            after_id = rows[-1][0]
+
+    def close(self):
+        """Commit the queued purchases, stop the writer and close connections."""
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        # Compras encoladas después del cierre: no se guardarán
+        while True:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is not _STOP:
+                entry[1].set_exception(ValueError("El registro de compras está cerrado"))
+        self._pool.close()
+
+
+def read_purchases(lines):
+    """Parse JSONL historical purchases, skipping blank lines.
+
+    Raises:
+        ValueError: With the line number if a line is not valid.
+    """
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield historical_record(json.loads(line))
+        except ValueError as e:
+            raise ValueError(f"Línea {line_number}: {e}") from e
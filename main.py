@@ -1,21 +1,482 @@
-"""Main module for gym membership system user interface."""
-from gym_membership import menu
+"""Main module for gym membership system user interface.
 
+Only what `quote` needs is imported with the module; every other
+subcommand imports its modules (asyncio server, SQLite ledger, analytics,
+...) when it runs, so a plain `quote` starts fast.
+"""
+# pylint: disable=import-outside-toplevel
+import argparse
+import json
+import sys
+import time
 
-def main():
+import metrics
+from pipeline import open_text, run_quote, write_jsonl
+from quote_cache import DEFAULT_MAXSIZE
+
+# Valores por defecto de subcomandos cuyos módulos se importan al ejecutarlos
+# (comprobados contra los módulos en tests/test_config_loading.py)
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+DEFAULT_MAX_CONNECTIONS = 256
+ANALYTICS_WINDOWS = ("day", "hour", "week")
+ANALYTICS_CHUNK_SIZE = 4 * 1024 * 1024
+BILLING_CHUNK_SIZE = 1000
+
+
+def build_parser():
+    """Build the command line parser.
+
+    Without a subcommand the interactive menu is started.
+    """
+    parser = argparse.ArgumentParser(
+        description="Sistema de membresías del gimnasio."
+    )
+    parser.add_argument(
+        "--ledger",
+        help="Base de datos SQLite donde el menú registra las compras confirmadas.",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    quote = subparsers.add_parser(
+        "quote",
+        help="Calcula precios de pedidos JSONL sin interacción.",
+    )
+    quote.add_argument(
+        "-i", "--input", default="-",
+        help="Archivo JSONL de pedidos ('-' para stdin).",
+    )
+    quote.add_argument(
+        "-o", "--output", default="-",
+        help="Archivo JSONL de resultados ('-' para stdout).",
+    )
+    quote.add_argument(
+        "-w", "--workers", type=int, default=1,
+        help="Procesos de cálculo en paralelo (requiere archivos, no stdin/stdout).",
+    )
+    quote.add_argument(
+        "--cache-size", type=int, default=DEFAULT_MAXSIZE,
+        help="Cestas distintas a recordar en la caché de cotizaciones (0 la desactiva).",
+    )
+    quote.add_argument(
+        "--metrics",
+        help="Instrumentar las etapas de cálculo y guardar las métricas en este "
+             "archivo (formato Prometheus si termina en .prom, si no JSON).",
+    )
+
+    serve = subparsers.add_parser(
+        "serve",
+        help="Servidor HTTP/JSON de cotizaciones y disponibilidad.",
+    )
+    serve.add_argument("--host", default=DEFAULT_HOST)
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT,
+                       help="Puerto (0 elige uno libre).")
+    serve.add_argument(
+        "--max-connections", type=int, default=DEFAULT_MAX_CONNECTIONS,
+        help="Conexiones atendidas a la vez; las demás reciben 503.",
+    )
+    serve.add_argument(
+        "--cache-size", type=int, default=DEFAULT_MAXSIZE,
+        help="Cestas distintas a recordar en la caché de cotizaciones (0 la desactiva).",
+    )
+    serve.add_argument(
+        "--reload-interval", type=float, default=0.0,
+        help="Segundos entre comprobaciones de config/config.json (0 no recarga).",
+    )
+    serve.add_argument(
+        "--instrument", action="store_true",
+        help="Medir las etapas de cálculo y publicarlas en /metrics.",
+    )
+
+    import_purchases = subparsers.add_parser(
+        "import-purchases",
+        help="Importa compras históricas JSONL al registro de compras.",
+    )
+    import_purchases.add_argument(
+        "-i", "--input", default="-",
+        help="Archivo JSONL de compras ('-' para stdin).",
+    )
+    import_purchases.add_argument(
+        "--ledger", required=True,
+        help="Base de datos SQLite del registro de compras.",
+    )
+
+    export_purchases = subparsers.add_parser(
+        "export-purchases",
+        help="Exporta el registro de compras como JSONL (historial para analytics).",
+    )
+    export_purchases.add_argument(
+        "--ledger", required=True,
+        help="Base de datos SQLite del registro de compras.",
+    )
+    export_purchases.add_argument(
+        "-o", "--output", default="-",
+        help="Archivo JSONL de salida ('-' para stdout).",
+    )
+    export_purchases.add_argument(
+        "--after-id", type=int, default=0,
+        help="Exportar solo compras con número mayor (para añadir al historial).",
+    )
+
+    report = subparsers.add_parser(
+        "analytics",
+        help="Ingresos por plan, features, descuentos y recargos por ventana de tiempo.",
+    )
+    report.add_argument(
+        "-i", "--input", required=True,
+        help="Historial de compras JSONL (ver export-purchases).",
+    )
+    report.add_argument(
+        "-o", "--output", default="-",
+        help="Archivo JSON del informe ('-' para stdout).",
+    )
+    report.add_argument("--window", choices=ANALYTICS_WINDOWS, default="day")
+    report.add_argument(
+        "--chunk-size", type=int, default=ANALYTICS_CHUNK_SIZE,
+        help="Bytes por bloque; cada bloque se cachea por separado.",
+    )
+    report.add_argument(
+        "--cache",
+        help="Archivo de caché de bloques (por defecto, junto al historial).",
+    )
+    report.add_argument("--no-cache", action="store_true",
+                        help="Recalcular todo sin leer ni escribir la caché.")
+
+    to_columnar = subparsers.add_parser(
+        "to-columnar",
+        help="Convierte un historial JSONL al formato columnar binario (.gcol).",
+    )
+    to_columnar.add_argument(
+        "-i", "--input", default="-",
+        help="Historial de compras JSONL ('-' para stdin).",
+    )
+    to_columnar.add_argument("-o", "--output", required=True,
+                             help="Archivo .gcol de salida.")
+
+    load_test = subparsers.add_parser(
+        "replay",
+        help="Reproduce sesiones guionadas del menú y mide la latencia de cada paso.",
+    )
+    load_test.add_argument(
+        "-i", "--input",
+        help="Guiones JSONL {\"answers\": [...], \"expected\": total} "
+             "('-' para stdin; por defecto se generan).",
+    )
+    load_test.add_argument("--sessions", type=int, default=1000,
+                           help="Sesiones a generar si no se indica --input.")
+    load_test.add_argument("--seed", type=int, default=0)
+    load_test.add_argument("--save-script",
+                           help="Guardar los guiones generados en este archivo JSONL.")
+    load_test.add_argument(
+        "-o", "--output", default="-",
+        help="Archivo JSON del informe ('-' para stdout).",
+    )
+    load_test.add_argument(
+        "--ledger",
+        help="Registrar las compras confirmadas en esta base de datos SQLite.",
+    )
+
+    optimize = subparsers.add_parser(
+        "optimize",
+        help="Busca la cesta más barata que da a un grupo las características pedidas.",
+    )
+    optimize.add_argument("--members", type=int, required=True,
+                          help="Miembros del grupo (una membresía cada uno).")
+    optimize.add_argument(
+        "-f", "--feature", action="append", default=[], dest="features",
+        help="Característica que necesita cada miembro (se puede repetir).",
+    )
+    optimize.add_argument("--no-extras", action="store_true",
+                          help="No añadir otras características aunque bajen el total.")
+    optimize.add_argument(
+        "-o", "--output", default="-",
+        help="Archivo JSON de la cesta ('-' para stdout).",
+    )
+
+    bill = subparsers.add_parser(
+        "bill",
+        help="Factura las renovaciones de un padrón por bloques, reanudable.",
+    )
+    bill.add_argument("-i", "--input", required=True,
+                      help="Padrón JSONL de membresías (formato de `quote`).")
+    bill.add_argument("-o", "--output", required=True,
+                      help="Archivo JSONL de facturas (se continúa si hay checkpoint).")
+    bill.add_argument(
+        "--chunk-size", type=int, default=BILLING_CHUNK_SIZE,
+        help="Cestas facturadas entre dos checkpoints.",
+    )
+    bill.add_argument("--period", help="Periodo facturado (por defecto el mes actual, AAAA-MM).")
+    bill.add_argument("--checkpoint",
+                      help="Archivo de checkpoint (por defecto <output>.checkpoint).")
+    bill.add_argument("--restart", action="store_true",
+                      help="Ignorar el checkpoint y facturar desde el principio.")
+    bill.add_argument(
+        "--cache-size", type=int, default=DEFAULT_MAXSIZE,
+        help="Cestas distintas a recordar en la caché de cotizaciones (0 la desactiva).",
+    )
+    return parser
+
+
+def run_quote_command(args):
+    """Run the `quote` subcommand and return the process exit code."""
+    if args.workers < 1:
+        print("ERROR: --workers debe ser al menos 1", file=sys.stderr)
+        return 1
+    if args.workers > 1 and "-" in (args.input, args.output):
+        print("ERROR: --workers requiere archivos de entrada y salida", file=sys.stderr)
+        return 1
+    if args.workers > 1 and args.metrics:
+        print("ERROR: --metrics solo mide el proceso actual; use --workers 1",
+              file=sys.stderr)
+        return 1
+    if args.metrics:
+        metrics.enable()
+    try:
+        if args.workers > 1:
+            from sharding import run_sharded_quote, print_report
+
+            report = run_sharded_quote(args.input, args.output, args.workers,
+                                       cache_size=args.cache_size)
+            print_report(report)
+            count = report["purchases"]
+        else:
+            count = run_quote(args.input, args.output, args.cache_size)
+        if args.metrics:
+            metrics.write_metrics(args.metrics)
+    except (ValueError, OSError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    finally:
+        metrics.disable()
+    print(f"Compras procesadas: {count}", file=sys.stderr)
+    return 0
+
+
+def run_serve_command(args):
+    """Run the `serve` subcommand until SIGINT/SIGTERM; return the exit code."""
+    if args.max_connections < 1:
+        print("ERROR: --max-connections debe ser al menos 1", file=sys.stderr)
+        return 1
+    import server
+
+    if args.instrument:
+        metrics.enable()
+    try:
+        server.run_server(args.host, args.port, args.max_connections,
+                          args.cache_size, args.reload_interval)
+    except OSError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    finally:
+        metrics.disable()
+    return 0
+
+
+def run_import_command(args):
+    """Run the `import-purchases` subcommand and return the exit code."""
+    import sqlite3
+    from ledger import Ledger, read_purchases
+
+    try:
+        with Ledger(args.ledger) as purchase_ledger, open_text(args.input) as source:
+            count = purchase_ledger.bulk_import(read_purchases(source))
+    except (ValueError, OSError, sqlite3.Error) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    print(f"Compras importadas: {count}", file=sys.stderr)
+    return 0
+
+
+def run_export_command(args):
+    """Run the `export-purchases` subcommand and return the exit code."""
+    import sqlite3
+    from ledger import Ledger
+
+    try:
+        with Ledger(args.ledger) as purchase_ledger, \
+                open_text(args.output, "a" if args.after_id else "w") as target:
+            count = write_jsonl(purchase_ledger.iter_purchases(args.after_id), target)
+    except (OSError, sqlite3.Error) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    print(f"Compras exportadas: {count}", file=sys.stderr)
+    return 0
+
+
+def run_analytics_command(args):
+    """Run the `analytics` subcommand and return the exit code."""
+    if args.chunk_size < 1:
+        print("ERROR: --chunk-size debe ser al menos 1", file=sys.stderr)
+        return 1
+    import analytics
+
+    try:
+        merged, stats = analytics.aggregate_file(
+            args.input, args.window, args.chunk_size, args.cache,
+            use_cache=not args.no_cache)
+        with open_text(args.output, "w") as target:
+            json.dump(analytics.build_report(merged), target, ensure_ascii=False, indent=2)
+            target.write("\n")
+    except (ValueError, OSError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    print(f"Bloques: {stats['chunks']} ({stats['cached_chunks']} desde caché, "
+          f"{stats['bytes_scanned']} bytes leídos)", file=sys.stderr)
+    return 0
+
+
+def run_columnar_command(args):
+    """Run the `to-columnar` subcommand and return the exit code."""
+    import columnar
+
+    try:
+        with open_text(args.input) as source:
+            count = columnar.write_records(
+                (json.loads(line) for line in source if line.strip()), args.output)
+    except (ValueError, KeyError, TypeError, OSError) as e:
+        print(f"ERROR: historial inválido: {e}", file=sys.stderr)
+        return 1
+    print(f"Compras convertidas: {count}", file=sys.stderr)
+    return 0
+
+
+def run_replay_command(args):
+    """Run the `replay` subcommand and return the exit code."""
+    if args.sessions < 1:
+        print("ERROR: --sessions debe ser al menos 1", file=sys.stderr)
+        return 1
+    import sqlite3
+    import replay
+    from ledger import Ledger
+
+    try:
+        if args.input:
+            with open_text(args.input) as source:
+                sessions = replay.load_sessions(source)
+        else:
+            sessions = replay.generate_sessions(args.sessions, args.seed)
+            if args.save_script:
+                with open_text(args.save_script, "w") as script:
+                    write_jsonl(sessions, script)
+        if args.ledger:
+            with Ledger(args.ledger) as purchase_ledger:
+                report = replay.run_sessions(sessions, purchase_ledger)
+        else:
+            report = replay.run_sessions(sessions)
+        with open_text(args.output, "w") as target:
+            json.dump(report, target, ensure_ascii=False, indent=2)
+            target.write("\n")
+    except (ValueError, OSError, sqlite3.Error) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    print(f"Sesiones: {report['sessions']} ({report['sessions_per_second']}/s), "
+          f"errores: {report['errors']}, totales distintos: {report['mismatches']}",
+          file=sys.stderr)
+    return 1 if report["errors"] or report["mismatches"] else 0
+
+
+def run_optimize_command(args):
+    """Run the `optimize` subcommand and return the exit code."""
+    import optimizer
+
+    start = time.perf_counter()
+    try:
+        basket = optimizer.cheapest_basket(args.members, args.features, not args.no_extras)
+        elapsed = time.perf_counter() - start
+        with open_text(args.output, "w") as target:
+            json.dump(basket.to_dict(), target, ensure_ascii=False, indent=2)
+            target.write("\n")
+    except (ValueError, OSError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    print(f"Total: ${basket.quote.total:.2f} para {basket.members} miembros "
+          f"({len(basket.items)} líneas, {elapsed * 1000:.1f} ms)", file=sys.stderr)
+    return 0
+
+
+def _print_chunk(stats):
+    eta = "?" if stats["eta_seconds"] is None else f"{stats['eta_seconds']:.1f} s"
+    print(f"Bloque {stats['chunk']}: {stats['invoices']} facturas en "
+          f"{stats['seconds']:.3f} s ({stats['invoices_per_second']:.0f}/s), "
+          f"{stats['percent']:.1f}% del padrón, ETA {eta}", file=sys.stderr)
+
+
+def run_bill_command(args):
+    """Run the `bill` subcommand and return the exit code."""
+    import billing
+
+    try:
+        report = billing.run_billing(
+            args.input, args.output, args.chunk_size, checkpoint_path=args.checkpoint,
+            period=args.period, restart=args.restart, cache_size=args.cache_size,
+            progress=_print_chunk)
+    except (ValueError, OSError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        print("Interrumpido; vuelva a ejecutar el mismo comando para continuar "
+              "desde el último bloque guardado", file=sys.stderr)
+        return 130
+    if report["resumed"] and not report["billed_now"]:
+        print(f"El periodo {report['period']} ya estaba facturado", file=sys.stderr)
+    print(f"Facturas: {report['invoices']} ({report['billed_now']} en esta ejecución, "
+          f"{report['errors']} con error), total ${report['total']:.2f}, "
+          f"{report['invoices_per_second']:.0f} facturas/s", file=sys.stderr)
+    return 0
+
+
+# subcomando -> función que lo ejecuta y devuelve el código de salida
+COMMANDS = {
+    "quote": run_quote_command,
+    "serve": run_serve_command,
+    "import-purchases": run_import_command,
+    "export-purchases": run_export_command,
+    "analytics": run_analytics_command,
+    "to-columnar": run_columnar_command,
+    "replay": run_replay_command,
+    "optimize": run_optimize_command,
+    "bill": run_bill_command,
+}
+
+
+def main(argv=None):
     """Main function to handle user interaction for membership selection.
 
     This is the entry point for the gym membership system.
-    It calls the interactive menu from gym_membership module which handles:
+    Without arguments it calls the interactive menu from gym_membership
+    module which handles:
     - Plan selection and validation
     - Feature selection (normal and premium)
     - Multiple membership purchases
-    - Group discounts (10% for multiple memberships of same type)
-    - Special discounts ($20 for total > $200, $50 for total > $400)
-    - Premium surcharge (15% when premium features are included)
+    - Group discounts, premium surcharges and special discounts, as
+      declared in the `pricing_rules` of the catalog (see `pricing_rules.py`)
+
+    The `quote` subcommand prices a JSONL stream of orders instead, and
+    `serve` starts the HTTP quote server, `import-purchases` and
+    `export-purchases` move purchases in and out of the ledger and
+    `analytics` reports revenue over an exported purchase history, which
+    `to-columnar` converts to the binary columnar format. `replay` drives
+    the menu with scripted sessions for load tests, `optimize` finds
+    the cheapest basket that gives a group the features it needs and
+    `bill` runs the resumable monthly renewal billing of a roster.
+
+    Returns:
+        int: Process exit code.
     """
-    menu()
+    args = build_parser().parse_args(argv)
+    if args.command:
+        return COMMANDS[args.command](args)
+    from menu import menu
+
+    if args.ledger:
+        from ledger import Ledger
+
+        with Ledger(args.ledger) as purchase_ledger:
+            menu(purchase_ledger)
+    else:
+        menu()
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
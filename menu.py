@@ -3,122 +3,135 @@ from models import Item, Buyer
 from utils import (
     show_options,
     validar_plan,
-    select_features,
+    classify_features,
     check_plan_availability,
     check_feature_availability,
 )
 
 
-def print_purchase_summary(items, buyer, costs, total):
+class ConsoleIO:
+    """Menu I/O on the terminal, through `input()` and `print()`.
+
+    `menu` only talks to the user through an object with these two methods,
+    so a session can also be driven by a script (see `replay.py`).
+    """
+
+    def ask(self, prompt):
+        """Show `prompt` and return the user's answer."""
+        return input(prompt)
+
+    def say(self, *args, **kwargs):
+        """Show a message (same arguments as `print`)."""
+        print(*args, **kwargs)
+
+
+def print_purchase_summary(items, quote, console=None):
     """Print the purchase summary with cost breakdown.
-    
+
     Args:
         items: List of Item objects selected by the user
-        buyer: Buyer object with calculated costs
-        costs: Dictionary with cost breakdown
-        total: Total amount to pay
+        quote: `Quote` of the purchase (nothing is priced again here)
+        console: Menu I/O (default: `ConsoleIO`)
     """
-    print("\n" + "="*50)
-    print("=== RESUMEN DE SU COMPRA ===")
-    print("="*50)
+    console = console or ConsoleIO()
+    console.say("\n" + "="*50)
+    console.say("=== RESUMEN DE SU COMPRA ===")
+    console.say("="*50)
 
     # Show selected memberships and features
-    print("\nMembresías seleccionadas:")
+    console.say("\nMembresías seleccionadas:")
     for idx, item in enumerate(items, 1):
-        print(f"\n  {idx}. Plan: {item.plan_name}")
+        quantity = f" x {item.quantity}" if item.quantity != 1 else ""
+        console.say(f"\n  {idx}. Plan: {item.plan_name}{quantity}")
         if item.additional_features:
             feat_list = ', '.join(item.additional_features)
-            print(f"     Características adicionales: {feat_list}")
+            console.say(f"     Características adicionales: {feat_list}")
         if item.premium_membership_features:
             prem_list = ', '.join(item.premium_membership_features)
-            print(f"     Características premium: {prem_list}")
+            console.say(f"     Características premium: {prem_list}")
 
     # Show cost breakdown
-    print("\nDesglose de costos:")
-    for plan_name, cost in costs.items():
+    console.say("\nDesglose de costos:")
+    for plan_name, cost in quote.costs.items():
         if cost > 0:
-            print(f"  {plan_name}: ${cost:.2f}")
+            console.say(f"  {plan_name}: ${cost:.2f}")
 
     # Mostrar subtotal y recargos/descuentos
-    subtotal_before_adjustments = (
-        buyer.sum_costs(costs) +
-        buyer.special_discount_amount -
-        buyer.premium_surcharge_amount
-    )
-
-    if buyer.premium_surcharge_amount > 0 or buyer.special_discount_amount > 0:
-        print(f"\n  Subtotal: ${subtotal_before_adjustments:.2f}")
+    if quote.premium_surcharge > 0 or quote.special_discount > 0:
+        console.say(f"\n  Subtotal: ${quote.subtotal:.2f}")
 
-        if buyer.premium_surcharge_amount > 0:
-            print(f"  Recargo Premium (15%): +${buyer.premium_surcharge_amount:.2f}")
+        if quote.premium_surcharge > 0:
+            console.say(f"  Recargo Premium: +${quote.premium_surcharge:.2f}")
             # Mostrar desglose por plan si está disponible
-            if getattr(buyer, 'premium_surcharge_breakdown', None):
-                print("  Desglose Recargo Premium:")
-                for pname, svalue in buyer.premium_surcharge_breakdown.items():
-                    if svalue and svalue > 0:
-                        print(f"    - {pname}: +${svalue:.2f}")
+            if quote.premium_surcharge_breakdown:
+                console.say("  Desglose Recargo Premium:")
+                for pname, svalue in quote.premium_surcharge_breakdown.items():
+                    if svalue > 0:
+                        console.say(f"    - {pname}: +${svalue:.2f}")
 
-        if buyer.special_discount_amount > 0:
-            print(f"  Descuento especial: -${buyer.special_discount_amount:.2f}")
+        if quote.special_discount > 0:
+            console.say(f"  Descuento especial: -${quote.special_discount:.2f}")
 
-    print("\n" + "="*50)
-    print(f"  TOTAL A PAGAR: ${total:.2f}")
-    print("="*50)
+    console.say("\n" + "="*50)
+    console.say(f"  TOTAL A PAGAR: ${quote.total:.2f}")
+    console.say("="*50)
 
 
-def menu():
+def menu(ledger=None, console=None):
     """Interactive menu for gym membership selection and purchase.
 
+    Args:
+        ledger: Optional `ledger.Ledger` where confirmed purchases are stored.
+        console: Object with `ask(prompt)` and `say(*args)` used for all
+            input and output (default: `ConsoleIO`, the terminal).
+
     Returns:
         float: Total cost if confirmed and valid, -1 if cancelled or invalid.
     """
-    print("=== BIENVENIDO AL SISTEMA DE MEMBRESÍAS DEL GYM ===")
+    console = console or ConsoleIO()
+    console.say("=== BIENVENIDO AL SISTEMA DE MEMBRESÍAS DEL GYM ===")
 
     items = []
 
     while True:
-        show_options()
+        show_options(console.say)
 
         # Selección del plan (Requirement 7: Validate availability)
-        plan_input = input("\nIngrese el nombre del plan que desea comprar: ")
+        plan_input = console.ask("\nIngrese el nombre del plan que desea comprar: ")
         plan_name = validar_plan(plan_input)
         if not plan_name:
-            print(f"ERROR: El plan '{plan_input}' no es válido.")
-            print("Por favor, seleccione uno de los planes disponibles listados arriba.")
+            console.say(f"ERROR: El plan '{plan_input}' no es válido.")
+            console.say("Por favor, seleccione uno de los planes disponibles listados arriba.")
             continue
 
         # Requirement 7: Validate plan availability (más descriptivo)
         available, reason = check_plan_availability(plan_name)
         if not available:
-            print(f"ERROR: El plan '{plan_name}' no está disponible actualmente.")
+            console.say(f"ERROR: El plan '{plan_name}' no está disponible actualmente.")
             if reason:
-                print(f"Razón: {reason}.")
-            print("Por favor, seleccione otro plan.")
+                console.say(f"Razón: {reason}.")
+            console.say("Por favor, seleccione otro plan.")
             continue
 
         # Selección de features adicionales (Requirement 7: Validate availability)
-        features_input = input(
+        features_input = console.ask(
             "Ingrese features adicionales separados por coma "
             "(o presione Enter para none): "
         )
         features_list = [f.strip() for f in features_input.split(",")] if features_input else []
-        valid_features, invalid_features = select_features(features_list)
+        normal_features, premium_features, invalid_features = classify_features(features_list)
 
         # Requirement 7 & 10: Display error for unavailable features (más descriptivo)
         if invalid_features:
-            print("\nADVERTENCIA: Las siguientes características no están disponibles:")
+            console.say("\nADVERTENCIA: Las siguientes características no están disponibles:")
             for inv_feat in invalid_features:
                 _available_feat, reason_feat = check_feature_availability(inv_feat)
                 if reason_feat:
-                    print(f"  - '{inv_feat}': {reason_feat}")
+                    console.say(f"  - '{inv_feat}': {reason_feat}")
                 else:
-                    print(f"  - '{inv_feat}'")
-            print("Las características inválidas serán ignoradas.")
-            print("Continuando solo con las características válidas...")
-
-        # Separar features normales de premium
-        normal_features = [f for f in valid_features if f in Item.ADDITIONAL_FEATURES]
-        premium_features = [f for f in valid_features if f in Item.PREMIUM_FEATURES]
+                    console.say(f"  - '{inv_feat}'")
+            console.say("Las características inválidas serán ignoradas.")
+            console.say("Continuando solo con las características válidas...")
 
         # Crear item y agregar a la lista
         item = Item(plan_name, normal_features, premium_features)
@@ -130,73 +143,83 @@ def menu():
         if premium_features:
             features_msg.append(f"Premium: {', '.join(premium_features)}")
 
-        print(f"\nPlan '{plan_name}' agregado.")
+        console.say(f"\nPlan '{plan_name}' agregado.")
         if features_msg:
-            print(f"Features: {' | '.join(features_msg)}")
+            console.say(f"Features: {' | '.join(features_msg)}")
         else:
-            print("Features: ninguna")
+            console.say("Features: ninguna")
 
         # Preguntar al usuario qué desea hacer
-        print("\n¿Qué desea hacer ahora?")
-        print("1 - Agregar otro plan")
-        print("2 - Calcular costos y finalizar compra")
-        next_action = input("Ingrese opción (1 o 2): ").strip()
+        console.say("\n¿Qué desea hacer ahora?")
+        console.say("1 - Agregar otro plan")
+        console.say("2 - Calcular costos y finalizar compra")
+        next_action = console.ask("Ingrese opción (1 o 2): ").strip()
 
         if next_action == "2":
             break
         if next_action != "1":
-            print("Opción no válida, continuando con el menú...\n")
+            console.say("Opción no válida, continuando con el menú...\n")
 
     # Requirement 10: Handle case when no items selected
     if not items:
-        print("\nERROR: No se seleccionó ninguna membresía.")
-        print("No se puede procesar una compra sin al menos un plan.")
-        print("Saliendo del sistema.")
+        console.say("\nERROR: No se seleccionó ninguna membresía.")
+        console.say("No se puede procesar una compra sin al menos un plan.")
+        console.say("Saliendo del sistema.")
         return -1  # Requirement 9: Return -1 for invalid input
 
     # Requirement 10: Error handling for calculation
     try:
-        # Crear comprador y calcular costos
+        # Crear comprador y calcular costos una sola vez
         buyer = Buyer(items)
-        costs = buyer.calculate_costs()
-        total = buyer.sum_costs(costs)
+        quote = buyer.quote()
 
         # Requirement 8: Display summary for user confirmation
-        print_purchase_summary(items, buyer, costs, total)
+        print_purchase_summary(items, quote, console)
 
         # Notificación de descuentos grupales
         if any(qty > 1 for qty in buyer.count_membership().values()):
-            print("\n💡 ", end="")
-            buyer.notify_discount()
+            console.say(f"\n💡 {buyer.discount_notification()}")
 
         # Requirement 8: User confirmation before finalizing
-        print("\n¿Desea confirmar esta compra?")
-        print("1 - Sí, confirmar y finalizar")
-        print("2 - No, cancelar compra")
+        console.say("\n¿Desea confirmar esta compra?")
+        console.say("1 - Sí, confirmar y finalizar")
+        console.say("2 - No, cancelar compra")
 
-        confirmation = input("Ingrese su opción (1 o 2): ").strip()
+        confirmation = console.ask("Ingrese su opción (1 o 2): ").strip()
 
         if confirmation == "1":
-            print("\n✅ ¡Compra confirmada!")
-            print("¡Gracias por su compra!")
-            return total  # Requirement 9: Return positive integer (total cost)
+            if ledger is not None:
+                # Solo se carga SQLite si hay un registro de compras
+                from ledger import LedgerError, record_from_quote  # pylint: disable=import-outside-toplevel
+
+                try:
+                    purchase_id = ledger.record_purchase(
+                        record_from_quote(items, quote))
+                except (LedgerError, ValueError) as e:
+                    console.say(f"\nERROR: No se pudo registrar la compra: {e}")
+                    console.say("No se realizó ningún cargo.")
+                    return -1
+                console.say(f"\nCompra registrada con el número {purchase_id}.")
+            console.say("\n✅ ¡Compra confirmada!")
+            console.say("¡Gracias por su compra!")
+            return quote.total  # Requirement 9: Return positive integer (total cost)
 
         # Requirement 9: Return -1 if cancelled
-        print("\n❌ Compra cancelada.")
-        print("No se realizó ningún cargo.")
+        console.say("\n❌ Compra cancelada.")
+        console.say("No se realizó ningún cargo.")
         return -1
 
     except ValueError as e:
         # Requirement 10: Handle calculation errors gracefully
-        print(f"\nERROR DE CÁLCULO: {str(e)}")
-        print("No se pudo procesar la compra debido a un error en los cálculos.")
-        print("Por favor, contacte al administrador del sistema.")
+        console.say(f"\nERROR DE CÁLCULO: {str(e)}")
+        console.say("No se pudo procesar la compra debido a un error en los cálculos.")
+        console.say("Por favor, contacte al administrador del sistema.")
         return -1
     except (KeyError, AttributeError, TypeError) as e:
         # Requirement 10: Handle unexpected errors
-        print(f"\nERROR INESPERADO: {str(e)}")
-        print("Ocurrió un error al procesar su compra.")
-        print("Por favor, intente nuevamente o contacte al soporte técnico.")
+        console.say(f"\nERROR INESPERADO: {str(e)}")
+        console.say("Ocurrió un error al procesar su compra.")
+        console.say("Por favor, intente nuevamente o contacte al soporte técnico.")
         return -1
 
 
@@ -0,0 +1,260 @@
+"""Optional instrumentation of the pricing stages.
+
+`enable()` wraps the pricing stages (`Buyer.count_membership`,
+`calculate_costs`, `has_premium_features`, `sum_costs`, `quote`,
+`PricingRules.quantity_discount`, `PricingRules.settle` and its surcharge,
+special-discount and surcharge apportion steps, `PriceTable.item_cents` and
+`load_config`) with timers that feed per-stage latency histograms and
+call/error counters. `disable()` puts the original functions back, so when
+instrumentation is off no timer runs. The surcharge and special-discount
+steps are separate `PricingRules` methods so that they can be wrapped, which
+costs one extra call per step even when nothing is measured; the apportion
+step is `cents.apportion` as imported by `pricing_rules`.
+
+`calculate_costs` groups the items itself, so `count_membership` is only
+recorded where it is still called: the menu and the `Buyer` fallback of
+`models.price_baskets`.
+
+Stage latencies are inclusive: `calculate_costs` also contains the time of
+every item cost it computes, and `pricing_rules` (`settle`) the time of its
+`surcharge`, `special_discount` and `surcharge_apportion` steps.
+
+The collected metrics can be exported in Prometheus text format
+(`to_prometheus`) or as a JSON-serializable snapshot (`snapshot`).
+"""
+import bisect
+import functools
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+import catalog
+import config_manager
+import pricing_rules
+from models import Buyer, IncrementalBuyer
+from price_table import PriceTable
+from pricing_rules import PricingRules
+
+# Límites superiores de los buckets, en segundos
+BUCKETS = (
+    0.000001, 0.000005, 0.00001, 0.00005, 0.0001, 0.0005,
+    0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0,
+)
+
+METRIC_PREFIX = "gym_pricing_stage"
+
+# (objeto, atributo, etapa) que se instrumentan
+_TARGETS = (
+    (Buyer, "count_membership", "count_membership"),
+    (Buyer, "calculate_costs", "calculate_costs"),
+    (Buyer, "has_premium_features", "has_premium_features"),
+    (Buyer, "sum_costs", "sum_costs"),
+    (Buyer, "quote", "quote"),
+    (PricingRules, "quantity_discount", "group_discount"),
+    (PricingRules, "settle", "pricing_rules"),
+    (PricingRules, "_surcharge", "surcharge"),
+    (PricingRules, "_discount", "special_discount"),
+    # `pricing_rules` importa `cents.apportion` por nombre
+    (pricing_rules, "apportion", "surcharge_apportion"),
+    (IncrementalBuyer, "count_membership", "count_membership"),
+    (IncrementalBuyer, "has_premium_features", "has_premium_features"),
+    (PriceTable, "item_cents", "item_cost"),
+    (config_manager, "load_config", "load_config"),
+    # `catalog` importa la función por nombre
+    (catalog, "load_config", "load_config"),
+)
+
+
+class Histogram:
+    """Latency histogram with fixed buckets, a sum and a count."""
+
+    def __init__(self, bounds=BUCKETS):
+        self.bounds = bounds
+        self.bucket_counts = [0] * (len(bounds) + 1)  # último: +Inf
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds):
+        """Record one observation."""
+        self.bucket_counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def cumulative(self):
+        """Return [(upper_bound, cumulative_count)] including +Inf."""
+        rows = []
+        running = 0
+        for bound, count in zip(self.bounds + (math.inf,), self.bucket_counts):
+            running += count
+            rows.append((bound, running))
+        return rows
+
+
+class Registry:
+    """Thread-safe store of per-stage histograms and counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.errors = {}
+
+    def observe(self, stage, seconds, failed=False):
+        """Record the latency of one call to `stage`."""
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+                self.errors[stage] = 0
+            histogram.observe(seconds)
+            if failed:
+                self.errors[stage] += 1
+
+    def reset(self):
+        """Drop every recorded metric."""
+        with self._lock:
+            self.histograms.clear()
+            self.errors.clear()
+
+    def snapshot(self):
+        """Return the metrics as a JSON-serializable dict."""
+        with self._lock:
+            stages = {}
+            for stage, histogram in sorted(self.histograms.items()):
+                stages[stage] = {
+                    "count": histogram.count,
+                    "errors": self.errors[stage],
+                    "sum_seconds": histogram.total,
+                    "mean_seconds": histogram.total / histogram.count,
+                    "buckets": {
+                        _format_bound(bound): count
+                        for bound, count in histogram.cumulative()
+                    },
+                }
+            return {"enabled": is_enabled(), "stages": stages}
+
+    def to_prometheus(self):
+        """Return the metrics in Prometheus text exposition format."""
+        lines = [
+            f"# HELP {METRIC_PREFIX}_seconds Latency of gym pricing stages.",
+            f"# TYPE {METRIC_PREFIX}_seconds histogram",
+        ]
+        with self._lock:
+            items = sorted(self.histograms.items())
+            for stage, histogram in items:
+                for bound, count in histogram.cumulative():
+                    lines.append(f'{METRIC_PREFIX}_seconds_bucket{{stage="{stage}",'
+                                 f'le="{_format_bound(bound)}"}} {count}')
+                lines.append(f'{METRIC_PREFIX}_seconds_sum{{stage="{stage}"}} '
+                             f'{histogram.total!r}')
+                lines.append(f'{METRIC_PREFIX}_seconds_count{{stage="{stage}"}} '
+                             f'{histogram.count}')
+            lines.append(f"# HELP {METRIC_PREFIX}_errors_total "
+                         "Calls to gym pricing stages that raised.")
+            lines.append(f"# TYPE {METRIC_PREFIX}_errors_total counter")
+            for stage, _histogram in items:
+                lines.append(f'{METRIC_PREFIX}_errors_total{{stage="{stage}"}} '
+                             f'{self.errors[stage]}')
+        return "\n".join(lines) + "\n"
+
+
+def _format_bound(bound):
+    """Format a bucket bound as Prometheus does ("+Inf" for infinity)."""
+    return "+Inf" if math.isinf(bound) else repr(bound)
+
+
+REGISTRY = Registry()
+# (objeto, atributo) -> función original, mientras la instrumentación está activa
+_originals = {}
+_state_lock = threading.Lock()
+
+
+def _timed(func, stage):
+    """Wrap `func` so every call is recorded under `stage`."""
+    clock = time.perf_counter
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = clock()
+        failed = True
+        try:
+            result = func(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            REGISTRY.observe(stage, clock() - start, failed)
+
+    wrapper.__wrapped_stage__ = stage
+    return wrapper
+
+
+def enable():
+    """Install the timers on every pricing stage (idempotent)."""
+    with _state_lock:
+        if _originals:
+            return
+        for owner, name, stage in _TARGETS:
+            # Solo se envuelven atributos propios (no heredados)
+            if name not in vars(owner):
+                continue
+            original = vars(owner)[name]
+            _originals[(owner, name)] = original
+            setattr(owner, name, _timed(original, stage))
+
+
+def disable():
+    """Restore the original functions, removing all overhead."""
+    with _state_lock:
+        for (owner, name), original in _originals.items():
+            setattr(owner, name, original)
+        _originals.clear()
+
+
+def is_enabled():
+    """Return True while the instrumentation is installed."""
+    return bool(_originals)
+
+
+@contextmanager
+def instrumentation():
+    """Enable instrumentation inside a `with` block.
+
+    If it was already enabled it stays enabled after the block.
+    """
+    was_enabled = is_enabled()
+    enable()
+    try:
+        yield REGISTRY
+    finally:
+        if not was_enabled:
+            disable()
+
+
+def snapshot():
+    """Return the default registry as a JSON-serializable dict."""
+    return REGISTRY.snapshot()
+
+
+def to_prometheus():
+    """Return the default registry in Prometheus text format."""
+    return REGISTRY.to_prometheus()
+
+
+def reset():
+    """Clear the default registry."""
+    REGISTRY.reset()
+
+
+def write_metrics(path):
+    """Write the default registry to `path`.
+
+    Files ending in ".prom" get Prometheus text format, anything else the
+    JSON snapshot.
+    """
+    if path.endswith(".prom"):
+        content = to_prometheus()
+    else:
+        content = json.dumps(snapshot(), indent=2) + "\n"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
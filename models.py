@@ -1,110 +1,130 @@
 """Model classes for gym membership system."""
 
+import cents
+from cents import CENTS_PER_UNIT
+from catalog import CatalogField, FrozenDict, get_catalog
+from pricing_rules import DISCOUNT
+
 
 class Item:
-    """Represents a membership item with plan and features."""
-
-    plan = {
-        "Basic": {
-            "benefits": 'Access to standard gym equipment and locker room.',
-            "cost": 25
-        },
-        "Premium": {
-            "benefits": 'Includes Basic + Sauna access and free towel service.',
-            "cost": 30
-        },
-        "Student": {
-            "benefits": 'Access to standard gym equipment and locker room + early hours access.',
-            "cost": 20
-        },
-        "Family": {
-            "benefits": 'Access for up to 4 family members + Pool access.',
-            "cost": 40
-        }
-    }
-
-    ADDITIONAL_FEATURES = {
-        'Personal Training': 30,
-        'Group Classes': 20,
-        'Access to Pool': 15,
-        'Specialized Program': 40
-    }
-
-    PREMIUM_FEATURES = {
-        'Exclusive Gym Facilities': 100,
-        'Specialized Training Programs': 80
-    }
-
-    # Optional availability maps. Leave empty to assume everything is available.
-    # You can set e.g. Item.PLAN_AVAILABLE['Premium'] = False to mark unavailable.
-    PLAN_AVAILABLE = {}
-    FEATURE_AVAILABLE = {}
-
-    def __init__(self, plan_name, additional_features, premium_membership_features):
+    """Represents a membership item with plan and features.
+
+    Plans, features and availability maps come from the current catalog
+    snapshot (see `catalog.py`); the class attributes below are read-only
+    views of it. Cost methods accept an explicit `catalog` so a whole
+    purchase can be priced against a single snapshot.
+
+    `quantity` makes the item a line of identical memberships (e.g. 20,000
+    employees on the same plan); a `Buyer` prices it exactly like that many
+    separate items, with work proportional to the number of lines. It must
+    be a positive integer. The cost methods return the cost of one
+    membership.
+    """
+
+    plan = CatalogField("plans")
+    ADDITIONAL_FEATURES = CatalogField("additional_features")
+    PREMIUM_FEATURES = CatalogField("premium_features")
+
+    # Optional availability maps. Empty means everything is available.
+    # Mark e.g. "plan_available": {"Premium": false} in config/config.json.
+    PLAN_AVAILABLE = CatalogField("plan_available")
+    FEATURE_AVAILABLE = CatalogField("feature_available")
+
+    def __init__(self, plan_name, additional_features, premium_membership_features,
+                 quantity=1):
+        if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity < 1:
+            raise ValueError(f"La cantidad '{quantity}' no es válida")
         self.plan_name = plan_name
         self.additional_features = additional_features
         self.premium_membership_features = premium_membership_features
+        self.quantity = quantity
 
-    def get_plan_cost(self):
+    def get_plan_cost(self, catalog=None):
         """Get the cost of a specific plan.
 
         Returns:
             Cost of the plan, or 0 if plan not found.
         """
-        if self.plan_name in self.plan:
-            return self.plan[self.plan_name]['cost']
-        return 0
+        return (catalog or get_catalog()).plan_cost(self.plan_name)
 
-    def get_features_cost(self):
+    def get_features_cost(self, catalog=None):
         """Calculate total cost of all features (normal and premium)."""
+        catalog = catalog or get_catalog()
         features_cost = 0
         # Sumar features adicionales normales
         for feature in self.additional_features:
-            features_cost += self.get_feature_cost(feature)
+            features_cost += catalog.feature_cost(feature)
         # Sumar features premium
         for feature in self.premium_membership_features:
-            features_cost += self.get_feature_cost(feature)
+            features_cost += catalog.feature_cost(feature)
         return features_cost
 
-    def get_feature_cost(self, feature):
+    def get_feature_cost(self, feature, catalog=None):
         """Get the cost of a specific feature."""
-        if feature in self.ADDITIONAL_FEATURES:
-            return self.ADDITIONAL_FEATURES[feature]
-        if feature in self.PREMIUM_FEATURES:
-            return self.PREMIUM_FEATURES[feature]
-        return 0
+        return (catalog or get_catalog()).feature_cost(feature)
 
-    def calculate_total_membership_cost(self):
+    def calculate_total_membership_cost(self, catalog=None):
         """Calculate the total cost including plan and all features."""
-        base_plan_cost = self.get_plan_cost()
-        features_cost = self.get_features_cost()
-        cost = features_cost + base_plan_cost
-        return cost
+        return cents.to_amount(self.calculate_total_membership_cents(catalog))
+
+    def calculate_total_membership_cents(self, catalog=None):
+        """Total cost of the plan and all its features, in integer cents.
+
+        Looked up in the precomputed price table of the catalog (see
+        `price_table.py`).
+        """
+        return (catalog or get_catalog()).price_table().item_cents(
+            self.plan_name, self.additional_features, self.premium_membership_features)
 
 
 class Buyer:
-    """Represents a buyer with multiple membership items and discount logic."""
+    """Represents a buyer with multiple membership items and discount logic.
+
+    Prices are computed in integer cents with the rounding rules of
+    `cents.py`; the public methods take and return money amounts. Group
+    discounts, surcharges and special discounts come from the pricing rules
+    of the catalog snapshot (see `pricing_rules.py`).
+
+    Costs are aggregated for every plan of the catalog that appears in the
+    purchase, in one pass over the items; plans missing from the catalog
+    cost nothing. Per-plan results are listed in catalog order, so they do
+    not depend on the order of the items.
+    """
 
-    DISCOUNT_GROUP_MEMBERSHIP = 0.10
     NOTIFICATION_GROUP_MEMBERSHIP = (
-        f"Adquiere planes de membresía con tus amigos y recibe "
-        f"descuentos de: {DISCOUNT_GROUP_MEMBERSHIP * 100}%"
+        "Adquiere planes de membresía con tus amigos y recibe "
+        "descuentos de hasta: {percent:g}%"
     )
 
-    def __init__(self, items):
+    def __init__(self, items, catalog=None):
         self.items = items
+        # Todas las operaciones del comprador usan la misma versión del catálogo
+        self.catalog = catalog or get_catalog()
+        self.catalog_version = self.catalog.version
         self.special_discount_amount = 0.0
         self.premium_surcharge_amount = 0.0
         # Breakdown dict: { plan_name: surcharge_amount }
         self.premium_surcharge_breakdown = {}
+        # (costes devueltos, los mismos en céntimos) del último calculate_costs
+        self._priced_costs = None
 
-    def apply_discount(self, cost):
+    def apply_discount(self, cost, plan_name=None, quantity=2):
         """Calculate the group membership discount amount."""
-        return cost * self.DISCOUNT_GROUP_MEMBERSHIP
+        return cents.to_amount(
+            self.apply_discount_cents(cents.to_cents(cost), plan_name, quantity))
+
+    def apply_discount_cents(self, cost_cents, plan_name=None, quantity=2):
+        """Group discount of `quantity` memberships of a plan costing `cost_cents`."""
+        return self.catalog.pricing_rules.quantity_discount(plan_name, quantity, cost_cents)
+
+    def discount_notification(self):
+        """Return the group membership discount notification."""
+        return self.NOTIFICATION_GROUP_MEMBERSHIP.format(
+            percent=self.catalog.pricing_rules.max_group_percent)
 
     def notify_discount(self):
         """Display group membership discount notification."""
-        print(self.NOTIFICATION_GROUP_MEMBERSHIP)
+        print(self.discount_notification())
 
     def count_membership(self):
         """Count how many memberships of each type are in the purchase.
@@ -117,9 +137,9 @@ class Buyer:
 
         for item in self.items:
             if item.plan_name in plan_counts:
-                plan_counts[item.plan_name] += 1
+                plan_counts[item.plan_name] += item.quantity
             else:
-                plan_counts[item.plan_name] = 1
+                plan_counts[item.plan_name] = item.quantity
 
         return plan_counts
 
@@ -133,105 +153,482 @@ class Buyer:
         return valid_plans_discount_membership_group
 
     def calculate_costs(self):
-        """Calculate costs per plan type with group discounts applied."""
-        plan_counts = self.count_membership()
-        valid_plans = self.validate_discount_membership_group(plan_counts)
-        costs = {"Basic": 0.0, "Premium": 0.0, "Student": 0.0, "Family": 0.0}
+        """Calculate costs per plan type with group discounts applied.
 
-        for item in self.items:
-            item_total_membership_cost = item.calculate_total_membership_cost()
-            if item.plan_name in costs:
-                costs[item.plan_name] += item_total_membership_cost
-
-        for plan_name in valid_plans:
-            if plan_name in costs:
-                discount_amount = self.apply_discount(costs[plan_name])
-                costs[plan_name] -= discount_amount
+        The cents behind the returned amounts are kept, so `sum_costs` of
+        the same dict does not convert them back.
+        """
+        costs_cents = self._costs_cents()
+        costs = {plan_name: value / CENTS_PER_UNIT for plan_name, value in costs_cents.items()}
+        self._priced_costs = (dict(costs), costs_cents)
         return costs
 
+    def _costs_cents(self):
+        """Per-plan cents with group discounts applied (no side effects).
+
+        A single hashed group-by over the items: the work grows with the
+        number of items, not with the number of plans of the catalog.
+        """
+        table = self.catalog.price_table()
+        plan_ids = table.plan_ids
+        item_cents = table.item_cents
+        subtotals = {}
+        plan_counts = {}
+        for item in self.items:
+            plan_name = item.plan_name
+            if plan_name not in plan_ids:
+                continue
+            quantity = item.quantity
+            # Una línea con cantidad cuesta lo mismo que `quantity` items iguales
+            cost = item_cents(plan_name, item.additional_features,
+                              item.premium_membership_features) * quantity
+            if plan_name in subtotals:
+                subtotals[plan_name] += cost
+                plan_counts[plan_name] += quantity
+            else:
+                subtotals[plan_name] = cost
+                plan_counts[plan_name] = quantity
+        return self._group_costs(subtotals, plan_counts, plan_ids)
+
+    def _group_costs(self, subtotals, plan_counts, plan_ids):
+        """Sort per-plan subtotals in catalog order and apply group discounts."""
+        plan_names = subtotals
+        if len(subtotals) > 1:
+            plan_names = sorted(subtotals, key=plan_ids.__getitem__)
+        discount = self.catalog.pricing_rules.quantity_discount
+        costs_cents = {}
+        for plan_name in plan_names:
+            cost = subtotals[plan_name]
+            quantity = plan_counts[plan_name]
+            if quantity > 1:
+                cost -= discount(plan_name, quantity, cost)
+            costs_cents[plan_name] = cost
+        return costs_cents
+
     def sum_costs(self, costs):
-        """Sum all costs and apply premium surcharge and special discounts."""
-        total = 0.0
-        for plan_name in costs:
-            total += costs[plan_name]
-
-        # Aplicar recargo premium del 15% si hay features premium
-        if self.has_premium_features():
-            # Calculamos el recargo total como antes
-            self.premium_surcharge_amount = total * 0.15
-
-            # Generar desglose proporcional por plan
-            self.premium_surcharge_breakdown = {}
-            if total > 0:
-                for plan_name, plan_cost in costs.items():
-                    # Proporción del plan en el subtotal
-                    proportion = plan_cost / total if total else 0
-                    self.premium_surcharge_breakdown[plan_name] = round(
-                        self.premium_surcharge_amount * proportion, 2
-                    )
-                # Ajuste por redondeo: asegurar que la suma = premium_surcharge_amount
-                sum_break = sum(self.premium_surcharge_breakdown.values())
-                diff = round(self.premium_surcharge_amount - sum_break, 2)
-                if diff != 0:
-                    # Añadir la diferencia al primer plan no vacío
-                    for plan_name in costs:
-                        if costs[plan_name] > 0:
-                            self.premium_surcharge_breakdown[plan_name] += diff
-                            break
-
-            total += self.premium_surcharge_amount
-
-        # Aplicar descuentos especiales basados en el coste total
-        discounted_total = self.apply_special_discount(total)
-        return discounted_total
+        """Sum all costs and apply premium surcharge and special discounts.
+
+        The premium surcharge is split across plans by largest remainder,
+        so `premium_surcharge_breakdown` adds up to it to the cent. The
+        amounts are also stored on the buyer; `quote` returns them instead.
+        """
+        priced = self._priced_costs
+        if priced is not None and priced[0] == costs:
+            # Los mismos costes del último calculate_costs: sus céntimos ya están
+            costs_cents = priced[1]
+        else:
+            costs_cents = {plan_name: cents.to_cents(cost) for plan_name, cost in costs.items()}
+        surcharge, breakdown, special, total = self.catalog.pricing_rules.settle(
+            costs_cents, self.has_premium_features())
+        self.premium_surcharge_amount = surcharge / CENTS_PER_UNIT
+        self.premium_surcharge_breakdown = {plan_name: share / CENTS_PER_UNIT
+                                            for plan_name, share in breakdown.items()}
+        self.special_discount_amount = special / CENTS_PER_UNIT
+        return total / CENTS_PER_UNIT
+
+    def quote(self):
+        """Price the purchase once and return the result as a `Quote`.
+
+        Unlike `calculate_costs`/`sum_costs` nothing is stored on the buyer.
+        """
+        costs_cents = self._costs_cents()
+        settlement = self.catalog.pricing_rules.settle(costs_cents, self.has_premium_features())
+        return Quote(costs_cents, settlement, self.catalog_version)
 
     def apply_special_discount(self, total):
-        """Apply special fixed discounts based on total.
+        """Apply the discount rules of the catalog to `total`.
 
-        Rules:
+        With the default rules:
         - If total cost exceeds $400, subtract $50.
         - If total cost exceeds $200, subtract $20.
 
-        The discount amount is stored in `self.special_discount_amount`.
+        Surcharge rules are not applied. The discount amount is stored in
+        `self.special_discount_amount`.
         """
-        self.special_discount_amount = 0.0
-        if total > 400:
-            self.special_discount_amount = 50.0
-        elif total > 200:
-            self.special_discount_amount = 20.0
-
-        return max(0.0, total - self.special_discount_amount)
+        _surcharge, discount, total_cents = self.catalog.pricing_rules.adjust(
+            cents.to_cents(total), self.has_premium_features(), effects=(DISCOUNT,))
+        self.special_discount_amount = cents.to_amount(discount)
+        return cents.to_amount(total_cents)
 
     def has_premium_features(self):
-        """Check if any item has premium features."""
+        """Check if any item has premium features (a bitmask AND per feature)."""
+        table = self.catalog.price_table()
+        bits, premium_mask = table.feature_bits, table.premium_mask
         for item in self.items:
             for feature in item.premium_membership_features:
-                if feature in Item.PREMIUM_FEATURES:
+                if bits.get(feature, 0) & premium_mask:
                     return True
         return False
 
 
-# Intentar cargar configuración opcional desde `config/config.json` mediante
-# el `config_manager`. Si no hay configuración o hay errores, se ignora y
-# se mantiene la configuración embebida.
-try:
-    from config_manager import load_config
-except ImportError:
-    load_config = None
+class IncrementalBuyer(Buyer):
+    """Buyer whose totals are kept up to date as items are added or removed.
+
+    Plan counts, per-plan subtotals and the number of items with premium
+    features are updated on every `add`/`remove`, so `calculate_costs`,
+    `count_membership` and `has_premium_features` no longer walk the items
+    and `total()` only touches one entry per plan. Results are the same as
+    building a `Buyer` with the current items. The same `Item` object may be
+    added several times, as in ``Buyer([item] * n)``; each `remove` takes
+    out one copy.
+    """
+
+    def __init__(self, items=(), catalog=None):
+        # { (id(item), copia): (item, cost_cents, has_premium) } en orden de alta
+        self._entries = {}
+        # { id(item): copias de ese objeto en la compra }
+        self._copies = {}
+        self._plan_counts = {}
+        self._subtotals = {}
+        self._premium_items = 0
+        self._total = None
+        self.catalog = catalog or get_catalog()
+        super().__init__(items, self.catalog)
+
+    @property
+    def items(self):
+        """Current items, in the order they were added."""
+        return [entry[0] for entry in self._entries.values()]
+
+    @items.setter
+    def items(self, items):
+        self._entries = {}
+        self._copies = {}
+        self._plan_counts = {}
+        self._subtotals = {}
+        self._premium_items = 0
+        self._total = None
+        for item in items:
+            self.add(item)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, item):
+        """Add an item and update the running totals.
+
+        Returns:
+            Item: The added item, to be passed to `remove` later.
+        """
+        copies = self._copies.get(id(item), 0)
+        cost = item.calculate_total_membership_cents(self.catalog) * item.quantity
+        has_premium = self.catalog.price_table().has_premium(item.premium_membership_features)
+        self._entries[id(item), copies] = (item, cost, has_premium)
+        self._copies[id(item)] = copies + 1
+
+        plan_name = item.plan_name
+        self._plan_counts[plan_name] = self._plan_counts.get(plan_name, 0) + item.quantity
+        if plan_name in self.catalog.price_table().plan_ids:
+            self._subtotals[plan_name] = self._subtotals.get(plan_name, 0) + cost
+        self._premium_items += has_premium
+        self._total = None
+        return item
+
+    def remove(self, item):
+        """Remove one copy of a previously added item and update the totals.
+
+        Raises:
+            ValueError: If the item is not part of the purchase.
+        """
+        copies = self._copies.get(id(item), 0)
+        if not copies:
+            raise ValueError("El item no está en la compra")
+        # Sale la última copia agregada de ese objeto
+        _item, cost, has_premium = self._entries.pop((id(item), copies - 1))
+        if copies == 1:
+            del self._copies[id(item)]
+        else:
+            self._copies[id(item)] = copies - 1
+
+        plan_name = item.plan_name
+        self._plan_counts[plan_name] -= item.quantity
+        if not self._plan_counts[plan_name]:
+            del self._plan_counts[plan_name]
+            self._subtotals.pop(plan_name, None)
+        elif plan_name in self._subtotals:
+            # Los subtotales están en céntimos: la resta es exacta
+            self._subtotals[plan_name] -= cost
+        self._premium_items -= has_premium
+        self._total = None
+
+    def count_membership(self):
+        """Return the running plan counts (see `Buyer.count_membership`)."""
+        return dict(self._plan_counts)
+
+    def _costs_cents(self):
+        """Per-plan cents with group discounts, from the running subtotals."""
+        return self._group_costs(self._subtotals, self._plan_counts,
+                                 self.catalog.price_table().plan_ids)
+
+    def has_premium_features(self):
+        """Check the running counter of items with premium features."""
+        return self._premium_items > 0
+
+    def total(self):
+        """Return the current total, as `Buyer.sum_costs(calculate_costs())`.
+
+        The value is cached until the next `add` or `remove`.
+        """
+        if self._total is None:
+            self._total = self.sum_costs(self.calculate_costs())
+        return self._total
+
+
+class Quote:
+    """Immutable result of pricing one purchase (see `Buyer.quote`).
+
+    Quotes never change after they are built, so they can be cached and
+    shared between threads.
+
+    Attributes:
+        costs: { plan_name: cost } with group discounts applied.
+        subtotal: Sum of `costs`.
+        premium_surcharge: Premium surcharge amount.
+        premium_surcharge_breakdown: { plan_name: surcharge share }, empty
+            without surcharge.
+        special_discount: Special discount amount.
+        total: Amount to pay.
+        catalog_version: Version of the catalog the purchase was priced with.
+    """
+
+    __slots__ = (
+        "costs", "subtotal", "premium_surcharge", "premium_surcharge_breakdown",
+        "special_discount", "total", "catalog_version",
+    )
+    costs: dict
+    subtotal: float
+    premium_surcharge: float
+    premium_surcharge_breakdown: dict
+    special_discount: float
+    total: float
+    catalog_version: int
+
+    def __init__(self, costs_cents, settlement, catalog_version):
+        """Build a quote from per-plan cents and a `PricingRules.settle` result."""
+        surcharge, breakdown, special, total = settlement
+        # Un Quote por compra cotizada: se asigna cada slot sin dict intermedio
+        object.__setattr__(self, "costs", FrozenDict(
+            {plan_name: value / CENTS_PER_UNIT for plan_name, value in costs_cents.items()}))
+        object.__setattr__(self, "subtotal", sum(costs_cents.values()) / CENTS_PER_UNIT)
+        object.__setattr__(self, "premium_surcharge", surcharge / CENTS_PER_UNIT)
+        object.__setattr__(self, "premium_surcharge_breakdown", FrozenDict(
+            {plan_name: share / CENTS_PER_UNIT for plan_name, share in breakdown.items()}))
+        object.__setattr__(self, "special_discount", special / CENTS_PER_UNIT)
+        object.__setattr__(self, "total", total / CENTS_PER_UNIT)
+        object.__setattr__(self, "catalog_version", catalog_version)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Quote objects are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Quote objects are immutable")
+
+    def _key(self):
+        return (tuple(self.costs.items()), self.premium_surcharge,
+                tuple(self.premium_surcharge_breakdown.items()),
+                self.special_discount, self.total, self.catalog_version)
+
+    def __eq__(self, other):
+        if not isinstance(other, Quote):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return f"Quote(total={self.total}, catalog_version={self.catalog_version})"
+
+    def to_dict(self):
+        """Return the quote as a new JSON-serializable dict."""
+        return {
+            "costs": dict(self.costs),
+            "subtotal": self.subtotal,
+            "premium_surcharge": self.premium_surcharge,
+            "premium_surcharge_breakdown": dict(self.premium_surcharge_breakdown),
+            "special_discount": self.special_discount,
+            "total": self.total,
+            "catalog_version": self.catalog_version,
+        }
+
+
+class BatchPricing:
+    """Result of pricing many baskets at once with `price_baskets`.
+
+    Attributes:
+        plans: Tuple with the plan names of the `costs` columns: the catalog
+            plans that appear in the batch, in catalog order.
+        costs: Per-plan costs (one row per basket) with group discounts applied.
+        counts: Memberships per plan (same shape as `costs`).
+        premium_surcharge: Premium surcharge amount of each basket.
+        special_discount: Special discount amount of each basket.
+        totals: Final total of each basket, as returned by `Buyer.sum_costs`.
+        catalog_version: Version of the catalog the batch was priced with.
+    """
+
+    def __init__(self, plans, costs, counts, settlement, catalog_version):
+        """Build from per-plan columns and (surcharge, discount, total) columns."""
+        self.plans = plans
+        self.costs = costs
+        self.counts = counts
+        self.premium_surcharge, self.special_discount, self.totals = settlement
+        self.catalog_version = catalog_version
+
+    def __len__(self):
+        return len(self.totals)
+
+    def basket_costs(self, index):
+        """Return the costs dict of one basket, like `Buyer.calculate_costs`.
 
-if load_config:
+        Only the plans the basket contains are included.
+        """
+        return {plan_name: float(self.costs[index][col])
+                for col, plan_name in enumerate(self.plans)
+                if self.counts[index][col] > 0}
+
+
+def _has_numpy():
+    """Check whether NumPy can be imported.
+
+    NumPy is only needed by `price_baskets`, so it is imported on first use
+    and not with the module, to keep `import models` cheap.
+    """
     try:
-        _cfg = load_config()
-        if _cfg and isinstance(_cfg, dict):
-            if 'plan' in _cfg and isinstance(_cfg['plan'], dict):
-                Item.plan = _cfg['plan']
-            if 'additional_features' in _cfg and isinstance(_cfg['additional_features'], dict):
-                Item.ADDITIONAL_FEATURES = _cfg['additional_features']
-            if 'premium_features' in _cfg and isinstance(_cfg['premium_features'], dict):
-                Item.PREMIUM_FEATURES = _cfg['premium_features']
-            # Disponibilidad opcional
-            Item.PLAN_AVAILABLE = _cfg.get('plan_available', {}) or {}
-            Item.FEATURE_AVAILABLE = _cfg.get('feature_available', {}) or {}
-    except (ValueError, TypeError, OSError):
-        # Ignorar errores de parsing o IO, seguir con la configuración embebida
-        pass
+        import numpy  # pylint: disable=import-outside-toplevel,unused-import
+    except ImportError:
+        return False
+    return True
+
+
+class _LineCodes(dict):
+    """Dict that hands out consecutive integer codes to unseen basket lines."""
+
+    def __missing__(self, key):
+        code = self[key] = len(self)
+        return code
+
+
+def _encode_baskets(baskets, catalog):
+    """Encode baskets into flat NumPy columns, one entry per item.
+
+    Every distinct ``(plan, additional, premium)`` line gets an integer code
+    and is priced only once, so the per-item work is a single dict lookup.
+
+    Returns:
+        Tuple (n_baskets, basket_index, plan_column, item_cents, item_premium,
+        plans), where `plans` are the names of the plan columns. Items of
+        unknown plans are in the extra column ``len(plans)`` and cost 0.
+    """
+    import numpy as np  # pylint: disable=import-outside-toplevel
+    if not isinstance(baskets, (list, tuple)):
+        baskets = list(baskets)
+    codes = _LineCodes()
+    item_codes = np.array(
+        [codes[(plan_name, tuple(additional), tuple(premium_features))]
+         for basket in baskets
+         for plan_name, additional, premium_features in basket],
+        dtype=np.int64,
+    )
+    n_baskets = len(baskets)
+    basket_sizes = np.fromiter(map(len, baskets), dtype=np.int64, count=n_baskets)
+    basket_index = np.repeat(np.arange(n_baskets, dtype=np.int64), basket_sizes)
+
+    table = catalog.price_table()
+    # Columnas: los planes del catálogo presentes en el lote, en orden de catálogo
+    plans = tuple(sorted({plan_name for plan_name, _additional, _premium in codes
+                          if plan_name in table.plan_ids},
+                         key=table.plan_ids.__getitem__))
+    plan_columns = {name: col for col, name in enumerate(plans)}
+    line_columns = np.empty(len(codes), dtype=np.int64)
+    # Céntimos enteros en float64, el tipo de los pesos de bincount
+    line_costs = np.empty(len(codes), dtype=np.float64)
+    line_premium = np.empty(len(codes), dtype=bool)
+    for (plan_name, additional, premium_features), code in codes.items():
+        line_columns[code] = plan_columns.get(plan_name, len(plans))
+        line_costs[code] = (table.item_cents(plan_name, additional, premium_features)
+                            if plan_name in plan_columns else 0)
+        line_premium[code] = table.has_premium(premium_features)
+    return (n_baskets, basket_index, line_columns[item_codes],
+            line_costs[item_codes], line_premium[item_codes], plans)
+
+
+def price_baskets(baskets):
+    """Price many baskets at once with NumPy array operations.
+
+    Each basket is a sequence of ``(plan_name, additional_features,
+    premium_features)`` tuples, i.e. the arguments used to build its `Item`
+    objects. Group discounts, surcharges and discounts come from the same
+    compiled pricing rules and are computed in integer cents with the same
+    rounding as `Buyer.calculate_costs` followed by `Buyer.sum_costs` (see
+    `cents.py`), so totals are identical to the per-basket path.
+
+    If NumPy is not installed every basket is priced through `Buyer` and the
+    result columns are plain lists.
+
+    Args:
+        baskets: Iterable of baskets.
+
+    Returns:
+        BatchPricing: Per-plan costs, surcharges, discounts and totals.
+    """
+    catalog = get_catalog()
+    if not _has_numpy():
+        return _price_baskets_with_buyer(baskets, catalog)
+    return _price_baskets_with_numpy(baskets, catalog)
+
+
+def _price_baskets_with_numpy(baskets, catalog):
+    """Vectorized implementation of `price_baskets`."""
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    n_baskets, basket_index, plan_column, item_cents, item_premium, plans = (
+        _encode_baskets(baskets, catalog)
+    )
+    width = len(plans) + 1
+
+    # Agrupar por (cesta, plan). La última columna, la de los planes
+    # desconocidos, cuesta 0 y se descarta al final. Los pesos de bincount
+    # son float64: exactos para sumas < 2**53 céntimos
+    cells = basket_index * width + plan_column
+    size = n_baskets * width
+    subtotals = np.bincount(cells, weights=item_cents, minlength=size).astype(
+        np.int64).reshape(n_baskets, width)
+    counts = np.bincount(cells, minlength=size).reshape(n_baskets, width)
+
+    # Reglas de precios del catálogo: todas las celdas en una pasada
+    rules = catalog.pricing_rules
+    costs = subtotals - rules.quantity_discount_matrix((*plans, None), counts, subtotals)
+
+    has_premium = np.bincount(basket_index, weights=item_premium,
+                              minlength=n_baskets) > 0
+    # (recargo, descuento, total) pasan a unidades en una sola división
+    settlement = np.stack(rules.adjust_array(costs.sum(axis=1), has_premium))
+    return BatchPricing(plans, costs[:, :-1] / cents.CENTS_PER_UNIT, counts[:, :-1],
+                        settlement / cents.CENTS_PER_UNIT, catalog.version)
+
+
+def _price_baskets_with_buyer(baskets, catalog):
+    """Fallback for `price_baskets` when NumPy is not available."""
+    basket_costs = []
+    basket_counts = []
+    premium_surcharge = []
+    special_discount = []
+    totals = []
+    for basket in baskets:
+        buyer = Buyer([Item(plan_name, list(additional), list(premium_features))
+                       for plan_name, additional, premium_features in basket],
+                      catalog)
+        costs = buyer.calculate_costs()
+        totals.append(buyer.sum_costs(costs))
+        basket_costs.append(costs)
+        basket_counts.append(buyer.count_membership())
+        premium_surcharge.append(buyer.premium_surcharge_amount)
+        special_discount.append(buyer.special_discount_amount)
+    plan_ids = catalog.price_table().plan_ids
+    plans = tuple(sorted({plan_name for costs in basket_costs for plan_name in costs},
+                         key=plan_ids.__getitem__))
+    return BatchPricing(
+        plans,
+        [[costs.get(plan_name, 0.0) for plan_name in plans] for costs in basket_costs],
+        [[counts.get(plan_name, 0) for plan_name in plans] for counts in basket_counts],
+        (premium_surcharge, special_discount, totals), catalog.version)
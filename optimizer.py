@@ -0,0 +1,363 @@
+"""Cheapest basket of memberships that gives a group a set of features.
+
+`cheapest_basket(4, ["Personal Training"])` answers the question sales
+staff keep asking: which plans and features give every member of a family
+or group the required features for the least money, under the group
+discounts, premium surcharge and special discounts of the pricing rules of
+the catalog. The basket found is priced by `Buyer`, so its quote is exactly
+what the purchase costs.
+
+Every member takes one available plan and every required feature. With
+`extras` (the default) members may also get other available features when
+that lowers the total, e.g. $15 of "Access to Pool" to cross the $200
+special discount threshold and save $20.
+
+Search:
+
+- Members are interchangeable, so a basket is how many members take each
+  plan plus the extras of those members. The total only depends on the
+  sum S of the per-plan costs (group discount applied) and on whether the
+  basket has premium features (`PricingRules.adjust`).
+- Dynamic programming over the plans keeps, per (members, premium), the
+  set of reachable sums S as a bitset (a Python int): adding k members of
+  a plan with some extras is a shift by its cost.
+- The extras that k members can add are memoized per k, as the k-fold
+  sum of the subset sums of one member's extras.
+- Pruning: the best single-plan basket bounds the total from above, and
+  `PricingRules.total_floor` turns that bound into the largest sum S that
+  could still beat it; larger sums, extras and options are never built.
+- Results are memoized per catalog snapshot.
+
+Uso:
+    basket = cheapest_basket(4, ["Personal Training", "Access to Pool"])
+    basket.items, basket.quote.total
+"""
+import threading
+from collections import Counter
+
+from catalog import PREMIUM, get_catalog
+from cents import BASIS_POINTS
+from models import Buyer, Item
+
+MAX_CACHED_RESULTS = 4096
+
+
+class CheapestBasket:  # pylint: disable=too-few-public-methods
+    """Result of `cheapest_basket`.
+
+    Attributes:
+        members: Number of members of the group.
+        features: Required features, as canonical names in catalog order.
+        items: `Item` lines of the basket, one per distinct membership, with
+            `quantity` members each; plans in catalog order.
+        quote: `Quote` of `items`, priced by `Buyer`.
+    """
+
+    def __init__(self, members, features, items, quote):
+        self.members = members
+        self.features = features
+        self.items = items
+        self.quote = quote
+
+    def to_dict(self):
+        """Return the basket as a new JSON-serializable dict."""
+        result = {
+            "members": self.members,
+            "features": list(self.features),
+            "items": [{"plan": item.plan_name,
+                       "additional_features": list(item.additional_features),
+                       "premium_features": list(item.premium_membership_features),
+                       "quantity": item.quantity}
+                      for item in self.items],
+        }
+        result.update(self.quote.to_dict())
+        return result
+
+
+def _set_bits(bits):
+    """Yield the positions of the set bits of `bits`, lowest first."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def _previous_flags(has_premium, option_premium):
+    """Premium flags a state may come from to end with `has_premium`."""
+    if not option_premium:
+        return (has_premium,)
+    return (False, True) if has_premium else ()
+
+
+class _Extras:
+    """Extras one member can take and, memoized per k, the sums of k members."""
+
+    def __init__(self, member_extras, budget):
+        # {(céntimos, premium): nombres}, el primero sin extras
+        self.member_extras = member_extras
+        # Solo se guardan sumas de hasta `budget` céntimos
+        self._mask = (1 << budget + 1) - 1
+        # k -> {premium: bitset de céntimos de extras alcanzables por k miembros}
+        self._sums = [{False: 1, True: 0}]
+
+    def sums(self, count):
+        """{premium: bitset} of the extras `count` members can add."""
+        while len(self._sums) <= count:
+            previous = self._sums[-1]
+            current = {False: 0, True: 0}
+            for extra, extra_premium in self.member_extras:
+                for has_premium, bits in previous.items():
+                    current[has_premium or extra_premium] |= bits << extra
+            self._sums.append({flag: bits & self._mask
+                               for flag, bits in current.items()})
+        return self._sums[count]
+
+    def split(self, count, extra, has_premium):
+        """Feature names of `count` members whose extras add up to `extra`."""
+        names = []
+        for remaining in range(count, 0, -1):
+            previous_bits = self.sums(remaining - 1)
+            for (member_extra, member_premium), member_names in self.member_extras.items():
+                if member_extra > extra:
+                    continue
+                previous = next((flag for flag in _previous_flags(has_premium, member_premium)
+                                 if previous_bits[flag] >> extra - member_extra & 1), None)
+                if previous is not None:
+                    names.append(member_names)
+                    extra -= member_extra
+                    has_premium = previous
+                    break
+        return names
+
+
+def _find_step(states, state, count, count_options):
+    """(excess, extra premium, extra, previous premium) of `count` members, or None."""
+    used, has_premium, excess = state
+    if count > used:
+        return None
+    for option_excess, extra_premium, extra in count_options:
+        if option_excess > excess:
+            break
+        for previous in _previous_flags(has_premium, extra_premium):
+            if states.get((used - count, previous), 0) >> excess - option_excess & 1:
+                return option_excess, extra_premium, extra, previous
+    return None
+
+
+def _backtrack(layers, state, extras_sums):
+    """Rebuild the (plan, extras of one member) lines of a reachable final state."""
+    lines = []
+    used, has_premium, excess = state
+    for plan_name, states, options in reversed(layers):
+        if states.get((used, has_premium), 0) >> excess & 1:
+            continue
+        for count, count_options in options.items():
+            step = _find_step(states, (used, has_premium, excess), count, count_options)
+            if step is not None:
+                break
+        else:
+            raise AssertionError("Suma inalcanzable")
+        excess -= step[0]
+        lines.extend((plan_name, names) for names in
+                     extras_sums.split(count, step[2], step[1]))
+        used -= count
+        has_premium = step[3]
+    return lines[::-1]
+
+
+class BasketOptimizer:  # pylint: disable=too-few-public-methods
+    """Cheapest-basket search over one catalog snapshot.
+
+    Attributes:
+        catalog: Catalog snapshot whose plans, features and rules are used.
+        plans: Available plans, in catalog order.
+        features: Available features, in catalog order.
+    """
+
+    def __init__(self, catalog=None):
+        self.catalog = catalog or get_catalog()
+        self.plan_cents, self.feature_cents = self.catalog.cent_prices()
+        index = self.catalog.feature_index()
+        self.plans = [name for name in self.catalog.plans
+                      if self.catalog.plan_available.get(name, True)]
+        self.features = [name for name, _kind, _cost in index.values()
+                         if self.catalog.feature_available.get(name, True)]
+        self._premium = frozenset(name for name, kind, _cost in index.values()
+                                  if kind == PREMIUM)
+        self._results = {}
+
+    def cheapest(self, members, features=(), extras=True):
+        """Return the cheapest basket giving `members` members all `features`.
+
+        Args:
+            members: Number of memberships to buy.
+            features: Features every member needs (case-insensitive names).
+            extras: Allow other features when they lower the total.
+
+        Returns:
+            CheapestBasket: The basket and its quote.
+
+        Raises:
+            ValueError: If `members` is not a positive integer, a feature
+                does not exist or is not available, or no plan is available.
+        """
+        if isinstance(members, bool) or not isinstance(members, int) or members < 1:
+            raise ValueError(f"El número de miembros '{members}' no es válido")
+        if not self.plans:
+            raise ValueError("No hay planes disponibles")
+        required = self._resolve(features)
+        key = (members, required, bool(extras))
+        result = self._results.get(key)
+        if result is None:
+            result = self._search(members, required, bool(extras))
+            if len(self._results) < MAX_CACHED_RESULTS:
+                self._results[key] = result
+        return result
+
+    def _resolve(self, features):
+        """Canonical names of `features`, without repetitions, in catalog order."""
+        index = self.catalog.feature_index()
+        available = set(self.features)
+        required = set()
+        for feature in features:
+            entry = index.get(str(feature).strip().lower())
+            if entry is None:
+                raise ValueError(f"La característica '{feature}' no existe")
+            if entry[0] not in available:
+                raise ValueError(f"La característica '{entry[0]}' no está disponible")
+            required.add(entry[0])
+        return tuple(name for name in self.features if name in required)
+
+    def _max_sum(self, best, limit, has_premium):
+        """Largest sum S <= `limit` whose total floor does not exceed `best`."""
+        low, high = 0, limit
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.catalog.pricing_rules.total_floor(middle, has_premium) <= best:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    def _search(self, members, required, extras):
+        rules = self.catalog.pricing_rules
+        required_premium = any(name in self._premium for name in required)
+        required_cents = sum(self.feature_cents[name] for name in required)
+        plan_base = {name: self.plan_cents[name] + required_cents for name in self.plans}
+        optional = [name for name in self.features if name not in required] if extras else []
+
+        def cost(plan_name, count, extra):
+            subtotal = count * plan_base[plan_name] + extra
+            return subtotal - rules.quantity_discount(plan_name, count, subtotal)
+
+        # Cota superior: todos los miembros en el mismo plan, sin extras
+        best = min(rules.adjust(cost(name, members, 0), required_premium)[2]
+                   for name in self.plans)
+        limit = members * (max(plan_base.values())
+                           + sum(self.feature_cents[name] for name in optional))
+        max_sum = self._max_sum(best, limit, required_premium)
+        # Ningún grupo de k miembros cuesta menos de k * unit céntimos; las
+        # sumas se guardan como exceso sobre members * unit
+        unit = min(cost(name, count, 0) // count
+                   for name in self.plans for count in range(1, members + 1))
+        width = max_sum - members * unit
+        mask = (1 << width + 1) - 1
+
+        # Unos extras X suben el costo de un plan al menos X * (1 - descuento) - 1
+        max_bp = min(round(rules.max_group_percent * BASIS_POINTS / 100), BASIS_POINTS - 1)
+        budget = (width + 1) * BASIS_POINTS // (BASIS_POINTS - max_bp) + 1
+        extras_sums = _Extras(self._member_extras(optional, budget), budget)
+
+        # Programación dinámica sobre los planes: (miembros, premium) -> sumas
+        states = {(0, required_premium): 1}
+        layers = []
+        for plan_name in self.plans:
+            options = {}
+            for count in range(1, members + 1):
+                if cost(plan_name, count, 0) - count * unit > width:
+                    continue
+                found = {}
+                for has_premium, bits in extras_sums.sums(count).items():
+                    for extra in _set_bits(bits):
+                        excess = cost(plan_name, count, extra) - count * unit
+                        if excess > width:
+                            break
+                        found.setdefault((excess, has_premium), extra)
+                options[count] = sorted((excess, has_premium, extra)
+                                        for (excess, has_premium), extra in found.items())
+            following = dict(states)
+            for (used, has_premium), bits in states.items():
+                for count, count_options in options.items():
+                    if used + count > members:
+                        continue
+                    for excess, extra_premium, _extra in count_options:
+                        key = (used + count, has_premium or extra_premium)
+                        following[key] = following.get(key, 0) | (bits << excess) & mask
+            layers.append((plan_name, states, options))
+            states = following
+
+        _total, subtotal, has_premium = min(self._finals(states, members, unit, best))
+        lines = _backtrack(layers, (members, has_premium, subtotal - members * unit),
+                           extras_sums)
+        items = self._build_items(lines, required)
+        quote = Buyer(items, self.catalog).quote()
+        return CheapestBasket(members, required, items, quote)
+
+    def _member_extras(self, optional, budget):
+        """{(cents, premium): feature names} of the extras one member can take."""
+        member_extras = {(0, False): ()}
+        for name in optional:
+            price = self.feature_cents[name]
+            premium = name in self._premium
+            for (extra, has_premium), names in list(member_extras.items()):
+                key = (extra + price, has_premium or premium)
+                if key[0] <= budget and key not in member_extras:
+                    member_extras[key] = names + (name,)
+        return member_extras
+
+    def _finals(self, states, members, unit, best):
+        """Yield (total, sum, premium) of the reachable sums that may beat `best`."""
+        rules = self.catalog.pricing_rules
+        for has_premium in (False, True):
+            for excess in _set_bits(states.get((members, has_premium), 0)):
+                subtotal = excess + members * unit
+                if rules.total_floor(subtotal, has_premium) > best:
+                    break
+                yield rules.adjust(subtotal, has_premium)[2], subtotal, has_premium
+
+    def _build_items(self, lines, required):
+        """One `Item` per distinct (plan, features) line, with its quantity."""
+        items = []
+        for (plan_name, extra_names), quantity in Counter(lines).items():
+            chosen = set(required) | set(extra_names)
+            names = [name for name in self.features if name in chosen]
+            items.append(Item(plan_name,
+                              [name for name in names if name not in self._premium],
+                              [name for name in names if name in self._premium],
+                              quantity))
+        return items
+
+
+_optimizers = {}
+_optimizers_lock = threading.Lock()
+
+
+def get_optimizer(catalog=None):
+    """Return the `BasketOptimizer` of `catalog` (default: current snapshot).
+
+    The optimizer, and with it its memoized results, is reused while the
+    snapshot is current.
+    """
+    catalog = catalog or get_catalog()
+    with _optimizers_lock:
+        optimizer = _optimizers.get(catalog)
+        if optimizer is None:
+            # Otra versión del catálogo: los resultados anteriores ya no valen
+            _optimizers.clear()
+            optimizer = _optimizers[catalog] = BasketOptimizer(catalog)
+        return optimizer
+
+
+def cheapest_basket(members, features=(), extras=True, catalog=None):
+    """Return the cheapest `CheapestBasket` for `members` members (see module doc)."""
+    return get_optimizer(catalog).cheapest(members, features, extras)
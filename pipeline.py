@@ -0,0 +1,157 @@
+"""Streaming JSONL quote pipeline for non-interactive bulk pricing.
+
+Each input line is one membership of an order::
+
+    {"buyer": "C-1", "plan": "Premium",
+     "additional_features": ["Personal Training"], "premium_features": []}
+
+An optional `quantity` (default 1) turns the line into that many identical
+memberships. Consecutive lines with the same `buyer` form one purchase; a
+line without `buyer` is a purchase of its own. Every purchase is priced
+through `Item`/`Buyer` and written as one JSONL result line. All the stages
+are generators, so only the purchase being priced is held in memory.
+"""
+import json
+import sys
+from contextlib import contextmanager
+from itertools import groupby
+
+from models import Item
+from quote_cache import DEFAULT_MAXSIZE, QuoteCache, price_items
+from utils import validar_plan, classify_features
+
+
+def read_orders(lines):
+    """Parse JSONL order lines, skipping blank lines.
+
+    Args:
+        lines: Iterable of text lines.
+
+    Yields:
+        dict: One order line.
+
+    Raises:
+        ValueError: If a line is not a JSON object.
+    """
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            order = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Línea {line_number}: JSON inválido ({e.msg})") from e
+        if not isinstance(order, dict):
+            raise ValueError(f"Línea {line_number}: se esperaba un objeto JSON")
+        yield order
+
+
+def group_by_buyer(orders):
+    """Group consecutive order lines by their `buyer` key.
+
+    Lines without `buyer` are never grouped: each one is its own purchase.
+
+    Yields:
+        tuple: (buyer_id, list of order lines of that buyer).
+    """
+    for buyer_id, group in groupby(orders, key=lambda order: order.get("buyer")):
+        if buyer_id is None:
+            for order in group:
+                yield None, [order]
+        else:
+            yield buyer_id, list(group)
+
+
+def build_item(order):
+    """Build a validated `Item` from one order line.
+
+    Returns:
+        tuple: (Item, invalid_features)
+
+    Raises:
+        ValueError: If the plan or the quantity is not valid.
+    """
+    plan_name = validar_plan(order.get("plan") or "")
+    if not plan_name:
+        raise ValueError(f"El plan '{order.get('plan')}' no es válido")
+    # Cada feature se clasifica según el catálogo, no según la lista de origen
+    normal, premium, invalid = classify_features(
+        list(order.get("additional_features") or [])
+        + list(order.get("premium_features") or []))
+    return Item(plan_name, normal, premium, order.get("quantity", 1)), invalid
+
+
+def price_purchase(buyer_id, orders, cache=None):
+    """Price the order lines of one buyer through `Buyer`.
+
+    Args:
+        buyer_id: Buyer identifier copied to the result.
+        orders: Order lines of the buyer.
+        cache: Optional `QuoteCache` to reuse quotes of repeated baskets.
+
+    Returns:
+        dict: Priced result, or a dict with an `error` key if the purchase
+        could not be priced.
+    """
+    items = []
+    invalid_features = []
+    try:
+        for order in orders:
+            item, invalid = build_item(order)
+            items.append(item)
+            invalid_features.extend(invalid)
+    except ValueError as e:
+        return {"buyer": buyer_id, "error": str(e)}
+
+    quote = cache.quote(items) if cache is not None else price_items(items)
+    result = {"buyer": buyer_id, "items": sum(item.quantity for item in items)}
+    result.update(quote.to_dict())
+    if invalid_features:
+        result["invalid_features"] = invalid_features
+    return result
+
+
+def quote_stream(lines, cache=None):
+    """Price a stream of JSONL order lines.
+
+    Yields:
+        dict: One priced result per buyer, in input order.
+    """
+    for buyer_id, orders in group_by_buyer(read_orders(lines)):
+        yield price_purchase(buyer_id, orders, cache)
+
+
+def write_jsonl(records, output):
+    """Write records as JSONL to a text stream.
+
+    Returns:
+        int: Number of records written.
+    """
+    count = 0
+    for record in records:
+        output.write(json.dumps(record, ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+
+@contextmanager
+def open_text(path, mode="r"):
+    """Open a UTF-8 text file, or stdin/stdout when `path` is "-"."""
+    if path == "-":
+        yield sys.stdin if "r" in mode else sys.stdout
+        return
+    with open(path, mode, encoding="utf-8") as stream:
+        yield stream
+
+
+def run_quote(input_path="-", output_path="-", cache_size=DEFAULT_MAXSIZE):
+    """Price the orders in `input_path` and write results to `output_path`.
+
+    A path of "-" means stdin/stdout. Repeated baskets are priced once
+    thanks to a `QuoteCache` of `cache_size` entries (0 disables it).
+
+    Returns:
+        int: Number of purchases written.
+    """
+    cache = QuoteCache(cache_size) if cache_size > 0 else None
+    with open_text(input_path) as source, open_text(output_path, "w") as target:
+        return write_jsonl(quote_stream(source, cache), target)
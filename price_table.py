@@ -0,0 +1,163 @@
+"""Catalog compiled to plan IDs, feature bitmasks and a precomputed price table.
+
+Every plan gets an integer ID and every feature one bit, so the features of
+an item are a bitmask. For a catalog of up to `MAX_TABLE_FEATURES` features
+the cost in cents of every plan x feature-subset combination is computed
+once into an `array('q')` (8 bytes per entry, at most `MAX_TABLE_ENTRIES`
+entries counting the unknown-plan row), and the cost of an item is one
+index into that table:
+
+    table[(plan_id << n_features) | feature_mask]
+
+Unknown plans use an extra row of cost 0. Items with unknown or repeated
+features, and every item of a catalog with too many features or plans for
+the table, are priced
+by adding the feature prices one by one, as before.
+
+Items keep their features as lists of names, and in CPython turning one or
+two names into a bitmask costs about as much as adding their prices. So
+`item_cents` first looks the line (plan, features as given) up in a dict of
+lines already seen, which holds their table entry: the bitmask is built
+once per distinct line. Only lines of known, distinct names are kept, up to
+`MAX_CACHED_LINES`.
+
+`has_premium` is a bitmask AND with the premium features of the catalog.
+The table is built per catalog snapshot (see `Catalog.price_table`).
+"""
+from array import array
+
+# (4 planes + desconocido) x 2**12 combinaciones = 20.480 entradas
+MAX_TABLE_FEATURES = 12
+# 512 KB: 2.000 planes x 12 features ya no caben y se suman una a una
+MAX_TABLE_ENTRIES = 65_536
+MAX_CACHED_LINES = 65_536
+
+
+class PriceTable:
+    """Compiled, immutable price lookup of one catalog snapshot.
+
+    Attributes:
+        plan_ids: { plan_name: id }
+        plan_names: Plan names by ID.
+        feature_bits: { feature_name: bit }
+        feature_names: Feature names by bit position.
+        premium_mask: Bits of the premium features.
+        has_table: Whether the full price table was built (at most
+            `max_table_features` features and `MAX_TABLE_ENTRIES` entries).
+    """
+
+    __slots__ = ("plan_ids", "plan_names", "feature_bits", "feature_names",
+                 "premium_mask", "has_table",
+                 "_plan_cents", "_feature_cents", "_table", "_width", "_unknown_plan",
+                 "_lines")
+    plan_ids: dict
+    plan_names: tuple
+    feature_bits: dict
+    feature_names: tuple
+    premium_mask: int
+    has_table: bool
+    _plan_cents: dict
+    _feature_cents: dict
+    _table: array
+    _width: int
+    _unknown_plan: int
+    _lines: dict
+
+    def __init__(self, plan_cents, feature_cents, premium_features,
+                 max_table_features=MAX_TABLE_FEATURES):
+        """Compile prices in cents ({name: cents}) and the premium feature names."""
+        bits = {name: 1 << position for position, name in enumerate(feature_cents)}
+        table = None
+        if (len(bits) <= max_table_features
+                and (len(plan_cents) + 1) << len(bits) <= MAX_TABLE_ENTRIES):
+            # Suma de cada subconjunto a partir del subconjunto sin su bit más bajo
+            costs = list(feature_cents.values())
+            sums = array("q", [0]) * (1 << len(bits))
+            for mask in range(1, len(sums)):
+                low = mask & -mask
+                sums[mask] = sums[mask ^ low] + costs[low.bit_length() - 1]
+            # La última fila es la de los planes desconocidos (costo 0)
+            table = array("q")
+            for plan in (*plan_cents.values(), 0):
+                table.extend(plan + subset for subset in sums)
+        values = {
+            "plan_ids": {name: plan_id for plan_id, name in enumerate(plan_cents)},
+            "plan_names": tuple(plan_cents),
+            "feature_bits": bits,
+            "feature_names": tuple(feature_cents),
+            "premium_mask": sum(bits[name] for name in premium_features if name in bits),
+            "has_table": table is not None,
+            "_plan_cents": plan_cents,
+            "_feature_cents": feature_cents,
+            "_table": table,
+            "_width": len(bits),
+            "_unknown_plan": len(plan_cents),
+            # (plan, features adicionales, premium) -> céntimos; se llena al usarse
+            "_lines": {},
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PriceTable objects are immutable")
+
+    def feature_mask(self, names):
+        """Bitmask of the catalog features in `names`; unknown names are ignored."""
+        bits = self.feature_bits
+        mask = 0
+        for name in names:
+            mask |= bits.get(name, 0)
+        return mask
+
+    def item_cents(self, plan_name, additional_features, premium_features):
+        """Cost in cents of one membership of a plan with the given features."""
+        line = (plan_name, tuple(additional_features), tuple(premium_features))
+        cost = self._lines.get(line)
+        if cost is None:
+            cost = self._line_cents(*line)
+        return cost
+
+    def _line_cents(self, plan_name, additional_features, premium_features):
+        """Price a line not seen before, remembering it if it is clean."""
+        mask = self.feature_mask(additional_features) | self.feature_mask(premium_features)
+        clean = (plan_name in self.plan_ids and mask.bit_count()
+                 == len(additional_features) + len(premium_features))
+        if clean and self._table is not None:
+            cost = self._table[(self.plan_ids[plan_name] << self._width) | mask]
+        else:
+            # Features repetidas o desconocidas, o catálogo sin tabla: suma una a una
+            feature_cents = self._feature_cents
+            cost = self._plan_cents.get(plan_name, 0)
+            for name in additional_features + premium_features:
+                cost += feature_cents.get(name, 0)
+        if clean and len(self._lines) < MAX_CACHED_LINES:
+            # Una carrera entre hilos solo guarda dos veces el mismo valor
+            self._lines[(plan_name, additional_features, premium_features)] = cost
+        return cost
+
+    def mask_cents(self, plan_id, mask):
+        """Cost in cents of a plan ID with the features of `mask`."""
+        if self._table is not None:
+            return self._table[(plan_id << self._width) | mask]
+        cost = self._plan_cents[self.plan_names[plan_id]] if plan_id < self._unknown_plan else 0
+        for name, bit in self.feature_bits.items():
+            if mask & bit:
+                cost += self._feature_cents[name]
+        return cost
+
+    def mask_cents_array(self, plan_ids, masks):
+        """`mask_cents` over NumPy arrays of plan IDs and masks (int64 cents)."""
+        import numpy as np  # pylint: disable=import-outside-toplevel
+        plan_ids = plan_ids.astype(np.int64)
+        masks = masks.astype(np.int64)
+        if self._table is not None:
+            return np.frombuffer(self._table, dtype=np.int64)[(plan_ids << self._width) | masks]
+        plan_costs = np.asarray([*self._plan_cents.values(), 0], dtype=np.int64)
+        cost = plan_costs[plan_ids]
+        for name, bit in self.feature_bits.items():
+            cost += ((masks & bit) != 0) * self._feature_cents[name]
+        return cost
+
+    def has_premium(self, premium_features):
+        """Whether any of `premium_features` is a premium feature of the catalog."""
+        return bool(self.feature_mask(premium_features) & self.premium_mask)
@@ -0,0 +1,364 @@
+"""Data-driven discount and surcharge rules, compiled per catalog version.
+
+The rules are declared in the `pricing_rules` list of `config/config.json`:
+
+    "pricing_rules": [
+        {"type": "quantity_discount", "name": "group_discount",
+         "breaks": [{"min_quantity": 2, "percent": 10}],
+         "plans": {"Family": [{"min_quantity": 3, "percent": 15}]}},
+        {"type": "percentage", "name": "premium_surcharge",
+         "effect": "surcharge", "when": "premium", "percent": 15},
+        {"type": "tiered", "name": "special_discount", "effect": "discount",
+         "tiers": [{"above": 200, "amount": 20}, {"above": 400, "amount": 50}]},
+        {"type": "fixed", "name": "welcome", "effect": "discount", "amount": 5}
+    ]
+
+- `quantity_discount` (at most one) discounts each plan subtotal by the
+  percent of the highest break its quantity reaches; `plans` overrides the
+  breaks of single plans. It is always applied first, per plan.
+- The other rules run in order over the running total of the purchase:
+  `percentage` adds or subtracts a percent of it, `fixed` a fixed amount and
+  `tiered` the percent or amount of the highest tier whose `above` the
+  total exceeds.
+- `effect` is "surcharge" (added) or "discount" (subtracted, never below
+  zero); `when` is "always" (default) or "premium", for purchases with
+  premium features.
+
+Surcharges add up to the premium surcharge of a quote and are split across
+plans by largest remainder; discounts add up to its special discount.
+
+`compile_rules` turns the list into an immutable `PricingRules` evaluator:
+percents become basis points, amounts become cents and breaks and tiers
+become sorted threshold tuples searched with `bisect`, so the cost of a
+lookup grows with the logarithm of the number of tiers.
+"""
+from bisect import bisect_left, bisect_right
+
+from cents import BASIS_POINTS, apply_rate, apportion, to_cents
+
+SURCHARGE = "surcharge"
+DISCOUNT = "discount"
+# Tipos de regla que actúan sobre el total, en el orden en que se declaran
+PERCENTAGE = "percentage"
+FIXED = "fixed"
+TIERED = "tiered"
+QUANTITY_DISCOUNT = "quantity_discount"
+
+
+def _number(rule, key, minimum=0):
+    value = rule.get(key)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < minimum:
+        raise ValueError(f"Regla '{rule.get('name', rule.get('type'))}': "
+                         f"'{key}' debe ser un número >= {minimum}")
+    return value
+
+
+def _percent_bp(rule, key="percent"):
+    return round(_number(rule, key) * BASIS_POINTS / 100)
+
+
+def _value(rule):
+    """(basis points, cents) of an entry with either `percent` or `amount`."""
+    if ("percent" in rule) == ("amount" in rule):
+        raise ValueError(f"Regla '{rule.get('name', rule.get('type'))}': "
+                         "indique 'percent' o 'amount'")
+    if "percent" in rule:
+        return _percent_bp(rule), 0
+    return 0, to_cents(_number(rule, "amount"))
+
+
+def _sorted_thresholds(entries, key, rule, integer=False):
+    """Sort `entries` by `key`; returns (thresholds, values) tuples.
+
+    Quantity thresholds (`integer`) are kept as they are and their values
+    are basis points; money thresholds become cents and their values
+    (basis points, cents) pairs.
+    """
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"Regla '{rule.get('name', rule.get('type'))}': "
+                         "necesita una lista no vacía de tramos")
+    pairs = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            raise ValueError(f"Regla '{rule.get('name', rule.get('type'))}': tramo inválido")
+        threshold = _number(entry, key, minimum=1 if integer else 0)
+        if integer and threshold != int(threshold):
+            raise ValueError(f"Regla '{rule.get('name', rule.get('type'))}': "
+                             f"'{key}' debe ser un entero")
+        if integer:
+            pairs.append((int(threshold), _percent_bp(entry)))
+        else:
+            pairs.append((to_cents(threshold), _value(entry)))
+    pairs.sort(key=lambda pair: pair[0])
+    thresholds = tuple(threshold for threshold, _value_ in pairs)
+    if len(set(thresholds)) != len(thresholds):
+        raise ValueError(f"Regla '{rule.get('name', rule.get('type'))}': tramos repetidos")
+    return thresholds, tuple(value for _threshold, value in pairs)
+
+
+class PricingRules:
+    """Compiled, immutable evaluator of a `pricing_rules` list.
+
+    Attributes:
+        max_group_percent: Highest quantity-discount percent of any plan.
+    """
+
+    __slots__ = ("_default_breaks", "_plan_breaks", "_steps", "max_group_percent")
+    _default_breaks: tuple
+    _plan_breaks: dict
+    _steps: tuple
+    max_group_percent: float
+
+    def __init__(self, default_breaks, plan_breaks, steps):
+        values = {
+            "_default_breaks": default_breaks,
+            "_plan_breaks": plan_breaks,
+            "_steps": steps,
+            "max_group_percent": max(
+                (bp for _minimums, rates in (default_breaks, *plan_breaks.values())
+                 for bp in rates), default=0) * 100 / BASIS_POINTS,
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PricingRules objects are immutable")
+
+    def _breaks(self, plan_name):
+        return self._plan_breaks.get(plan_name, self._default_breaks)
+
+    def quantity_break(self, plan_name, quantity):
+        """Basis points of the quantity break `quantity` reaches, or 0."""
+        minimums, values = self._breaks(plan_name)
+        index = bisect_right(minimums, quantity) - 1
+        return values[index] if index >= 0 else 0
+
+    def quantity_breaks(self):
+        """Return (default breaks, {plan_name: breaks}) as (minimums, basis points)."""
+        return self._default_breaks, dict(self._plan_breaks)
+
+    def step_labels(self, premium_only):
+        """Short labels of the total-level rules, e.g. "15% surcharge".
+
+        Only the rules for premium purchases (`premium_only` True) or those
+        that always apply (False) are described, in declaration order.
+        """
+        labels = []
+        for effect, premium, kind, data in self._steps:
+            if premium != premium_only:
+                continue
+            if kind == TIERED:
+                tiers = ", ".join(f"{_rate_label(*value)} above {_money_label(threshold)}"
+                                  for threshold, value in zip(*data))
+                labels.append(f"{effect} of {tiers}")
+            else:
+                labels.append(f"{_rate_label(*data)} {effect}")
+        return labels
+
+    def quantity_discount(self, plan_name, quantity, cost_cents):
+        """Group discount in cents of a plan bought `quantity` times."""
+        # `quantity_break` sin sus llamadas intermedias: va una vez por plan de cada compra
+        minimums, values = self._plan_breaks.get(plan_name, self._default_breaks)
+        index = bisect_right(minimums, quantity) - 1
+        return apply_rate(cost_cents, values[index]) if index >= 0 and values[index] else 0
+
+    def settle(self, costs_cents, has_premium):
+        """Run the total-level rules over per-plan costs in cents.
+
+        Returns:
+            tuple: (surcharge, {plan_name: surcharge share}, discount, total),
+            all in cents; the shares are empty without surcharge.
+        """
+        subtotal = sum(costs_cents.values())
+        surcharge, discount, total = self.adjust(subtotal, has_premium)
+        breakdown = apportion(surcharge, costs_cents) if surcharge and subtotal > 0 else {}
+        return surcharge, breakdown, discount, total
+
+    # Pasos de `adjust` separados para que `metrics.py` mida cada uno
+
+    def _surcharge(self, total, rate_bp, amount):
+        """Cents one surcharge rule adds to the running `total`."""
+        return amount + apply_rate(total, rate_bp) if rate_bp else amount
+
+    def _discount(self, total, rate_bp, amount):
+        """Cents one discount rule takes from the running `total`, at most all of it."""
+        return min(amount + apply_rate(total, rate_bp) if rate_bp else amount, total)
+
+    def adjust(self, total, has_premium, effects=(SURCHARGE, DISCOUNT)):
+        """Apply the total-level rules with one of `effects` to `total` cents.
+
+        Returns:
+            tuple: (surcharge, discount, total) in cents.
+        """
+        surcharge = discount = 0
+        for effect, premium_only, kind, data in self._steps:
+            if (premium_only and not has_premium) or effect not in effects:
+                continue
+            if kind == TIERED:
+                index = bisect_left(data[0], total) - 1
+                if index < 0:
+                    continue
+                rate_bp, amount = data[1][index]
+            else:
+                rate_bp, amount = data
+            if effect == SURCHARGE:
+                amount = self._surcharge(total, rate_bp, amount)
+                surcharge += amount
+                total += amount
+            else:
+                amount = self._discount(total, rate_bp, amount)
+                discount += amount
+                total -= amount
+        return surcharge, discount, total
+
+    def total_floor(self, subtotal, has_premium=False):
+        """Lower bound of `adjust(s, has_premium)` totals for every s >= `subtotal`.
+
+        Percentage and fixed surcharges are added with their rate rounded
+        down and tiered ones are left out. A tiered discount is bounded by
+        its value at the running total and just above every higher tier,
+        where the discount jumps. The bound never decreases with
+        `subtotal`, so it can prune searches (see `optimizer.py`).
+        """
+        total = subtotal
+        for effect, premium_only, kind, data in self._steps:
+            if effect == SURCHARGE:
+                if kind != TIERED and (has_premium or not premium_only):
+                    # apply_rate redondea hacia arriba: floor es una cota inferior
+                    total += total * data[0] // BASIS_POINTS + data[1]
+            elif kind == TIERED:
+                thresholds, values = data
+                start = bisect_left(thresholds, total)
+                candidates = [(total, values[start - 1] if start else (0, 0))]
+                # Justo por encima de cada tramo superior
+                candidates.extend((threshold + 1, value) for threshold, value in
+                                  zip(thresholds[start:], values[start:]))
+                total = min(_discounted_floor(value, *rate) for value, rate in candidates)
+            else:
+                total = _discounted_floor(total, *data)
+        return total
+
+    def quantity_discount_matrix(self, plan_names, counts, costs_cents):
+        """`quantity_discount` over a NumPy matrix with one column per plan.
+
+        `counts` and `costs_cents` have one row per basket and one column
+        per name in `plan_names`; every cell is priced in a single pass.
+        """
+        import numpy as np  # pylint: disable=import-outside-toplevel
+        breaks = [self._breaks(plan_name) for plan_name in plan_names]
+        minimums = [minimum for plan_minimums, _values in breaks for minimum in plan_minimums]
+        if not minimums or counts.size == 0:
+            return np.zeros_like(costs_cents)
+        # Tasa de cada plan por cantidad; más allá de `top` ya no cambia
+        top = int(min(max(minimums), counts.max()))
+        rates = np.zeros((len(plan_names), top + 1), dtype=np.int64)
+        for col, (plan_minimums, values) in enumerate(breaks):
+            for minimum, rate_bp in zip(plan_minimums, values):
+                if minimum <= top:
+                    rates[col, minimum:] = rate_bp
+        rate_bp = rates[np.arange(len(plan_names)), np.minimum(counts, top)]
+        return (costs_cents * rate_bp + BASIS_POINTS // 2) // BASIS_POINTS
+
+    def adjust_array(self, totals, has_premium):
+        """`adjust` over NumPy arrays of totals (int64 cents) and flags."""
+        import numpy as np  # pylint: disable=import-outside-toplevel
+        surcharge = np.zeros_like(totals)
+        discount = np.zeros_like(totals)
+        for effect, premium_only, kind, data in self._steps:
+            if kind == TIERED:
+                thresholds, values = data
+                index = np.searchsorted(np.asarray(thresholds), totals, side="left") - 1
+                rate_bp = np.asarray([0] + [bp for bp, _cents in values])[index + 1]
+                fixed = np.asarray([0] + [amount for _bp, amount in values])[index + 1]
+            else:
+                rate_bp, fixed = data
+            amount = fixed + (totals * rate_bp + BASIS_POINTS // 2) // BASIS_POINTS
+            if premium_only:
+                amount = np.where(has_premium, amount, 0)
+            if effect == SURCHARGE:
+                surcharge = surcharge + amount
+                totals = totals + amount
+            else:
+                amount = np.minimum(amount, totals)
+                discount = discount + amount
+                totals = totals - amount
+        return surcharge, discount, totals
+
+
+def _money_label(cents):
+    return f"${cents // 100}" if cents % 100 == 0 else f"${cents / 100:.2f}"
+
+
+def _rate_label(rate_bp, amount):
+    """"15%", "$20" or "5% + $20" for a (basis points, cents) pair."""
+    parts = []
+    if rate_bp:
+        parts.append(f"{rate_bp * 100 / BASIS_POINTS:g}%")
+    if amount or not rate_bp:
+        parts.append(_money_label(amount))
+    return " + ".join(parts)
+
+
+def _discounted_floor(total, rate_bp, amount):
+    """Lower bound of `total` cents after a discount of `rate_bp` plus `amount`."""
+    # t - apply_rate(t, bp) >= floor(t * (1 - bp))
+    return max(0, total * (BASIS_POINTS - min(rate_bp, BASIS_POINTS)) // BASIS_POINTS - amount)
+
+
+def _compile_breaks(rule):
+    breaks = ((), ())
+    if "breaks" in rule:
+        breaks = _sorted_thresholds(rule["breaks"], "min_quantity", rule, integer=True)
+    plans = rule.get("plans") or {}
+    if not isinstance(plans, dict):
+        raise ValueError(f"Regla '{rule.get('name', rule.get('type'))}': "
+                         "'plans' debe ser un objeto")
+    return breaks, {plan_name: _sorted_thresholds(entries, "min_quantity", rule, integer=True)
+                    for plan_name, entries in plans.items()}
+
+
+def _compile_step(rule):
+    effect = rule.get("effect")
+    if effect not in (SURCHARGE, DISCOUNT):
+        raise ValueError(f"Regla '{rule.get('name', rule.get('type'))}': "
+                         f"'effect' debe ser '{SURCHARGE}' o '{DISCOUNT}'")
+    when = rule.get("when", "always")
+    if when not in ("always", "premium"):
+        raise ValueError(f"Regla '{rule.get('name', rule.get('type'))}': "
+                         "'when' debe ser 'always' o 'premium'")
+    kind = rule["type"]
+    if kind == TIERED:
+        data = _sorted_thresholds(rule.get("tiers"), "above", rule)
+    elif kind == PERCENTAGE:
+        data = (_percent_bp(rule), 0)
+    else:
+        data = (0, to_cents(_number(rule, "amount")))
+    return effect, when == "premium", kind, data
+
+
+def compile_rules(rules):
+    """Compile a `pricing_rules` list into a `PricingRules` evaluator.
+
+    Raises:
+        ValueError: If a rule is malformed.
+    """
+    if not isinstance(rules, (list, tuple)):
+        raise ValueError("'pricing_rules' debe ser una lista")
+    breaks = ((), ())
+    plan_breaks = {}
+    steps = []
+    seen_quantity = False
+    for rule in rules:
+        if not isinstance(rule, dict):
+            raise ValueError("Cada regla de precios debe ser un objeto")
+        kind = rule.get("type")
+        if kind == QUANTITY_DISCOUNT:
+            if seen_quantity:
+                raise ValueError("Solo se admite una regla 'quantity_discount'")
+            seen_quantity = True
+            breaks, plan_breaks = _compile_breaks(rule)
+        elif kind in (PERCENTAGE, FIXED, TIERED):
+            steps.append(_compile_step(rule))
+        else:
+            raise ValueError(f"Tipo de regla desconocido: '{kind}'")
+    return PricingRules(breaks, plan_breaks, tuple(steps))
@@ -0,0 +1,104 @@
+"""Bounded LRU cache of priced baskets.
+
+Most purchases repeat ("2 x Premium + Personal Training", ...), so the
+`Quote` of a basket is memoized under a canonical, order-independent key of
+the basket plus the catalog version. Quotes are immutable, so the cached
+object itself is handed out. The cache is cleared automatically when a new
+catalog version is seen.
+"""
+import threading
+from collections import Counter, OrderedDict
+
+from catalog import get_catalog
+from models import Buyer
+
+DEFAULT_MAXSIZE = 4096
+
+
+def canonical_basket(items):
+    """Return an order-independent key for a list of `Item` objects.
+
+    The key is the multiset of (plan, sorted additional features, sorted
+    premium features) lines, as a sorted tuple of (line, quantity) pairs;
+    an item with `quantity` n counts like n separate items.
+    """
+    lines = Counter()
+    for item in items:
+        lines[(item.plan_name,
+               tuple(sorted(item.additional_features)),
+               tuple(sorted(item.premium_membership_features)))] += item.quantity
+    return tuple(sorted(lines.items()))
+
+
+def price_items(items, catalog=None):
+    """Price `items` through `Buyer` and return their `Quote`."""
+    return Buyer(items, catalog).quote()
+
+
+class QuoteCache:
+    """Thread-safe LRU cache of basket quotes with hit/miss/eviction counters."""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        if maxsize < 1:
+            raise ValueError("maxsize debe ser al menos 1")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def quote(self, items, catalog=None):
+        """Return the quote of `items`, pricing them only on a cache miss.
+
+        Args:
+            items: List of `Item` objects.
+            catalog: Catalog snapshot to price with (default: current one).
+
+        Returns:
+            Quote: The quote, as returned by `price_items`.
+        """
+        catalog = catalog or get_catalog()
+        key = (catalog.version, canonical_basket(items))
+        with self._lock:
+            if catalog.version != self._version:
+                # Nueva versión del catálogo: los precios cacheados ya no valen
+                self._entries.clear()
+                self._version = catalog.version
+            quote = self._entries.get(key)
+            if quote is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return quote
+            self.misses += 1
+
+        quote = price_items(items, catalog)
+        with self._lock:
+            if catalog.version == self._version:
+                self._entries[key] = quote
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return quote
+
+    def clear(self):
+        """Drop every cached quote (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return the cache counters as a dict."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,229 @@
+"""Headless replay of scripted menu sessions, for load tests.
+
+A session is the list of answers a customer types into `menu.menu` (plan,
+features, "1"/"2" to add another plan or finish, confirmation) plus the
+value `menu` is expected to return: the total, or -1 for a cancelled
+purchase. `ScriptedIO` plugs into the menu instead of the terminal, feeds
+it the answers and discards its output.
+
+Every step is timed: the time the menu spends handling an answer, until it
+asks the next question or returns, is recorded under the step that asked
+for it ("plan", "features", "next_action", "confirmation"; "start" is the
+time before the first question).
+
+Sessions are read from JSONL (`{"answers": [...], "expected": 228.4}` per
+line) or generated with `generate_sessions`, whose expected totals come from
+`Buyer.quote` on the catalog.
+"""
+import json
+import random
+import time
+
+from catalog import ADDITIONAL, get_catalog
+from menu import menu
+from models import Item, Buyer
+
+# Comienzo de cada pregunta del menú -> nombre del paso
+STEP_PROMPTS = (
+    ("Ingrese el nombre del plan", "plan"),
+    ("Ingrese features adicionales", "features"),
+    ("Ingrese opción", "next_action"),
+    ("Ingrese su opción", "confirmation"),
+)
+CANCELLED = -1
+
+
+class ScriptExhausted(Exception):
+    """The menu asked a question the script has no answer for."""
+
+
+def step_name(prompt):
+    """Return the step a menu prompt belongs to."""
+    prompt = prompt.lstrip()
+    for prefix, name in STEP_PROMPTS:
+        if prompt.startswith(prefix):
+            return name
+    return "other"
+
+
+class ScriptedIO:
+    """Menu I/O that answers from a script and times every step.
+
+    Attributes:
+        timings: List of (step, seconds) in session order.
+        lines: Number of messages the menu showed.
+    """
+
+    def __init__(self, answers, clock=time.perf_counter):
+        self._answers = iter(answers)
+        self._clock = clock
+        self.timings = []
+        self.lines = 0
+        self._step = "start"
+        self._started = clock()
+
+    def ask(self, prompt):
+        """Return the next scripted answer.
+
+        Raises:
+            ScriptExhausted: If there are no answers left.
+        """
+        self._close_step()
+        try:
+            answer = next(self._answers)
+        except StopIteration:
+            raise ScriptExhausted(f"Sin respuesta para: {prompt.strip()!r}") from None
+        self._step = step_name(prompt)
+        self._started = self._clock()
+        return answer
+
+    def say(self, *_args, **_kwargs):
+        """Discard a message."""
+        self.lines += 1
+
+    def finish(self):
+        """Close the step in progress when the menu returns."""
+        self._close_step()
+
+    def _close_step(self):
+        if self._step is not None:
+            self.timings.append((self._step, self._clock() - self._started))
+            self._step = None
+
+
+def load_sessions(lines):
+    """Parse JSONL session scripts.
+
+    Raises:
+        ValueError: If a line is not a session object.
+    """
+    sessions = []
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        session = json.loads(line)
+        if (not isinstance(session, dict) or not isinstance(session.get("answers"), list)
+                or not isinstance(session.get("expected"), (int, float))):
+            raise ValueError(f"Línea {line_number}: se espera "
+                             "{\"answers\": [...], \"expected\": número}")
+        sessions.append(session)
+    return sessions
+
+
+def _typed(name, rng):
+    """A name as a customer might type it (case and spaces)."""
+    return rng.choice((name, name.lower(), name.upper(), f"  {name} "))
+
+
+def generate_sessions(n_sessions, seed=0, catalog=None):
+    """Generate `n_sessions` random session scripts with their expected result.
+
+    Plans and features are typed with random case and spacing; some answers
+    name an unknown plan (the menu asks again) or an unknown feature (it is
+    ignored), and about one session in ten is cancelled at confirmation.
+    """
+    catalog = catalog or get_catalog()
+    rng = random.Random(seed)
+    plans = [name for name in catalog.plans if catalog.plan_available.get(name, True)]
+    features = [(name, kind) for name, kind, _cost in catalog.feature_index().values()
+                if catalog.feature_available.get(name, True)]
+    sessions = []
+    for _ in range(n_sessions):
+        answers = []
+        items = []
+        n_items = rng.randint(1, 4)
+        for position in range(n_items):
+            if rng.random() < 0.05:
+                answers.append("Gold")
+            plan_name = rng.choice(plans)
+            chosen = rng.sample(features, rng.randint(0, min(3, len(features))))
+            typed = [_typed(name, rng) for name, _kind in chosen]
+            if rng.random() < 0.05:
+                typed.append("Free Massage")
+            answers += [_typed(plan_name, rng), ",".join(typed),
+                        "1" if position < n_items - 1 else "2"]
+            items.append(Item(plan_name,
+                              [name for name, kind in chosen if kind == ADDITIONAL],
+                              [name for name, kind in chosen if kind != ADDITIONAL]))
+        confirm = rng.random() >= 0.1
+        answers.append("1" if confirm else "2")
+        expected = Buyer(items, catalog).quote().total if confirm else CANCELLED
+        sessions.append({"answers": answers, "expected": expected})
+    return sessions
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize_latencies(samples):
+    """Count, mean and p50/p90/p99/max of `samples` (seconds), in milliseconds."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0}
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 4),
+        "p50_ms": round(_percentile(ordered, 0.50) * 1000, 4),
+        "p90_ms": round(_percentile(ordered, 0.90) * 1000, 4),
+        "p99_ms": round(_percentile(ordered, 0.99) * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4),
+    }
+
+
+def run_sessions(sessions, ledger=None, max_mismatches=20):
+    """Replay `sessions` through the menu and report latencies and results.
+
+    Args:
+        sessions: Iterable of {"answers": [...], "expected": number}.
+        ledger: Optional `ledger.Ledger` where confirmed purchases are stored.
+        max_mismatches: Mismatching sessions listed in the report.
+
+    Returns:
+        dict: Counts, throughput, latency summaries per step and per
+        session, expected and actual revenue, and the first mismatches.
+    """
+    steps = {}
+    session_latencies = []
+    report = {"sessions": 0, "errors": 0, "mismatches": 0, "confirmed": 0,
+              "cancelled": 0, "expected_revenue": 0.0, "actual_revenue": 0.0}
+    examples = []
+    start = time.perf_counter()
+    for index, session in enumerate(sessions):
+        report["sessions"] += 1
+        console = ScriptedIO(session["answers"])
+        try:
+            result = menu(ledger, console)
+        except ScriptExhausted as e:
+            report["errors"] += 1
+            if len(examples) < max_mismatches:
+                examples.append({"session": index, "error": str(e)})
+            continue
+        console.finish()
+        session_latencies.append(sum(seconds for _step, seconds in console.timings))
+        for step, seconds in console.timings:
+            steps.setdefault(step, []).append(seconds)
+
+        expected = session["expected"]
+        if expected != CANCELLED:
+            report["expected_revenue"] += expected
+        if result == CANCELLED:
+            report["cancelled"] += 1
+        else:
+            report["confirmed"] += 1
+            report["actual_revenue"] += result
+        if result != expected:
+            report["mismatches"] += 1
+            if len(examples) < max_mismatches:
+                examples.append({"session": index, "expected": expected, "actual": result})
+    elapsed = time.perf_counter() - start
+
+    report["expected_revenue"] = round(report["expected_revenue"], 2)
+    report["actual_revenue"] = round(report["actual_revenue"], 2)
+    report["elapsed_seconds"] = round(elapsed, 4)
+    report["sessions_per_second"] = round(report["sessions"] / elapsed, 1) if elapsed else 0.0
+    report["session_latency"] = summarize_latencies(session_latencies)
+    report["steps"] = {step: summarize_latencies(samples)
+                       for step, samples in sorted(steps.items())}
+    report["failures"] = examples
+    return report
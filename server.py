@@ -0,0 +1,383 @@
+"""Asyncio HTTP/JSON quote server.
+
+Exposes the pricing engine to the web front end and kiosks with the standard
+library only::
+
+    POST /quote          {"buyer": "C-1", "items": [{"plan": "Premium",
+                          "additional_features": ["Personal Training"],
+                          "premium_features": []}]}
+    GET  /availability   ?plan=Premium&feature=Personal%20Training
+    GET  /health
+    GET  /metrics        Prometheus text (see `metrics.py`)
+
+Connections are HTTP/1.1 keep-alive and may pipeline requests; responses are
+written in request order. Pricing is CPU-bound and short, so it runs on the
+event loop itself, without thread hops. Concurrency is bounded by
+`max_connections`: extra connections get a 503 with `Retry-After`. Within a
+connection, the stream reader stops reading the socket once its buffer is
+full, so a client that pipelines faster than it is served is slowed down by
+TCP. On shutdown the server stops accepting, closes idle connections,
+finishes the requests in progress and then exits.
+"""
+import asyncio
+import json
+import signal
+import sys
+from urllib.parse import parse_qs, urlsplit
+
+import metrics
+from catalog import get_catalog, start_auto_reload, stop_auto_reload
+from pipeline import price_purchase
+from quote_cache import DEFAULT_MAXSIZE, QuoteCache
+from utils import check_plan_availability, check_feature_availability
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+DEFAULT_MAX_CONNECTIONS = 256
+MAX_BODY_BYTES = 1 << 20
+MAX_HEADERS = 100
+# Segundos que una conexión keep-alive puede estar sin enviar peticiones
+KEEP_ALIVE_TIMEOUT = 15.0
+DRAIN_TIMEOUT = 10.0
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    422: "Unprocessable Entity",
+    503: "Service Unavailable",
+}
+
+# ruta -> (método, nombre del manejador)
+_ROUTES = {
+    "/quote": ("POST", "_quote"),
+    "/availability": ("GET", "_availability"),
+    "/health": ("GET", "_health"),
+    "/metrics": ("GET", "_metrics"),
+}
+
+
+class HTTPError(Exception):
+    """Request error answered with `status` and a JSON error message."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def build_response(status, payload, keep_alive=True):
+    """Serialize an HTTP/1.1 response.
+
+    `payload` is sent as JSON, or as plain text if it is a str.
+    """
+    if isinstance(payload, str):
+        body = payload.encode("utf-8")
+        content_type = "text/plain; version=0.0.4; charset=utf-8"
+    else:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        content_type = "application/json"
+    head = (
+        f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+    )
+    if status == 503:
+        head += "Retry-After: 1\r\n"
+    return (head + "\r\n").encode("latin-1") + body
+
+
+async def read_request(reader, request_line):
+    """Read the headers and body of a request whose first line was read.
+
+    Returns:
+        tuple: (method, target, keep_alive, body)
+
+    Raises:
+        HTTPError: If the request is malformed or too large.
+        asyncio.IncompleteReadError: If the client closed mid-request.
+    """
+    parts = request_line.decode("latin-1").split()
+    if len(parts) != 3 or not parts[2].startswith("HTTP/1."):
+        raise HTTPError(400, "Línea de petición inválida")
+    method, target, version = parts
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise asyncio.IncompleteReadError(b"", None)
+        if line in (b"\r\n", b"\n"):
+            break
+        if len(headers) >= MAX_HEADERS:
+            raise HTTPError(400, "Demasiadas cabeceras")
+        name, sep, value = line.decode("latin-1").partition(":")
+        if not sep:
+            raise HTTPError(400, "Cabecera inválida")
+        headers[name.strip().lower()] = value.strip()
+
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise HTTPError(400, "Transfer-Encoding chunked no soportado")
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError as e:
+        raise HTTPError(400, "Content-Length inválido") from e
+    if length < 0:
+        raise HTTPError(400, "Content-Length inválido")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, "Cuerpo de la petición demasiado grande")
+    body = await reader.readexactly(length) if length else b""
+
+    connection = headers.get("connection", "").lower()
+    if version == "HTTP/1.0":
+        keep_alive = connection == "keep-alive"
+    else:
+        keep_alive = connection != "close"
+    return method, target, keep_alive, body
+
+
+def _is_str_list(value):
+    return isinstance(value, list) and all(isinstance(v, str) for v in value)
+
+
+def _parse_quote_request(body):
+    """Parse and validate the JSON body of POST /quote."""
+    try:
+        request = json.loads(body)
+    except ValueError as e:
+        raise HTTPError(400, "JSON inválido") from e
+    items = request.get("items") if isinstance(request, dict) else None
+    if not isinstance(items, list) or not items:
+        raise HTTPError(400, 'Se espera {"items": [...]} con al menos una membresía')
+    for order in items:
+        if (not isinstance(order, dict) or not isinstance(order.get("plan"), str)
+                or not _is_str_list(order.get("additional_features", []))
+                or not _is_str_list(order.get("premium_features", []))):
+            raise HTTPError(400, "Cada membresía necesita 'plan' (texto) y listas "
+                                 "de texto en 'additional_features'/'premium_features'")
+    return request.get("buyer"), items
+
+
+class QuoteServer:
+    """HTTP/JSON server around `Buyer` pricing and the availability checks.
+
+    Attributes:
+        host: Address to listen on.
+        port: Port to listen on (the real one after `start` if 0 was given).
+        max_connections: Connections served at once; the rest get a 503.
+        cache: `QuoteCache` shared by all connections, or None.
+        stats: Counters of accepted/rejected connections and requests.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT,
+                 max_connections=DEFAULT_MAX_CONNECTIONS, cache_size=DEFAULT_MAXSIZE):
+        if max_connections < 1:
+            raise ValueError("max_connections debe ser al menos 1")
+        self.host = host
+        self.port = port
+        self.max_connections = max_connections
+        self.cache = QuoteCache(cache_size) if cache_size > 0 else None
+        self.stats = {"connections": 0, "rejected": 0, "requests": 0}
+        self._server = None
+        # tarea de cada conexión -> True mientras espera una petición nueva
+        self._connections = {}
+
+    @property
+    def draining(self):
+        """True once the server stopped accepting connections."""
+        return self._server is not None and not self._server.is_serving()
+
+    @property
+    def open_connections(self):
+        """Number of connections being served."""
+        return len(self._connections)
+
+    async def start(self):
+        """Start listening; returns the server itself."""
+        get_catalog()  # Cargar el catálogo antes de la primera petición
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def shutdown(self, timeout=DRAIN_TIMEOUT):
+        """Stop accepting, close idle connections and drain the busy ones.
+
+        Connections still busy after `timeout` seconds are cancelled.
+        """
+        if self._server is None:
+            return
+        self._server.close()
+        for task, idle in list(self._connections.items()):
+            if idle:
+                task.cancel()
+        pending = list(self._connections)
+        if pending:
+            _done, still_running = await asyncio.wait(pending, timeout=timeout)
+            for task in still_running:
+                task.cancel()
+            await asyncio.gather(*still_running, return_exceptions=True)
+        await self._server.wait_closed()
+
+    async def _handle_connection(self, reader, writer):
+        task = asyncio.current_task()
+        if self.draining or len(self._connections) >= self.max_connections:
+            self.stats["rejected"] += 1
+            writer.write(build_response(
+                503, {"error": "Servidor ocupado, intente más tarde"}, keep_alive=False))
+            await _close(writer)
+            return
+
+        self.stats["connections"] += 1
+        self._connections[task] = True
+        try:
+            await self._serve_requests(task, reader, writer)
+        except (asyncio.CancelledError, ConnectionError):
+            # Cierre por drenaje o cliente desconectado
+            pass
+        finally:
+            self._connections.pop(task, None)
+            await _close(writer)
+
+    async def _serve_requests(self, task, reader, writer):
+        """Answer the requests of one connection in order until it closes."""
+        while True:
+            try:
+                request_line = await asyncio.wait_for(reader.readline(),
+                                                      KEEP_ALIVE_TIMEOUT)
+            except asyncio.TimeoutError:
+                return
+            if not request_line:
+                return
+            self._connections[task] = False
+            try:
+                method, target, keep_alive, body = await read_request(
+                    reader, request_line)
+            except HTTPError as e:
+                writer.write(build_response(e.status, {"error": str(e)}, False))
+                return
+            except (asyncio.IncompleteReadError, ValueError):
+                # Cliente desconectado o línea más larga que el búfer
+                return
+
+            self.stats["requests"] += 1
+            status, payload = self._dispatch(method, target, body)
+            keep_alive = keep_alive and not self.draining
+            writer.write(build_response(status, payload, keep_alive))
+            # Si el cliente no lee, esperar aquí limita lo que se acumula
+            await writer.drain()
+            if not keep_alive:
+                return
+            self._connections[task] = True
+
+    def _dispatch(self, method, target, body):
+        """Route one request; returns (status, payload)."""
+        url = urlsplit(target)
+        route = _ROUTES.get(url.path)
+        if route is None:
+            return 404, {"error": f"Ruta '{url.path}' no encontrada"}
+        allowed, handler = route
+        if method != allowed:
+            return 405, {"error": f"Use {allowed} para {url.path}"}
+        try:
+            return getattr(self, handler)(url.query, body)
+        except HTTPError as e:
+            return e.status, {"error": str(e)}
+
+    def _quote(self, _query, body):
+        buyer_id, items = _parse_quote_request(body)
+        result = price_purchase(buyer_id, items, self.cache)
+        return (422 if "error" in result else 200), result
+
+    def _availability(self, query, _body):
+        params = parse_qs(query)
+        plans = params.get("plan", [])
+        features = params.get("feature", [])
+        if not plans and not features:
+            raise HTTPError(400, "Indique al menos un 'plan' o 'feature'")
+        result = {"plans": {}, "features": {}}
+        for name in plans:
+            available, reason = check_plan_availability(name)
+            result["plans"][name] = {"available": available, "reason": reason}
+        for name in features:
+            available, reason = check_feature_availability(name)
+            result["features"][name] = {"available": available, "reason": reason}
+        return 200, result
+
+    def _health(self, _query, _body):
+        health = {
+            "status": "draining" if self.draining else "ok",
+            "catalog_version": get_catalog().version,
+            "open_connections": self.open_connections,
+        }
+        health.update(self.stats)
+        if self.cache is not None:
+            health["cache"] = self.cache.stats()
+        return 200, health
+
+    def _metrics(self, _query, _body):
+        return 200, metrics.to_prometheus()
+
+
+async def _close(writer):
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+
+
+def _handle_stop_signals(loop, callback):
+    """Call `callback` in `loop` on SIGINT/SIGTERM; returns an undo function.
+
+    `loop.add_signal_handler` only exists in the Unix event loops; on
+    Windows the handlers are installed with `signal.signal` and hand the
+    call over to the loop with `call_soon_threadsafe`, which also wakes it.
+    """
+    signums = (signal.SIGINT, signal.SIGTERM)
+    try:
+        for signum in signums:
+            loop.add_signal_handler(signum, callback)
+    except NotImplementedError:
+        def handler(_signum, _frame):
+            loop.call_soon_threadsafe(callback)
+
+        previous = {signum: signal.signal(signum, handler) for signum in signums}
+
+        def restore():
+            for signum, previous_handler in previous.items():
+                signal.signal(signum, previous_handler)
+        return restore
+
+    def remove():
+        for signum in signums:
+            loop.remove_signal_handler(signum)
+    return remove
+
+
+async def serve(server, reload_interval=0.0):
+    """Run `server` until SIGINT/SIGTERM, then drain it."""
+    stop = asyncio.Event()
+    restore_signals = _handle_stop_signals(asyncio.get_running_loop(), stop.set)
+    await server.start()
+    if reload_interval > 0:
+        start_auto_reload(reload_interval)
+    print(f"Servidor de cotizaciones escuchando en http://{server.host}:{server.port}",
+          file=sys.stderr, flush=True)
+    try:
+        await stop.wait()
+    finally:
+        print(f"Cerrando: drenando {server.open_connections} conexión(es)...",
+              file=sys.stderr, flush=True)
+        await server.shutdown()
+        stop_auto_reload()
+        restore_signals()
+
+
+def run_server(host=DEFAULT_HOST, port=DEFAULT_PORT, max_connections=DEFAULT_MAX_CONNECTIONS,
+               cache_size=DEFAULT_MAXSIZE, reload_interval=0.0):
+    """Blocking entry point used by `main.py serve`."""
+    server = QuoteServer(host, port, max_connections, cache_size)
+    asyncio.run(serve(server, reload_interval))
@@ -0,0 +1,186 @@
+"""Multi-process sharded pricing for large JSONL order files.
+
+The order file is split into byte ranges whose boundaries fall between two
+different buyers, so every purchase is priced entirely by one worker. Each
+worker prices its shards with the streaming pipeline into a temporary file
+and the shard outputs are concatenated in input order.
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from catalog import get_catalog
+from pipeline import quote_stream, write_jsonl
+from quote_cache import DEFAULT_MAXSIZE, QuoteCache
+
+
+def _buyer_of(line):
+    """Return the buyer id of a raw JSONL line, or None for blank lines."""
+    if not line.strip():
+        return None
+    try:
+        return json.loads(line).get("buyer")
+    except (json.JSONDecodeError, AttributeError):
+        return None
+
+
+def _next_buyer_boundary(stream, offset):
+    """Return the offset of a line at or after `offset` that starts a new buyer.
+
+    `offset` may fall in the middle of a line; the partial line is skipped.
+    Then the lines of the buyer found there are skipped too, so a purchase
+    is never split between two shards.
+    """
+    if offset <= 0:
+        return 0
+    stream.seek(offset - 1)
+    stream.readline()  # completar la línea parcial (o el '\n' anterior)
+    first_buyer = None
+    seen_line = False
+    while True:
+        position = stream.tell()
+        line = stream.readline()
+        if not line:
+            return position
+        if not line.strip():
+            continue
+        buyer = _buyer_of(line)
+        if not seen_line:
+            first_buyer = buyer
+            seen_line = True
+        elif buyer != first_buyer:
+            return position
+
+
+def find_shard_boundaries(path, n_shards):
+    """Split `path` into at most `n_shards` byte ranges aligned to buyer boundaries.
+
+    Returns:
+        list: Sorted list of (start, end) byte offsets covering the file.
+    """
+    size = os.path.getsize(path)
+    n_shards = max(1, n_shards)
+    offsets = [0]
+    with open(path, "rb") as stream:
+        for index in range(1, n_shards):
+            boundary = _next_buyer_boundary(stream, size * index // n_shards)
+            if offsets[-1] < boundary < size:
+                offsets.append(boundary)
+    offsets.append(size)
+    return list(zip(offsets[:-1], offsets[1:]))
+
+
+def _read_range(path, start, end):
+    """Yield the decoded lines that start inside [start, end)."""
+    with open(path, "rb") as stream:
+        stream.seek(start)
+        while stream.tell() < end:
+            line = stream.readline()
+            if not line:
+                break
+            yield line.decode("utf-8")
+
+
+def _init_worker():
+    """Load the catalog once per worker process."""
+    get_catalog()
+
+
+def price_shard(path, start, end, output_path, cache_size=DEFAULT_MAXSIZE):
+    """Price the byte range [start, end) of `path` into `output_path`.
+
+    Returns:
+        dict: Shard statistics (lines, purchases, wall and CPU seconds, pid).
+    """
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    lines = 0
+
+    def counted(stream):
+        nonlocal lines
+        for line in stream:
+            lines += 1
+            yield line
+
+    cache = QuoteCache(cache_size) if cache_size > 0 else None
+    with open(output_path, "w", encoding="utf-8") as target:
+        purchases = write_jsonl(
+            quote_stream(counted(_read_range(path, start, end)), cache), target
+        )
+    return {
+        "start": start,
+        "end": end,
+        "lines": lines,
+        "purchases": purchases,
+        "seconds": time.perf_counter() - started,
+        "cpu_seconds": time.process_time() - cpu_started,
+        "pid": os.getpid(),
+    }
+
+
+def run_sharded_quote(input_path, output_path, workers, shards_per_worker=4,
+                      cache_size=DEFAULT_MAXSIZE):
+    """Price `input_path` with a process pool and merge results in input order.
+
+    Args:
+        input_path: JSONL order file (must be a regular file).
+        output_path: JSONL result file.
+        workers: Number of worker processes.
+        shards_per_worker: Shards per worker, for load balancing.
+        cache_size: Entries of the per-shard `QuoteCache` (0 disables it).
+
+    Returns:
+        dict: Throughput report with totals and per-shard statistics.
+    """
+    started = time.perf_counter()
+    shards = find_shard_boundaries(input_path, workers * shards_per_worker)
+    out_dir = os.path.dirname(os.path.abspath(output_path))
+    with tempfile.TemporaryDirectory(dir=out_dir) as tmp_dir:
+        shard_paths = [os.path.join(tmp_dir, f"shard-{i:05d}.jsonl")
+                       for i in range(len(shards))]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(price_shard, input_path, start, end, shard_path,
+                                   cache_size)
+                       for (start, end), shard_path in zip(shards, shard_paths)]
+            shard_stats = [future.result() for future in futures]
+
+        # Concatenar en el orden de entrada
+        with open(output_path, "wb") as target:
+            for shard_path in shard_paths:
+                with open(shard_path, "rb") as source:
+                    shutil.copyfileobj(source, target)
+
+    elapsed = time.perf_counter() - started
+    lines = sum(stat["lines"] for stat in shard_stats)
+    purchases = sum(stat["purchases"] for stat in shard_stats)
+    return {
+        "workers": workers,
+        "shards": len(shards),
+        "lines": lines,
+        "purchases": purchases,
+        "seconds": elapsed,
+        "lines_per_second": lines / elapsed if elapsed else 0.0,
+        "purchases_per_second": purchases / elapsed if elapsed else 0.0,
+        "shard_stats": shard_stats,
+    }
+
+
+def print_report(report, stream=None):
+    """Print a human readable throughput report (to stderr by default)."""
+    stream = stream or sys.stderr
+    print(f"Workers: {report['workers']}  Shards: {report['shards']}", file=stream)
+    print(f"Líneas: {report['lines']}  Compras: {report['purchases']}", file=stream)
+    print(f"Tiempo: {report['seconds']:.3f}s", file=stream)
+    print(f"Throughput: {report['lines_per_second']:.0f} líneas/s, "
+          f"{report['purchases_per_second']:.0f} compras/s", file=stream)
+    # Tiempo de CPU de los workers frente al máximo posible con N procesos
+    busy = sum(stat["cpu_seconds"] for stat in report["shard_stats"])
+    if report["seconds"] and report["workers"]:
+        efficiency = busy / (report["seconds"] * report["workers"])
+        print(f"Uso de workers: {efficiency:.0%} "
+              f"({report['lines_per_second'] / report['workers']:.0f} líneas/s por worker)",
+              file=stream)
@@ -0,0 +1,130 @@
+"""Pruebas para la analítica de ingresos por ventanas (`analytics.py`)."""
+import json
+
+import analytics
+from analytics import aggregate_file, build_report
+from catalog import Catalog
+from ledger import Ledger, record_from_quote
+from main import main
+from models import Item, Buyer
+
+DAY = 86400
+
+
+def _record(items, created_at):
+    record = record_from_quote(items, Buyer(items).quote())
+    record["created_at"] = created_at
+    return record
+
+
+def _history(path, days=3, per_day=20):
+    """Write a history where each day repeats the same three baskets."""
+    baskets = [
+        [Item("Basic", ["Group Classes"], [])],
+        [Item("Premium", [], []), Item("Premium", ["Access to Pool"], [])],
+        [Item("Family", ["Personal Training"], ["Exclusive Gym Facilities"])],
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        for day in range(days):
+            for idx in range(per_day):
+                record = _record(baskets[idx % 3], day * DAY + idx)
+                f.write(json.dumps(record) + "\n")
+
+
+def test_report_metrics(tmp_path):
+    """Revenue, attach rates, group discounts and surcharges per window."""
+    history = tmp_path / "history.jsonl"
+    _history(history, days=1, per_day=3)
+    merged, _stats = aggregate_file(str(history), use_cache=False)
+    report = build_report(merged)
+    day = report["windows"][0]
+    assert day["window"] == "1970-01-01T00:00:00Z"
+    assert day["purchases"] == 3 and day["memberships"] == 4
+    assert day["plan_memberships"] == {"Basic": 1, "Family": 1, "Premium": 2}
+    assert day["group_discount_purchases"] == 1
+    assert day["feature_attach_rate"]["Group Classes"] == 0.25
+    assert day["premium_surcharge_purchases"] == 1
+    assert day["premium_surcharge"] == day["premium_surcharge_by_plan"]["Family"]
+    expected = sum(json.loads(line)["total"] for line in history.open(encoding="utf-8"))
+    assert day["revenue"] == round(expected, 2)
+    assert report["total"] == {key: value for key, value in day.items() if key != "window"}
+
+
+def test_chunks_merge_to_same_report(tmp_path):
+    """Many small chunks give the same report as a single chunk."""
+    history = tmp_path / "history.jsonl"
+    _history(history)
+    whole, _ = aggregate_file(str(history), use_cache=False)
+    chunked, stats = aggregate_file(str(history), chunk_size=2000, use_cache=False)
+    assert stats["chunks"] > 5
+    assert build_report(chunked) == build_report(whole)
+    assert len(build_report(whole)["windows"]) == 3
+
+
+def test_cache_only_rescans_appended_tail(tmp_path):
+    """After appending a purchase only the last chunk is read again."""
+    history = tmp_path / "history.jsonl"
+    _history(history)
+    first, stats = aggregate_file(str(history), chunk_size=2000)
+    assert stats["cached_chunks"] == 0
+
+    _again, stats = aggregate_file(str(history), chunk_size=2000)
+    assert stats["cached_chunks"] == stats["chunks"] and stats["bytes_scanned"] == 0
+
+    with open(history, "a", encoding="utf-8") as f:
+        f.write(json.dumps(_record([Item("Student", [], [])], 2 * DAY + 500)) + "\n")
+    updated, stats = aggregate_file(str(history), chunk_size=2000)
+    assert stats["cached_chunks"] == stats["chunks"] - 1
+    assert stats["bytes_scanned"] < 2000 * 2
+    assert build_report(updated)["total"]["purchases"] == \
+        build_report(first)["total"]["purchases"] + 1
+
+
+def test_cache_detects_same_length_edit_inside_a_chunk(tmp_path):
+    """Changing bytes far from the edges of a chunk invalidates that chunk."""
+    history = tmp_path / "history.jsonl"
+    _history(history, per_day=40)
+    first, stats = aggregate_file(str(history), chunk_size=12000)
+    assert stats["chunks"] == 4
+    content = history.read_bytes()
+    # Mismo largo: cambia un dígito de un total a mitad del segundo bloque
+    digit = content.index(b'"total": ', 18000) + len(b'"total": ')
+    new_digit = b"8" if content[digit:digit + 1] == b"9" else b"9"
+    history.write_bytes(content[:digit] + new_digit + content[digit + 1:])
+    updated, stats = aggregate_file(str(history), chunk_size=12000)
+    assert stats["cached_chunks"] == 3
+    assert build_report(updated)["total"]["revenue"] != build_report(first)["total"]["revenue"]
+
+
+def test_export_and_analytics_commands(tmp_path):
+    """Purchases exported from the ledger feed the analytics command."""
+    db = str(tmp_path / "ledger.db")
+    with Ledger(db) as ledger:
+        for day in range(2):
+            ledger.record_purchase(_record([Item("Basic", [], [])], day * DAY))
+    history = tmp_path / "history.jsonl"
+    assert main(["export-purchases", "--ledger", db, "-o", str(history)]) == 0
+    report_path = tmp_path / "report.json"
+    assert main(["analytics", "-i", str(history), "-o", str(report_path)]) == 0
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    assert [w["purchases"] for w in report["windows"]] == [1, 1]
+    assert report["total"]["revenue"] == 50
+
+
+def test_group_discount_follows_catalog_breaks(tmp_path, monkeypatch):
+    """Only quantities that reach a configured break count as group discounts."""
+    history = tmp_path / "history.jsonl"
+    with open(history, "w", encoding="utf-8") as f:
+        for quantity in (1, 2, 3, 5):
+            record = _record([Item("Basic", [], [], quantity=quantity)], DAY)
+            f.write(json.dumps(record) + "\n")
+    merged, _ = aggregate_file(str(history))
+    assert build_report(merged)["total"]["group_discount_purchases"] == 3
+
+    catalog = Catalog({"pricing_rules": [
+        {"type": "quantity_discount", "breaks": [{"min_quantity": 3, "percent": 10}],
+         "plans": {"Basic": [{"min_quantity": 5, "percent": 20}]}}]})
+    monkeypatch.setattr(analytics, "get_catalog", lambda: catalog)
+    merged, stats = aggregate_file(str(history))
+    assert stats["cached_chunks"] == 0
+    assert build_report(merged)["total"]["group_discount_purchases"] == 1
@@ -0,0 +1,61 @@
+"""Pruebas para el motor de precios por lotes `models.price_baskets`."""
+import random
+
+import models
+from models import Item, Buyer, price_baskets
+
+
+def _price_with_buyer(basket):
+    """Price one basket through the classic Buyer path."""
+    buyer = Buyer([Item(p, list(a), list(q)) for p, a, q in basket])
+    costs = buyer.calculate_costs()
+    total = buyer.sum_costs(costs)
+    return costs, buyer, total
+
+
+def _random_baskets(n_baskets, seed=7):
+    """Random baskets including unknown plans and unknown features."""
+    rng = random.Random(seed)
+    plans = list(Item.plan) + ["Gold"]
+    additional = list(Item.ADDITIONAL_FEATURES) + ["Free Massage"]
+    premium = list(Item.PREMIUM_FEATURES)
+    baskets = []
+    for _ in range(n_baskets):
+        baskets.append([
+            (rng.choice(plans),
+             rng.sample(additional, rng.randint(0, 3)),
+             rng.sample(premium, rng.randint(0, 2)))
+            for _ in range(rng.randint(0, 6))
+        ])
+    return baskets
+
+
+def test_price_baskets_matches_buyer_exactly():
+    """Totals, costs, surcharge and discount are identical to Buyer."""
+    baskets = _random_baskets(2000)
+    result = price_baskets(baskets)
+    assert len(result) == len(baskets)
+    for idx, basket in enumerate(baskets):
+        costs, buyer, total = _price_with_buyer(basket)
+        assert result.totals[idx] == total
+        assert result.basket_costs(idx) == costs
+        assert result.premium_surcharge[idx] == buyer.premium_surcharge_amount
+        assert result.special_discount[idx] == buyer.special_discount_amount
+
+
+def test_price_baskets_known_scenario():
+    """Two Family plans with premium features: discount, surcharge and -$20."""
+    basket = [("Family", [], ["Specialized Training Programs"])] * 2
+    result = price_baskets([basket, []])
+    assert result.basket_costs(0)["Family"] == 216.0
+    assert round(float(result.totals[0]), 2) == 228.4
+    assert result.special_discount[0] == 20.0
+    assert result.totals[1] == 0.0
+
+
+def test_price_baskets_without_numpy(monkeypatch):
+    """Without NumPy the Buyer fallback returns the same totals."""
+    baskets = _random_baskets(50, seed=3)
+    expected = [float(t) for t in price_baskets(baskets).totals]
+    monkeypatch.setattr(models, "_has_numpy", lambda: False)
+    assert price_baskets(baskets).totals == expected
@@ -0,0 +1,36 @@
+"""Pruebas para la suite de benchmarks y su control de regresiones."""
+import json
+
+from benchmarks import suite
+
+
+def _results(**seconds):
+    """Build a results document from benchmark key -> seconds."""
+    return {"results": {key: {"seconds": value} for key, value in seconds.items()}}
+
+
+def test_compare_flags_only_regressions_past_threshold():
+    """Slower than threshold regresses; faster, equal or untracked do not."""
+    baseline = _results(a=1.0, b=1.0, c=1.0)
+    current = _results(a=1.25, b=1.05, c=0.5, d=9.0)
+    rows = {row["key"]: row for row in suite.compare(current, baseline, threshold=0.10)}
+    assert set(rows) == {"a", "b", "c"}
+    assert rows["a"]["regressed"] is True
+    assert rows["b"]["regressed"] is False
+    assert rows["c"]["regressed"] is False
+
+
+def test_main_saves_results_and_fails_on_regression(tmp_path, capsys):
+    """The gate exits with 1 when a tracked benchmark regresses."""
+    output = tmp_path / "results.json"
+    args = ["--sizes", "1", "--only", "validar_plan", "--repeat", "1"]
+    assert suite.main(args + ["--output", str(output)]) == 0
+    saved = json.loads(output.read_text(encoding="utf-8"))
+    assert "validar_plan[n=1]" in saved["results"]
+
+    # Una línea base imposible de igualar provoca una regresión
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(_results(**{"validar_plan[n=1]": 1e-12})),
+                        encoding="utf-8")
+    assert suite.main(args + ["--baseline", str(baseline)]) == 1
+    assert "REGRESIÓN" in capsys.readouterr().out
@@ -0,0 +1,151 @@
+"""Pruebas para la facturación mensual reanudable (`billing.py`)."""
+import json
+import os
+
+import pytest
+
+from billing import BillingRun, checkpoint_path_for, load_checkpoint, run_billing
+from cents import to_cents
+from main import main
+from pipeline import price_purchase
+
+PLANS = ["Basic", "Premium", "Student", "Family"]
+
+
+def _write_roster(path, n_buyers):
+    """Roster where each buyer has 1 to 3 lines and every 7th line is inactive."""
+    lines = []
+    for idx in range(n_buyers):
+        for line in range(idx % 3 + 1):
+            order = {"buyer": f"C-{idx}", "plan": PLANS[(idx + line) % 4]}
+            if idx % 5 == 0:
+                order["additional_features"] = ["Personal Training"]
+            if len(lines) % 7 == 3:
+                order["active"] = False
+            lines.append(json.dumps(order) + "\n")
+    path.write_text("".join(lines), encoding="utf-8")
+
+
+def _invoices(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+class _Interrupt(Exception):
+    """Stands in for a crash between two chunks."""
+
+
+def test_invoices_match_the_quote_of_each_active_basket(tmp_path):
+    """One numbered invoice per buyer, priced without the inactive lines."""
+    roster = tmp_path / "padron.jsonl"
+    _write_roster(roster, 40)
+    invoices = tmp_path / "facturas.jsonl"
+    report = run_billing(str(roster), str(invoices), chunk_size=7, period="2026-10")
+    written = _invoices(invoices)
+    assert [invoice["invoice"] for invoice in written] == list(range(1, len(written) + 1))
+    assert report["invoices"] == report["billed_now"] == len(written)
+    assert report["chunks"] == 6 and report["inactive"] > 0
+
+    orders = [json.loads(line) for line in roster.read_text(encoding="utf-8").splitlines()]
+    for invoice in written:
+        active = [order for order in orders
+                  if order["buyer"] == invoice["buyer"] and order.get("active", True)]
+        expected = price_purchase(invoice["buyer"], active)
+        assert invoice == {"invoice": invoice["invoice"], "period": "2026-10", **expected}
+    assert report["total"] == round(sum(invoice["total"] for invoice in written), 2)
+    checkpoint = load_checkpoint(checkpoint_path_for(str(invoices)))
+    assert checkpoint["completed"] is True
+    assert checkpoint["total_cents"] == sum(to_cents(invoice["total"]) for invoice in written)
+
+
+def test_interrupted_run_resumes_from_the_last_chunk(tmp_path):
+    """A crash after chunk 2 plus a resume writes exactly the uninterrupted file."""
+    roster = tmp_path / "padron.jsonl"
+    _write_roster(roster, 50)
+    straight = tmp_path / "seguidas.jsonl"
+    run_billing(str(roster), str(straight), chunk_size=8, period="2026-10")
+
+    invoices = tmp_path / "facturas.jsonl"
+    seen = []
+
+    def crash(stats):
+        seen.append(stats)
+        if stats["chunk"] == 2:
+            raise _Interrupt
+
+    with pytest.raises(_Interrupt):
+        run_billing(str(roster), str(invoices), chunk_size=8, period="2026-10",
+                    progress=crash)
+    assert 0 < seen[-1]["percent"] < 100 and seen[-1]["invoices"] > 0
+    # Un bloque a medio escribir queda tras el último checkpoint
+    with open(invoices, "ab") as f:
+        f.write(b'{"invoice": 999, "buyer": "C-')
+
+    report = BillingRun(str(roster), str(invoices), chunk_size=8).run()
+    assert report["resumed"] is True
+    assert 0 < report["billed_now"] < report["invoices"]
+    assert invoices.read_bytes() == straight.read_bytes()
+    assert report["chunks"] == 7
+
+
+def test_completed_run_is_not_billed_again(tmp_path):
+    """Running again after completion leaves the invoices untouched."""
+    roster = tmp_path / "padron.jsonl"
+    _write_roster(roster, 10)
+    invoices = tmp_path / "facturas.jsonl"
+    first = run_billing(str(roster), str(invoices), chunk_size=3)
+    content = invoices.read_bytes()
+    again = run_billing(str(roster), str(invoices), chunk_size=3)
+    assert again["billed_now"] == 0 and again["invoices"] == first["invoices"]
+    assert invoices.read_bytes() == content
+
+
+def test_checkpoint_of_another_roster_or_period_is_rejected(tmp_path):
+    """A changed roster or another period needs `restart`."""
+    roster = tmp_path / "padron.jsonl"
+    _write_roster(roster, 10)
+    invoices = tmp_path / "facturas.jsonl"
+    run_billing(str(roster), str(invoices), period="2026-10")
+    with pytest.raises(ValueError):
+        run_billing(str(roster), str(invoices), period="2026-11")
+
+    _write_roster(roster, 12)
+    os.utime(roster, ns=(1, 1))
+    with pytest.raises(ValueError):
+        run_billing(str(roster), str(invoices))
+    report = run_billing(str(roster), str(invoices), period="2026-11", restart=True)
+    assert report["resumed"] is False and report["period"] == "2026-11"
+    assert len(_invoices(invoices)) == report["invoices"]
+
+
+def test_lines_without_buyer_are_billed_separately(tmp_path):
+    """Each buyer-less roster line gets its own invoice."""
+    roster = tmp_path / "padron.jsonl"
+    roster.write_text('{"plan": "Basic"}\n{"plan": "Student"}\n', encoding="utf-8")
+    invoices = tmp_path / "facturas.jsonl"
+    report = run_billing(str(roster), str(invoices))
+    assert report["invoices"] == 2
+    assert [invoice["items"] for invoice in _invoices(invoices)] == [1, 1]
+
+
+def test_malformed_roster_line_is_reported(tmp_path):
+    """Broken JSON raises ValueError with its byte offset."""
+    roster = tmp_path / "padron.jsonl"
+    roster.write_text('{"buyer": "A", "plan": "Basic"}\n{roto\n', encoding="utf-8")
+    with pytest.raises(ValueError, match="Byte 32"):
+        run_billing(str(roster), str(tmp_path / "facturas.jsonl"))
+    with pytest.raises(ValueError):
+        BillingRun(str(roster), str(tmp_path / "facturas.jsonl"), chunk_size=0)
+
+
+def test_bill_command(tmp_path, capsys):
+    """`main.py bill` reports every chunk and the billed total."""
+    roster = tmp_path / "padron.jsonl"
+    _write_roster(roster, 12)
+    invoices = tmp_path / "facturas.jsonl"
+    assert main(["bill", "-i", str(roster), "-o", str(invoices),
+                 "--chunk-size", "5", "--period", "2026-10"]) == 0
+    err = capsys.readouterr().err
+    assert err.count("Bloque ") == 3 and "ETA" in err
+    assert f"Facturas: {len(_invoices(invoices))} " in err
+    assert main(["bill", "-i", str(roster), "-o", str(invoices), "--period", "2026-11"]) == 1
+    assert "--restart" in capsys.readouterr().err
@@ -0,0 +1,188 @@
+"""Pruebas para los snapshots versionados del catálogo (`catalog.py`)."""
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from catalog import Catalog, CatalogStore, get_catalog
+from utils import check_feature_availability, check_plan_availability
+from models import Item, Buyer
+
+
+def _write_config(path, basic_cost, mtime=None):
+    """Write a config file with a given Basic plan cost."""
+    path.write_text(json.dumps({
+        "plan": {"Basic": {"benefits": "...", "cost": basic_cost}},
+        "additional_features": {"Personal Training": 30},
+        "premium_features": {"Exclusive Gym Facilities": 100},
+    }), encoding="utf-8")
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def test_catalog_snapshot_is_immutable():
+    """Neither the snapshot nor its maps can be modified."""
+    catalog = get_catalog()
+    with pytest.raises(AttributeError):
+        catalog.version = 99
+    with pytest.raises(TypeError):
+        catalog.plans["Gold"] = {"cost": 1}
+    with pytest.raises(TypeError):
+        Item.PLAN_AVAILABLE["Premium"] = False
+
+
+def test_store_reloads_only_when_file_changes(tmp_path):
+    """A new version is published when mtime/size change."""
+    config = tmp_path / "config.json"
+    _write_config(config, 25, mtime=1_000_000)
+    store = CatalogStore(str(config))
+    first = store.current()
+    assert first.version == 1 and first.plan_cost("Basic") == 25
+
+    assert store.refresh() is False
+    assert store.current() is first
+
+    _write_config(config, 35, mtime=2_000_000)
+    assert store.refresh() is True
+    second = store.current()
+    assert second.version == 2 and second.plan_cost("Basic") == 35
+    # El snapshot anterior no cambia
+    assert first.plan_cost("Basic") == 25
+
+
+def test_store_keeps_snapshot_when_file_is_invalid(tmp_path):
+    """A half-written config does not replace the current prices."""
+    config = tmp_path / "config.json"
+    _write_config(config, 25)
+    store = CatalogStore(str(config))
+    first = store.current()
+    config.write_text("{ invalid", encoding="utf-8")
+    assert store.refresh() is False
+    assert store.current() is first
+
+
+def test_background_reload(tmp_path):
+    """The watcher thread picks up a changed file."""
+    config = tmp_path / "config.json"
+    _write_config(config, 25, mtime=1_000_000)
+    store = CatalogStore(str(config))
+    store.current()
+    store.start_watching(interval=0.01)
+    try:
+        _write_config(config, 45, mtime=2_000_000)
+        deadline = time.monotonic() + 5
+        while store.current().version == 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        store.stop_watching()
+    assert store.current().plan_cost("Basic") == 45
+
+
+def test_buyer_prices_against_pinned_catalog():
+    """A Buyer prices with the snapshot it was created with."""
+    catalog = Catalog({"plan": {"Basic": {"benefits": "...", "cost": 100}}}, version=7)
+    buyer = Buyer([Item("Basic", ["Personal Training"], [])], catalog)
+    costs = buyer.calculate_costs()
+    assert costs["Basic"] == 130
+    assert buyer.catalog_version == 7
+
+
+def test_feature_index_is_built_per_snapshot(tmp_path):
+    """The lookup index is cached on the snapshot and rebuilt after a reload."""
+    config = tmp_path / "config.json"
+    _write_config(config, 25, mtime=1_000_000)
+    store = CatalogStore(str(config))
+    first = store.current()
+    index = first.feature_index()
+    assert index is first.feature_index()
+    assert index["personal training"] == ("Personal Training", "additional", 30)
+    assert index["exclusive gym facilities"] == ("Exclusive Gym Facilities", "premium", 100)
+
+    config.write_text(json.dumps({
+        "additional_features": {"Yoga": 10},
+        "premium_features": {},
+    }), encoding="utf-8")
+    os.utime(config, (2_000_000, 2_000_000))
+    store.refresh()
+    assert "personal training" not in store.current().feature_index()
+    assert store.current().feature_index()["yoga"] == ("Yoga", "additional", 10)
+
+
+@pytest.mark.parametrize("additional, premium", [
+    ({"Sauna": 10}, {"Sauna": 50}),
+    ({"Sauna": 10}, {"SAUNA": 50}),
+    ({"Sauna": 10, "sauna": 12}, {}),
+])
+def test_repeated_feature_names_are_rejected(tmp_path, additional, premium):
+    """A name in both sections would give the index and the prices two meanings."""
+    with pytest.raises(ValueError):
+        Catalog({"additional_features": additional, "premium_features": premium})
+    config = tmp_path / "config.json"
+    _write_config(config, 25)
+    store = CatalogStore(str(config))
+    first = store.current()
+    config.write_text(json.dumps({"additional_features": additional,
+                                  "premium_features": premium}), encoding="utf-8")
+    assert store.refresh(force=True) is False
+    assert store.current() is first
+
+
+def test_set_availability_publishes_a_copy(tmp_path):
+    """Toggling availability publishes a new version and survives reloads."""
+    config = tmp_path / "config.json"
+    _write_config(config, 25, mtime=1_000_000)
+    store = CatalogStore(str(config))
+    first = store.current()
+    second = store.set_availability(plans={"Basic": False},
+                                    features={"Personal Training": False})
+    assert store.current() is second and second.version == 2
+    assert first.plan_available == {} and second.plan_available == {"Basic": False}
+    assert second.feature_index() is first.feature_index()
+    assert check_plan_availability("Basic", second)[0] is False
+    assert check_feature_availability("Personal Training", second)[0] is False
+
+    _write_config(config, 35, mtime=2_000_000)
+    assert store.refresh() is True
+    assert store.current().plan_cost("Basic") == 35
+    assert store.current().plan_available == {"Basic": False}
+
+    with pytest.raises(ValueError):
+        store.set_availability(plans={"Gold": False})
+    with pytest.raises(ValueError):
+        store.set_availability(features={"Personal Training": "no"})
+    assert store.current().version == 3
+
+
+def test_concurrent_readers_never_see_torn_availability(tmp_path):
+    """Readers pricing in threads see each toggle entirely or not at all."""
+    config = tmp_path / "config.json"
+    _write_config(config, 25)
+    store = CatalogStore(str(config))
+    store.current()
+    stop = threading.Event()
+    torn = []
+
+    def reader():
+        while not stop.is_set():
+            catalog = store.current()
+            plan = check_plan_availability("Basic", catalog)[0]
+            feature = check_feature_availability("Personal Training", catalog)[0]
+            if plan != feature:
+                torn.append(catalog.version)
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    try:
+        for step in range(300):
+            value = step % 2 == 1
+            store.set_availability(plans={"Basic": value},
+                                   features={"Personal Training": value})
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    assert not torn
+    assert store.current().version == 301
@@ -0,0 +1,83 @@
+"""Pruebas para el núcleo de precios en céntimos enteros (`cents.py`)."""
+import random
+
+import models
+from catalog import Catalog
+from cents import apply_rate, apportion, to_cents
+from models import Item, Buyer, IncrementalBuyer, price_baskets
+
+# Precios con céntimos, donde la suma en float depende del orden
+ODD_CATALOG = Catalog({
+    "plan": {
+        "Basic": {"benefits": "...", "cost": 25.37},
+        "Premium": {"benefits": "...", "cost": 30.11},
+        "Family": {"benefits": "...", "cost": 40.09},
+    },
+    "additional_features": {"Group Classes": 20.13, "Personal Training": 30.07},
+    "premium_features": {"Exclusive Gym Facilities": 15.49},
+})
+
+
+def test_rounding_rules():
+    """Conversions and rates round half up to the cent."""
+    assert to_cents(19.995) == 2000
+    assert to_cents(0.125) == 13
+    assert to_cents(25) == 2500
+    assert apply_rate(12345, 1000) == 1235
+    assert apply_rate(12344, 1000) == 1234
+
+
+def test_apportion_largest_remainder():
+    """Shares add up exactly; leftover cents go to the largest remainders."""
+    assert apportion(100, {"a": 1, "b": 1, "c": 1}) == {"a": 34, "b": 33, "c": 33}
+    assert apportion(10, {"a": 1, "b": 2, "c": 0}) == {"a": 3, "b": 7, "c": 0}
+    assert apportion(5, {"a": 0, "b": 0}) == {"a": 0, "b": 0}
+    assert apportion(7, {"a": 3}) == {"a": 7}
+    rng = random.Random(3)
+    for _ in range(200):
+        weights = {key: rng.randint(0, 50000) for key in "abcd"}
+        amount = rng.randint(0, 10000)
+        if sum(weights.values()):
+            assert sum(apportion(amount, weights).values()) == amount
+
+
+def _odd_items(rng):
+    return [Item(rng.choice(["Basic", "Premium", "Family"]),
+                 rng.sample(["Group Classes", "Personal Training"], rng.randint(0, 2)),
+                 rng.sample(["Exclusive Gym Facilities"], rng.randint(0, 1)))
+            for _ in range(rng.randint(1, 8))]
+
+
+def test_totals_do_not_depend_on_item_order():
+    """Shuffling the items never changes costs, surcharge split or total."""
+    rng = random.Random(11)
+    for _ in range(100):
+        items = _odd_items(rng)
+        buyer = Buyer(items, ODD_CATALOG)
+        costs = buyer.calculate_costs()
+        total = buyer.sum_costs(costs)
+        shuffled = Buyer(rng.sample(items, len(items)), ODD_CATALOG)
+        assert shuffled.calculate_costs() == costs
+        assert shuffled.sum_costs(costs) == total
+        assert shuffled.premium_surcharge_breakdown == buyer.premium_surcharge_breakdown
+        assert round(sum(buyer.premium_surcharge_breakdown.values()), 2) == \
+            buyer.premium_surcharge_amount
+
+
+def test_incremental_and_batch_match_buyer_with_cent_prices(monkeypatch):
+    """Running subtotals and the NumPy batch agree with Buyer to the cent."""
+    monkeypatch.setattr(models, "get_catalog", lambda: ODD_CATALOG)
+    rng = random.Random(5)
+    baskets = [_odd_items(rng) for _ in range(50)]
+    result = price_baskets([
+        [(item.plan_name, item.additional_features, item.premium_membership_features)
+         for item in basket] for basket in baskets
+    ])
+    for idx, items in enumerate(baskets):
+        buyer = Buyer(items, ODD_CATALOG)
+        total = buyer.sum_costs(buyer.calculate_costs())
+        assert float(result.totals[idx]) == total
+        incremental = IncrementalBuyer(items, ODD_CATALOG)
+        incremental.remove(items[0])
+        incremental.add(items[0])
+        assert incremental.total() == total
@@ -0,0 +1,106 @@
+"""Pruebas para el formato columnar de compras (`columnar.py`)."""
+import json
+
+import numpy as np
+import pytest
+
+from analytics import aggregate_lines, build_report
+from cents import to_cents
+from columnar import ColumnarHistory, ColumnarWriter, write_records
+from main import main
+from tests.test_analytics import _history
+
+
+def test_round_trip_and_zero_copy(tmp_path):
+    """Columns come back as read-only views of the mapped file."""
+    path = str(tmp_path / "history.gcol")
+    with ColumnarWriter(path) as writer:
+        writer.add_purchase([("Basic", ["Group Classes"], []),
+                             ("Premium", [], ["Exclusive Gym Facilities"])],
+                            (55.0, 15.0, 0.0, 70.0), created_at=100)
+        writer.add_purchase([("Basic", [], [])], (25.0, 0.0, 0.0, 25.0))
+    with ColumnarHistory(path) as history:
+        assert len(history) == 2
+        assert history.plans == ["Basic", "Premium"]
+        assert history["total_cents"].tolist() == [7000, 2500]
+        assert history["item_offsets"].tolist() == [0, 2, 3]
+        assert history["plan_id"].tolist() == [0, 1, 0]
+        assert history["feature_mask"].tolist() == [1, 2, 0]
+        assert history["created_at"][0] == 100 and np.isnan(history["created_at"][1])
+        # Vista sin copia: los datos pertenecen al mmap y no se pueden escribir
+        assert not history["total_cents"].flags.owndata
+        with pytest.raises(ValueError):
+            history["total_cents"][0] = 1
+
+
+def test_amounts_use_the_cents_rounding(tmp_path):
+    """Half-cent amounts round half up, like the pricing engine."""
+    path = str(tmp_path / "history.gcol")
+    with ColumnarWriter(path) as writer:
+        writer.add_purchase([("Basic", [], [])], (0.125, 19.995, 2.675, 0.145))
+    with ColumnarHistory(path) as history:
+        assert history["subtotal_cents"].tolist() == [to_cents(0.125)] == [13]
+        assert history["surcharge_cents"].tolist() == [2000]
+        assert history["discount_cents"].tolist() == [268]
+        assert history["total_cents"].tolist() == [15]
+
+
+def test_summary_matches_jsonl_analytics(tmp_path):
+    """The vectorized summary agrees with the JSONL analytics report."""
+    jsonl = tmp_path / "history.jsonl"
+    _history(jsonl)
+    with open(jsonl, encoding="utf-8") as f:
+        expected = build_report(aggregate_lines(f, 10 ** 9))["total"]
+    with open(jsonl, encoding="utf-8") as f:
+        write_records((json.loads(line) for line in f), str(tmp_path / "h.gcol"))
+    with ColumnarHistory(str(tmp_path / "h.gcol")) as history:
+        summary = history.summary()
+    assert summary["purchases"] == expected["purchases"]
+    assert summary["revenue"] == expected["revenue"]
+    assert summary["premium_surcharge"] == expected["premium_surcharge"]
+    assert summary["plan_memberships"] == expected["plan_memberships"]
+    assert {feature: count / summary["memberships"]
+            for feature, count in summary["feature_attach"].items()} == \
+        pytest.approx(expected["feature_attach_rate"], abs=1e-4)
+
+
+def test_quantity_lines_are_one_row(tmp_path):
+    """A line with `quantity` is stored once and counted as its memberships."""
+    record = {"items": [{"plan": "Basic", "additional_features": ["Group Classes"],
+                         "quantity": 20000},
+                        {"plan": "Premium"}],
+              "costs": {}, "total": 1.0}
+    path = str(tmp_path / "history.gcol")
+    write_records([record], path)
+    with ColumnarHistory(path) as history:
+        assert history["quantity"].tolist() == [20000, 1]
+        assert history["item_offsets"].tolist() == [0, 2]
+        summary = history.summary()
+    assert summary["memberships"] == 20001
+    assert summary["plan_memberships"] == {"Basic": 20000, "Premium": 1}
+    assert summary["feature_attach"] == {"Group Classes": 20000}
+    with pytest.raises(ValueError):
+        with ColumnarWriter(str(tmp_path / "bad.gcol")) as writer:
+            writer.add_purchase([("Basic", [], [], 0)], (0, 0, 0, 0))
+
+
+def test_failed_write_publishes_nothing(tmp_path):
+    """An error inside the writer leaves no output file behind."""
+    path = tmp_path / "history.gcol"
+    with pytest.raises(ValueError):
+        with ColumnarWriter(str(path)) as writer:
+            writer.add_purchase([("Basic", [f"F{n}" for n in range(65)], [])],
+                                (0, 0, 0, 0))
+    assert not path.exists()
+    with pytest.raises(ValueError):
+        ColumnarHistory(__file__)
+
+
+def test_to_columnar_command(tmp_path):
+    """`main.py to-columnar` converts an exported history."""
+    jsonl = tmp_path / "history.jsonl"
+    _history(jsonl, days=1, per_day=3)
+    out = str(tmp_path / "history.gcol")
+    assert main(["to-columnar", "-i", str(jsonl), "-o", out]) == 0
+    with ColumnarHistory(out) as history:
+        assert len(history) == 3
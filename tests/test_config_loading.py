@@ -1,5 +1,11 @@
 """Pruebas para el `config_manager` y la carga opcional en `models.py`."""
 import importlib
+import json
+import os
+import subprocess
+import sys
+
+import main
 import models
 import config_manager
 
@@ -28,3 +34,60 @@ def test_models_apply_config():
     # Ahora Item.plan debería corresponder al plan definido en el config
     assert isinstance(models.Item.plan, dict)
     assert set(cfg['plan'].keys()) == set(models.Item.plan.keys())
+
+
+def test_load_config_uses_precompiled_cache(tmp_path):
+    """La caché se genera, se usa y se invalida al cambiar el JSON."""
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"plan": {"Basic": {"cost": 1}}}), encoding="utf-8")
+    os.utime(path, (1_000_000, 1_000_000))
+
+    assert config_manager.load_config(str(path))["plan"]["Basic"]["cost"] == 1
+    cache = tmp_path / ("config.json" + config_manager.CACHE_SUFFIX)
+    assert cache.exists()
+    assert config_manager.load_config(str(path))["plan"]["Basic"]["cost"] == 1
+
+    # Cambiar el JSON (mismo tamaño, otro mtime) invalida la caché
+    path.write_text(json.dumps({"plan": {"Basic": {"cost": 2}}}), encoding="utf-8")
+    os.utime(path, (2_000_000, 2_000_000))
+    assert config_manager.load_config(str(path))["plan"]["Basic"]["cost"] == 2
+
+
+def test_import_is_lazy():
+    """Importar `gym_membership` no lee el catálogo ni importa el menú."""
+    code = (
+        "import sys, gym_membership, catalog\n"
+        "print('menu' in sys.modules, 'numpy' in sys.modules,"
+        " catalog._store._catalog is None)\n"
+        "print(gym_membership.plan['Basic']['cost'] > 0, callable(gym_membership.menu))"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                         check=True, cwd=root, env=dict(os.environ, PYTHONPATH=root))
+    assert out.stdout.split() == ["False", "False", "True", "True", "True"]
+
+
+def test_quote_command_does_not_import_other_subcommands():
+    """`import main` no carga asyncio, SQLite ni los módulos de otros subcomandos."""
+    code = (
+        "import sys, main\n"
+        "print(sorted(name for name in ('asyncio', 'sqlite3', 'server', 'ledger', 'menu',"
+        " 'analytics', 'columnar', 'optimizer', 'billing', 'replay', 'sharding')"
+        " if name in sys.modules))"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                         check=True, cwd=root, env=dict(os.environ, PYTHONPATH=root))
+    assert out.stdout.strip() == "[]"
+
+
+def test_main_defaults_match_subcommand_modules():
+    """The defaults `main.py` keeps to avoid importing them match their modules."""
+    modules = {name: importlib.import_module(name)
+               for name in ("server", "analytics", "billing")}
+    assert main.DEFAULT_HOST == modules["server"].DEFAULT_HOST
+    assert main.DEFAULT_PORT == modules["server"].DEFAULT_PORT
+    assert main.DEFAULT_MAX_CONNECTIONS == modules["server"].DEFAULT_MAX_CONNECTIONS
+    assert main.ANALYTICS_WINDOWS == tuple(sorted(modules["analytics"].WINDOWS))
+    assert main.ANALYTICS_CHUNK_SIZE == modules["analytics"].DEFAULT_CHUNK_SIZE
+    assert main.BILLING_CHUNK_SIZE == modules["billing"].DEFAULT_CHUNK_SIZE
@@ -1,9 +1,14 @@
 """Unit tests for gym membership system."""
+import pytest
+
+from catalog import Catalog
 from gym_membership import (
     validar_plan, select_features, get_plan_cost,
     show_options, plan, Item, Buyer
 )
-from utils import validate_plan_availability, validate_feature_availability
+from utils import (
+    validate_plan_availability, validate_feature_availability, classify_features
+)
 from menu import menu
 
 
@@ -24,6 +29,15 @@ def test_select_features():
     assert any(i.lower() == "unknown" for i in invalid)
 
 
+def test_classify_features():
+    """Features are validated and split into normal and premium in one pass."""
+    normal, premium, invalid = classify_features(
+        [" exclusive gym facilities", "Personal Training", "unknown", "", "GROUP CLASSES"])
+    assert normal == ["Personal Training", "Group Classes"]
+    assert premium == ["Exclusive Gym Facilities"]
+    assert invalid == ["unknown"]
+
+
 def test_get_plan_cost():
     """Test getting plan cost by name."""
     assert get_plan_cost("Basic") == plan["Basic"]["cost"]
@@ -38,6 +52,25 @@ def test_show_options_outputs(capsys):
     assert "ADDITIONAL FEATURES" in captured.out
 
 
+def test_show_options_names_the_configured_premium_rules():
+    """The premium header follows the catalog's pricing rules."""
+    lines = []
+    show_options(lines.append)
+    assert "\n--- PREMIUM MEMBERSHIP FEATURES (15% surcharge applied) ---" in lines
+
+    catalog = Catalog({"pricing_rules": [
+        {"type": "percentage", "effect": "surcharge", "when": "premium", "percent": 12.5},
+        {"type": "fixed", "effect": "surcharge", "when": "premium", "amount": 3},
+        {"type": "fixed", "effect": "discount", "amount": 5}]})
+    lines = []
+    show_options(lines.append, catalog)
+    assert ("\n--- PREMIUM MEMBERSHIP FEATURES (12.5% surcharge, $3 surcharge applied) ---"
+            in lines)
+    lines = []
+    show_options(lines.append, Catalog({"pricing_rules": []}))
+    assert "\n--- PREMIUM MEMBERSHIP FEATURES ---" in lines
+
+
 def test_apply_special_discount():
     """Test special discount application on Buyer."""
     buyer = Buyer([])
@@ -369,3 +402,34 @@ def test_premium_surcharge_breakdown_computes_proportionally():
 
     # Los valores deberían ser proporcionales: en este caso sólo 'Family' tiene coste
     assert breakdown.get('Family', 0) == expected_surcharge
+
+
+def test_quote_is_immutable_and_leaves_buyer_untouched():
+    """Buyer.quote prices once, matches sum_costs and stores nothing on the buyer."""
+    items = [Item("Family", [], ["Specialized Training Programs"]),
+             Item("Family", [], ["Specialized Training Programs"])]
+    buyer = Buyer(items)
+    quote = buyer.quote()
+    assert buyer.premium_surcharge_amount == 0.0 and not buyer.premium_surcharge_breakdown
+    assert (quote.subtotal, quote.premium_surcharge, quote.special_discount) == (216.0, 32.4, 20.0)
+    assert quote.premium_surcharge_breakdown["Family"] == 32.4
+
+    reference = Buyer(items)
+    assert quote.total == reference.sum_costs(reference.calculate_costs())
+    assert quote == Buyer(list(reversed(items))).quote()
+    assert hash(quote) == hash(Buyer(items).quote())
+    with pytest.raises(AttributeError):
+        quote.total = 0
+
+
+def test_menu_summary_prices_once(monkeypatch, capsys):
+    """The summary renders the quote instead of calling sum_costs again."""
+    def fail(*_args):
+        raise AssertionError("sum_costs no debería llamarse")
+    monkeypatch.setattr(Buyer, "sum_costs", fail)
+    inputs = iter(["Family", "Specialized Training Programs", "1",
+                   "Family", "Specialized Training Programs", "2", "1"])
+    monkeypatch.setattr('builtins.input', lambda _: next(inputs))
+    assert menu() == 228.4
+    out = capsys.readouterr().out
+    assert "Subtotal: $216.00" in out and "TOTAL A PAGAR: $228.40" in out
@@ -0,0 +1,77 @@
+"""Pruebas para `IncrementalBuyer`: totales actualizados al agregar/quitar."""
+import random
+
+import pytest
+
+from models import Item, Buyer, IncrementalBuyer
+
+
+def _buyer_result(items):
+    """Price `items` with the classic Buyer."""
+    buyer = Buyer(list(items))
+    costs = buyer.calculate_costs()
+    total = buyer.sum_costs(costs)
+    return costs, total, buyer
+
+
+def test_incremental_buyer_matches_buyer_after_each_change():
+    """Random adds/removes always match a freshly built Buyer."""
+    rng = random.Random(11)
+    plans = list(Item.plan)
+    additional = list(Item.ADDITIONAL_FEATURES)
+    premium = list(Item.PREMIUM_FEATURES)
+    incremental = IncrementalBuyer()
+    current = []
+    for _ in range(300):
+        if current and rng.random() < 0.4:
+            item = current.pop(rng.randrange(len(current)))
+            incremental.remove(item)
+        else:
+            item = Item(rng.choice(plans), rng.sample(additional, rng.randint(0, 2)),
+                        rng.sample(premium, rng.randint(0, 1)))
+            current.append(incremental.add(item))
+
+        costs, total, buyer = _buyer_result(current)
+        assert incremental.total() == total
+        assert incremental.calculate_costs() == costs
+        assert incremental.has_premium_features() == buyer.has_premium_features()
+        assert incremental.premium_surcharge_amount == buyer.premium_surcharge_amount
+        assert incremental.premium_surcharge_breakdown == buyer.premium_surcharge_breakdown
+        assert incremental.special_discount_amount == buyer.special_discount_amount
+        assert len(incremental) == len(current)
+
+
+def test_incremental_buyer_group_discount_and_surcharge():
+    """Two Family plans: group discount, surcharge and special discount."""
+    incremental = IncrementalBuyer([Item("Family", [], ["Specialized Training Programs"])])
+    second = incremental.add(Item("Family", [], ["Specialized Training Programs"]))
+    assert incremental.calculate_costs()["Family"] == 216.0
+    assert round(incremental.total(), 2) == 228.4
+
+    incremental.remove(second)
+    assert incremental.count_membership() == {"Family": 1}
+    assert incremental.total() == 138.0  # 120 + 15% de recargo
+
+
+def test_incremental_buyer_accepts_the_same_item_twice():
+    """`IncrementalBuyer([item] * n)` prices like `Buyer([item] * n)`."""
+    item = Item("Premium", ["Access to Pool"], [])
+    incremental = IncrementalBuyer([item] * 3)
+    assert incremental.total() == Buyer([item] * 3).quote().total
+    assert incremental.count_membership() == {"Premium": 3}
+
+    incremental.remove(item)
+    assert incremental.total() == Buyer([item] * 2).quote().total
+    assert incremental.items == [item, item]
+    incremental.remove(item)
+    incremental.remove(item)
+    with pytest.raises(ValueError):
+        incremental.remove(item)
+    assert len(incremental) == 0
+
+
+def test_incremental_buyer_rejects_unknown_items():
+    """Removing an item that was never added raises ValueError."""
+    incremental = IncrementalBuyer()
+    with pytest.raises(ValueError):
+        incremental.remove(Item("Basic", [], []))
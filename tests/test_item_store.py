@@ -0,0 +1,76 @@
+"""Pruebas para el almacén de membresías en arrays (`item_store.py`)."""
+import random
+
+import pytest
+
+from benchmarks.bench_item_store import build_items, build_store, make_lines, measure
+from catalog import Catalog
+from item_store import ItemStore, ItemView
+from ledger import record_from_quote
+from models import Item, Buyer
+
+
+def test_views_behave_like_items():
+    """Views expose the Item attributes and price like the original items."""
+    items = [Item("Family", ["Group Classes", "Personal Training"], [], 3),
+             Item("Basic", [], ["Exclusive Gym Facilities"])]
+    store = ItemStore.from_items(items)
+    assert len(store) == 2
+    view = store[-1]
+    assert isinstance(view, ItemView)
+    assert (view.plan_name, view.premium_membership_features, view.quantity) == \
+        ("Basic", ["Exclusive Gym Facilities"], 1)
+    assert sorted(store[0].additional_features) == ["Group Classes", "Personal Training"]
+    assert Buyer(list(store)).quote() == Buyer(items).quote()
+    assert record_from_quote(store, store.quote())["items"][0]["quantity"] == 3
+    with pytest.raises(IndexError):
+        store[2]  # pylint: disable=pointless-statement
+    with pytest.raises(AttributeError):
+        view.plan_name = "Premium"
+
+
+def test_quote_from_columns_matches_buyer():
+    """Pricing straight over the arrays gives Buyer's quote, with and without NumPy."""
+    rng = random.Random(22)
+    for _ in range(50):
+        lines = make_lines(rng.randint(1, 60), rng.randint(0, 10_000))
+        items = [Item(plan, additional, premium, rng.randint(1, 5))
+                 for plan, additional, premium in lines]
+        store = ItemStore.from_items(items)
+        expected = Buyer(items).quote()
+        assert store.quote() == expected
+        counts, subtotals, has_premium = getattr(store, "_totals")()
+        assert (counts, subtotals, has_premium) == getattr(store, "_totals_with_numpy")()
+
+
+def test_large_catalog_without_price_table():
+    """Catalogs too large for the table use 64-bit masks and per-feature sums."""
+    catalog = Catalog({"plan": {"Basic": {"benefits": "", "cost": 25}},
+                       "additional_features": {f"F{n}": n for n in range(40)},
+                       "premium_features": {"VIP": 100}})
+    assert not catalog.price_table().has_table
+    items = [Item("Basic", ["F1", "F39"], ["VIP"], 2), Item("Basic", ["F7"], [])]
+    store = ItemStore.from_items(items, catalog)
+    assert store.additional_masks.itemsize == 8
+    assert store.quote() == Buyer(items, catalog).quote()
+
+
+@pytest.mark.parametrize("line", [
+    ("Gold", [], []),
+    ("Basic", ["Free Massage"], []),
+    ("Basic", ["Group Classes", "Group Classes"], []),
+    ("Basic", ["Group Classes"], ["Group Classes"]),
+])
+def test_rejects_lines_it_cannot_encode(line):
+    """Unknown plans or features and repeated features raise ValueError."""
+    with pytest.raises(ValueError):
+        ItemStore().append(*line)
+
+
+def test_uses_ten_times_less_memory_than_items():
+    """The columns take at least 10x less memory than Item objects."""
+    lines = make_lines(20_000)
+    _items, items_bytes = measure(build_items, lines)
+    store, store_bytes = measure(build_store, lines)
+    assert store.nbytes() <= store_bytes
+    assert items_bytes >= 10 * store_bytes
@@ -0,0 +1,139 @@
+"""Pruebas para el registro de compras en SQLite (`ledger.py`)."""
+import json
+import sqlite3
+import threading
+from unittest import mock
+
+import pytest
+
+from ledger import Ledger, LedgerError, connect, read_purchases, record_from_quote
+from main import main
+from menu import menu
+from models import Item, Buyer
+
+
+def _record():
+    items = [Item("Premium", ["Personal Training"], ["Exclusive Gym Facilities"]),
+             Item("Premium", [], [])]
+    return record_from_quote(items, Buyer(items).quote(), buyer_id="C-1")
+
+
+def test_record_and_read_back(tmp_path):
+    """A stored purchase keeps its items and price breakdown."""
+    record = _record()
+    with Ledger(str(tmp_path / "ledger.db")) as ledger:
+        purchase_id = ledger.record_purchase(record)
+        stored = ledger.get_purchase(purchase_id)
+        assert ledger.get_purchase(purchase_id + 1) is None
+    assert stored["items"] == record["items"]
+    assert stored["costs"] == record["costs"]
+    assert stored["premium_surcharge_breakdown"] == record["premium_surcharge_breakdown"]
+    assert stored["total"] == record["total"]
+    conn = sqlite3.connect(str(tmp_path / "ledger.db"))
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_concurrent_confirmations_are_grouped(tmp_path):
+    """Purchases confirmed from many threads share commits and all get stored."""
+    record = _record()
+    ids = []
+    with Ledger(str(tmp_path / "ledger.db")) as ledger:
+        def confirm():
+            for _ in range(50):
+                ids.append(ledger.record_purchase(record))
+
+        threads = [threading.Thread(target=confirm) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert ledger.count() == 400
+        assert ledger.stats["purchases"] == 400
+        assert ledger.stats["commits"] <= 400
+    assert sorted(ids) == list(range(1, 401))
+
+
+def test_invalid_record_is_rejected(tmp_path):
+    """Records without items or total are refused before reaching the writer."""
+    with Ledger(str(tmp_path / "ledger.db")) as ledger:
+        with pytest.raises(ValueError):
+            ledger.submit({"items": [], "total": 1})
+        with pytest.raises(ValueError):
+            ledger.submit({"items": [{"plan": "Basic"}]})
+    with pytest.raises(ValueError):
+        ledger.submit(_record())
+
+
+def test_unserializable_record_does_not_stop_the_writer(tmp_path):
+    """A record that cannot be stored is refused and later purchases still commit."""
+    with Ledger(str(tmp_path / "ledger.db")) as ledger:
+        with pytest.raises(ValueError):
+            ledger.submit({"items": [{"plan": "Basic", "additional_features": {"x"}}],
+                           "total": 1.0})
+        with pytest.raises(ValueError):
+            ledger.submit({"buyer": {"id": 1}, "items": [{"plan": "Basic"}], "total": 1.0})
+        assert ledger.submit(_record()).result(timeout=3) == 1
+
+
+def test_failed_group_commit_resolves_every_future(tmp_path, monkeypatch):
+    """Any error inside a group commit fails its futures and keeps the writer alive."""
+    failures = [RuntimeError("fallo al escribir")]
+
+    def failing_connect(path, synchronous="FULL"):
+        # Conexión real cuyo primer INSERT de una compra falla
+        conn = connect(path, synchronous)
+
+        def execute(sql, *args):
+            if sql.startswith("INSERT INTO purchases") and failures:
+                raise failures.pop()
+            return conn.execute(sql, *args)
+
+        return mock.Mock(wraps=conn, execute=mock.Mock(side_effect=execute))
+
+    monkeypatch.setattr("ledger.connect", failing_connect)
+    with Ledger(str(tmp_path / "ledger.db")) as ledger:
+        with pytest.raises(LedgerError) as failed:
+            ledger.record_purchase(_record(), timeout=3)
+        assert isinstance(failed.value.__cause__, RuntimeError)
+        assert ledger.record_purchase(_record(), timeout=3) == 1
+        assert ledger.count() == 1
+
+
+def test_bulk_import_prices_records_without_total(tmp_path):
+    """Historical purchases keep their totals; those without one are priced."""
+    lines = [
+        json.dumps({"buyer": "A", "items": [{"plan": "Basic"}], "total": 99.0}),
+        "",
+        json.dumps({"buyer": "B", "items": [{"plan": "basic",
+                                             "additional_features": ["group classes"]}]}),
+    ]
+    with Ledger(str(tmp_path / "ledger.db")) as ledger:
+        ledger.record_purchase(_record())
+        assert ledger.bulk_import(read_purchases(lines)) == 2
+        assert ledger.get_purchase(2)["total"] == 99.0
+        priced = ledger.get_purchase(3)
+    assert priced["total"] == 45
+    assert priced["items"][0]["additional_features"] == ["Group Classes"]
+
+    with pytest.raises(ValueError, match="Línea 1"):
+        list(read_purchases([json.dumps({"items": [{"plan": "Gold"}]})]))
+
+
+def test_menu_records_confirmed_purchase(monkeypatch, tmp_path):
+    """The menu stores the purchase when the user confirms it."""
+    inputs = iter(["Basic", "", "2", "1"])
+    monkeypatch.setattr("builtins.input", lambda _prompt="": next(inputs))
+    with Ledger(str(tmp_path / "ledger.db")) as ledger:
+        total = menu(ledger)
+        assert ledger.count() == 1
+        assert ledger.get_purchase(1)["total"] == total
+
+
+def test_import_purchases_command(tmp_path):
+    """`main.py import-purchases` loads a JSONL file into the ledger."""
+    source = tmp_path / "history.jsonl"
+    source.write_text(json.dumps({"items": [{"plan": "Student"}]}) + "\n", encoding="utf-8")
+    db = str(tmp_path / "ledger.db")
+    assert main(["import-purchases", "-i", str(source), "--ledger", db]) == 0
+    with Ledger(db) as ledger:
+        assert ledger.get_purchase(1)["total"] == 20
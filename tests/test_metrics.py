@@ -0,0 +1,101 @@
+"""Pruebas para la instrumentación opcional de las etapas de cálculo (`metrics.py`)."""
+import json
+
+import pytest
+
+import metrics
+from main import main
+from models import Item, Buyer
+
+
+@pytest.fixture(autouse=True)
+def _clean_registry():
+    metrics.reset()
+    yield
+    metrics.disable()
+    metrics.reset()
+
+
+def _price():
+    buyer = Buyer([Item("Premium", ["Personal Training"], []),
+                   Item("Basic", [], ["Exclusive Gym Facilities"])])
+    return buyer.sum_costs(buyer.calculate_costs())
+
+
+def test_disabled_by_default_records_nothing():
+    """Without enable() the original functions run and nothing is recorded."""
+    original = Buyer.__dict__["calculate_costs"]
+    _price()
+    assert not metrics.is_enabled()
+    assert not metrics.snapshot()["stages"]
+    assert Buyer.__dict__["calculate_costs"] is original
+
+
+def test_enable_records_stages_and_disable_restores():
+    """Every stage is counted while enabled and the originals come back after."""
+    original = Buyer.__dict__["calculate_costs"]
+    expected = _price()
+    with metrics.instrumentation():
+        assert _price() == expected
+    stages = metrics.snapshot()["stages"]
+    assert stages["calculate_costs"]["count"] == 1
+    # Los costos se agregan en una sola pasada, sin count_membership
+    assert "count_membership" not in stages
+    assert stages["sum_costs"]["count"] == 1
+    assert stages["pricing_rules"]["count"] == 1
+    # Los pasos de settle se miden por separado
+    assert stages["surcharge"]["count"] == 1
+    assert stages["special_discount"]["count"] == 1
+    assert stages["surcharge_apportion"]["count"] == 1
+    assert stages["item_cost"]["count"] == 2
+    assert stages["sum_costs"]["buckets"]["+Inf"] == 1
+    assert Buyer.__dict__["calculate_costs"] is original
+    assert not metrics.is_enabled()
+
+
+def test_membership_counting_is_still_a_stage():
+    """Callers of `count_membership` (menu, fallback) are timed as a stage."""
+    with metrics.instrumentation():
+        counts = Buyer([Item("Basic", [], []), Item("Basic", [], [])]).count_membership()
+    assert counts == {"Basic": 2}
+    assert metrics.snapshot()["stages"]["count_membership"]["count"] == 1
+
+
+def test_group_discount_is_a_stage():
+    """Each plan bought more than once times one group discount."""
+    with metrics.instrumentation():
+        costs = Buyer([Item("Basic", [], []), Item("Basic", [], []),
+                       Item("Premium", [], [])]).calculate_costs()
+    assert costs == {"Basic": 45.0, "Premium": 30.0}
+    assert metrics.snapshot()["stages"]["group_discount"]["count"] == 1
+
+
+def test_errors_are_counted():
+    """A stage that raises is recorded as an error."""
+    metrics.enable()
+    with pytest.raises(TypeError):
+        Buyer(None).calculate_costs()
+    assert metrics.snapshot()["stages"]["calculate_costs"]["errors"] == 1
+
+
+def test_prometheus_export():
+    """The text export has cumulative buckets, sum, count and errors per stage."""
+    with metrics.instrumentation():
+        _price()
+    text = metrics.to_prometheus()
+    assert "# TYPE gym_pricing_stage_seconds histogram" in text
+    assert 'gym_pricing_stage_seconds_bucket{stage="calculate_costs",le="+Inf"} 1' in text
+    assert 'gym_pricing_stage_seconds_count{stage="sum_costs"} 1' in text
+    assert 'gym_pricing_stage_errors_total{stage="sum_costs"} 0' in text
+
+
+def test_quote_command_writes_metrics(tmp_path):
+    """`quote --metrics` writes the JSON snapshot and turns instrumentation off."""
+    orders = tmp_path / "orders.jsonl"
+    orders.write_text(json.dumps({"buyer": "a", "plan": "Basic"}) + "\n", encoding="utf-8")
+    out = tmp_path / "metrics.json"
+    assert main(["quote", "-i", str(orders), "-o", str(tmp_path / "q.jsonl"),
+                 "--metrics", str(out)]) == 0
+    data = json.loads(out.read_text(encoding="utf-8"))
+    assert data["stages"]["quote"]["count"] == 1
+    assert not metrics.is_enabled()
@@ -0,0 +1,107 @@
+"""Pruebas para la búsqueda de la cesta más barata (`optimizer.py`)."""
+import itertools
+import json
+
+import pytest
+
+from catalog import Catalog, get_catalog
+from main import main
+from models import Buyer, Item
+from optimizer import BasketOptimizer, cheapest_basket
+
+# Catálogo pequeño con tramos por plan y descuentos escalonados cercanos
+CATALOG = Catalog({
+    "plan": {"A": {"benefits": "", "cost": 25}, "B": {"benefits": "", "cost": 33.5},
+             "C": {"benefits": "", "cost": 48}},
+    "additional_features": {"X": 15, "Y": 22.25},
+    "premium_features": {"P": 60},
+    "pricing_rules": [
+        {"type": "quantity_discount", "breaks": [{"min_quantity": 2, "percent": 10}],
+         "plans": {"C": [{"min_quantity": 2, "percent": 12},
+                         {"min_quantity": 3, "percent": 30}]}},
+        {"type": "percentage", "effect": "surcharge", "when": "premium", "percent": 15},
+        {"type": "tiered", "effect": "discount",
+         "tiers": [{"above": 100, "amount": 20}, {"above": 150, "amount": 45},
+                   {"above": 260, "percent": 20}]},
+    ],
+})
+
+
+def _brute_force(catalog, members, required, extras):
+    """Lowest Buyer total over every multiset of (plan, features) memberships."""
+    optimizer = BasketOptimizer(catalog)
+    optional = [name for name in optimizer.features if name not in required] if extras else []
+    memberships = []
+    for plan_name in optimizer.plans:
+        for size in range(len(optional) + 1):
+            for chosen in itertools.combinations(optional, size):
+                names = list(required) + list(chosen)
+                memberships.append(Item(
+                    plan_name, [name for name in names if name not in catalog.premium_features],
+                    [name for name in names if name in catalog.premium_features]))
+    return min(Buyer(list(basket), catalog).quote().total
+               for basket in itertools.combinations_with_replacement(memberships, members))
+
+
+@pytest.mark.parametrize("required", [(), ("X",), ("P",), ("X", "Y")])
+@pytest.mark.parametrize("extras", [False, True])
+def test_matches_brute_force(required, extras):
+    """The basket found costs exactly the cheapest Buyer total of all baskets."""
+    optimizer = BasketOptimizer(CATALOG)
+    for members in range(1, 5):
+        basket = optimizer.cheapest(members, required, extras)
+        assert basket.quote.total == _brute_force(CATALOG, members, required, extras)
+        assert Buyer(basket.items, CATALOG).quote() == basket.quote
+        assert sum(item.quantity for item in basket.items) == members
+        for item in basket.items:
+            names = item.additional_features + item.premium_membership_features
+            assert set(required) <= set(names)
+            assert extras or len(names) == len(required)
+
+
+def test_extras_that_cross_a_discount_threshold():
+    """An extra $15 feature lifts the total over $200 and saves $20."""
+    required = ["Specialized Program", "Exclusive Gym Facilities"]
+    plain = cheapest_basket(1, required, extras=False)
+    basket = cheapest_basket(1, required)
+    assert plain.quote.total == 184.0
+    assert basket.quote.total == 181.25 == _brute_force(get_catalog(), 1, required, True)
+    assert basket.items[0].additional_features == ["Access to Pool", "Specialized Program"]
+
+
+def test_only_available_plans_and_features():
+    """Unavailable plans are never chosen; unknown or unavailable features raise."""
+    catalog = get_catalog()
+    catalog = catalog.with_availability({"Student": False}, {"Group Classes": False},
+                                        catalog.version + 1)
+    basket = cheapest_basket(3, ["personal training"], catalog=catalog)
+    assert basket.features == ("Personal Training",)
+    assert [item.plan_name for item in basket.items] == ["Basic"]
+    with pytest.raises(ValueError):
+        cheapest_basket(2, ["Group Classes"], catalog=catalog)
+    with pytest.raises(ValueError):
+        cheapest_basket(2, ["Sauna"], catalog=catalog)
+    with pytest.raises(ValueError):
+        cheapest_basket(0, catalog=catalog)
+
+
+def test_results_are_memoized_per_snapshot():
+    """The same request on the same snapshot returns the cached basket."""
+    first = cheapest_basket(5, ["Group Classes"])
+    assert cheapest_basket(5, ["group classes"]) is first
+    catalog = get_catalog()
+    copy = catalog.with_availability({}, {}, catalog.version + 1)
+    assert cheapest_basket(5, ["Group Classes"], catalog=copy) is not first
+
+
+def test_optimize_command(tmp_path, capsys):
+    """`main.py optimize` writes the basket and its quote as JSON."""
+    target = tmp_path / "cesta.json"
+    assert main(["optimize", "--members", "4", "-f", "Personal Training",
+                 "--no-extras", "-o", str(target)]) == 0
+    result = json.loads(target.read_text(encoding="utf-8"))
+    assert result["items"] == [{"plan": "Student", "additional_features": ["Personal Training"],
+                                "premium_features": [], "quantity": 4}]
+    assert result["total"] == 180.0
+    assert "Total: $180.00" in capsys.readouterr().err
+    assert main(["optimize", "--members", "2", "-f", "Sauna"]) == 1
@@ -0,0 +1,108 @@
+"""Pruebas para el pipeline JSONL de cotizaciones y el subcomando `quote`."""
+import io
+import json
+
+from main import main
+from models import Item, Buyer
+from pipeline import quote_stream
+from sharding import find_shard_boundaries
+
+
+def _lines(*orders):
+    """Serialize order dicts as JSONL lines."""
+    return [json.dumps(order) + "\n" for order in orders]
+
+
+def test_quote_stream_groups_consecutive_lines_by_buyer():
+    """Consecutive lines of one buyer are priced as a single purchase."""
+    lines = _lines(
+        {"buyer": "A", "plan": "Family", "premium_features": ["Specialized Training Programs"]},
+        {"buyer": "A", "plan": "family", "premium_features": ["specialized training programs"]},
+        {"buyer": "B", "plan": "Basic", "additional_features": ["Personal Training"]},
+    )
+    results = list(quote_stream(lines))
+    assert [r["buyer"] for r in results] == ["A", "B"]
+
+    buyer = Buyer([Item("Family", [], ["Specialized Training Programs"])] * 2)
+    expected_total = buyer.sum_costs(buyer.calculate_costs())
+    assert results[0]["items"] == 2
+    assert results[0]["total"] == expected_total
+    assert results[0]["special_discount"] == 20.0
+    assert results[1]["total"] == 55
+
+
+def test_lines_without_buyer_are_separate_purchases():
+    """Consecutive buyer-less lines are not merged into one purchase."""
+    lines = _lines({"plan": "Basic"}, {"plan": "Basic"},
+                   {"buyer": "A", "plan": "Basic"}, {"buyer": "A", "plan": "Basic"})
+    results = list(quote_stream(lines))
+    assert [(r["buyer"], r["items"]) for r in results] == [(None, 1), (None, 1), ("A", 2)]
+    assert results[0]["total"] == Buyer([Item("Basic", [], [])]).quote().total
+
+
+def test_quote_stream_reports_invalid_plan_and_features():
+    """Invalid plans produce an error record; invalid features are listed."""
+    lines = _lines(
+        {"buyer": "A", "plan": "Gold"},
+        {"buyer": "B", "plan": "Basic", "additional_features": ["Free Massage"]},
+    )
+    results = list(quote_stream(lines))
+    assert "error" in results[0]
+    assert results[1]["invalid_features"] == ["Free Massage"]
+    assert results[1]["total"] == 25
+
+
+def test_main_quote_subcommand(tmp_path, capsys):
+    """`main.py quote` reads and writes JSONL files."""
+    source = tmp_path / "orders.jsonl"
+    target = tmp_path / "quotes.jsonl"
+    source.write_text("".join(_lines(
+        {"buyer": "A", "plan": "Premium"},
+        {"buyer": "B", "plan": "Student"},
+    )), encoding="utf-8")
+
+    assert main(["quote", "-i", str(source), "-o", str(target)]) == 0
+    results = [json.loads(line) for line in io.StringIO(target.read_text(encoding="utf-8"))]
+    assert [r["total"] for r in results] == [30.0, 20.0]
+    assert "Compras procesadas: 2" in capsys.readouterr().err
+
+
+def _write_orders(path, n_buyers):
+    """Write an order file where each buyer has 1 to 3 lines."""
+    plans = ["Basic", "Premium", "Student", "Family"]
+    orders = []
+    for idx in range(n_buyers):
+        for line in range(idx % 3 + 1):
+            orders.append({
+                "buyer": f"C-{idx}",
+                "plan": plans[(idx + line) % 4],
+                "premium_features": ["Exclusive Gym Facilities"] if idx % 5 == 0 else [],
+            })
+    path.write_text("".join(_lines(*orders)), encoding="utf-8")
+
+
+def test_shard_boundaries_never_split_a_buyer(tmp_path):
+    """Each shard starts on the first line of a buyer."""
+    source = tmp_path / "orders.jsonl"
+    _write_orders(source, 200)
+    shards = find_shard_boundaries(str(source), 7)
+    data = source.read_bytes()
+    assert shards[0][0] == 0 and shards[-1][1] == len(data)
+    for (_, end), (start, _) in zip(shards, shards[1:]):
+        assert end == start
+        previous = json.loads(data[:start].splitlines()[-1])
+        current = json.loads(data[start:].splitlines()[0])
+        assert previous["buyer"] != current["buyer"]
+
+
+def test_sharded_quote_matches_sequential(tmp_path, capsys):
+    """`--workers` produces the same output, in the same order."""
+    source = tmp_path / "orders.jsonl"
+    sequential = tmp_path / "sequential.jsonl"
+    sharded = tmp_path / "sharded.jsonl"
+    _write_orders(source, 300)
+
+    assert main(["quote", "-i", str(source), "-o", str(sequential)]) == 0
+    assert main(["quote", "-i", str(source), "-o", str(sharded), "--workers", "3"]) == 0
+    assert sharded.read_text(encoding="utf-8") == sequential.read_text(encoding="utf-8")
+    assert "Throughput" in capsys.readouterr().err
@@ -0,0 +1,74 @@
+"""Pruebas para la agregación de costos por cualquier plan del catálogo."""
+import random
+
+from catalog import Catalog
+from item_store import ItemStore
+from models import Item, Buyer, IncrementalBuyer, _price_baskets_with_buyer, \
+    _price_baskets_with_numpy
+
+# Cientos de planes por sede, además de los cuatro de siempre
+LOCATION_PLANS = {f"Sede {n:03d}": {"benefits": "", "cost": 20 + n % 17} for n in range(300)}
+CATALOG = Catalog({
+    "plan": {"Basic": {"benefits": "", "cost": 25}, **LOCATION_PLANS},
+    "additional_features": {"Personal Training": 30, "Group Classes": 15},
+    "premium_features": {"Exclusive Gym Facilities": 100},
+})
+
+
+def _random_lines(rng, n_lines):
+    plans = list(CATALOG.plans) + ["Gold"]
+    return [(rng.choice(plans), rng.sample(["Personal Training", "Group Classes"],
+                                           rng.randint(0, 2)),
+             ["Exclusive Gym Facilities"] if rng.random() < 0.2 else [])
+            for _ in range(n_lines)]
+
+
+def test_config_plans_are_priced_with_group_discount():
+    """Plans beyond the built-in four cost money and get their own group discount."""
+    items = [Item("Sede 007", ["Personal Training"], []),
+             Item("Sede 007", [], []),
+             Item("Sede 250", [], []),
+             Item("Gold", [], [])]
+    buyer = Buyer(items, CATALOG)
+    costs = buyer.calculate_costs()
+    # Sede 007: (27 + 30) + 27 = 84, con 10% de descuento; Sede 250: 32
+    assert costs == {"Sede 007": 75.6, "Sede 250": 32.0}
+    assert buyer.sum_costs(costs) == 107.6
+    assert buyer.count_membership() == {"Sede 007": 2, "Sede 250": 1, "Gold": 1}
+
+
+def test_costs_do_not_depend_on_item_order():
+    """The breakdown lists plans in catalog order whatever the item order."""
+    rng = random.Random(23)
+    for _ in range(100):
+        lines = _random_lines(rng, rng.randint(0, 30))
+        items = [Item(plan, additional, premium) for plan, additional, premium in lines]
+        shuffled = items[:]
+        rng.shuffle(shuffled)
+        quote = Buyer(items, CATALOG).quote()
+        assert Buyer(shuffled, CATALOG).quote() == quote
+        assert list(quote.costs) == [plan for plan in CATALOG.plans if plan in quote.costs]
+
+
+def test_every_pricing_path_agrees():
+    """Incremental, batch and columnar pricing match Buyer for many plans."""
+    rng = random.Random(230)
+    baskets = [_random_lines(rng, rng.randint(0, 12)) for _ in range(200)]
+    expected = []
+    for basket in baskets:
+        items = [Item(plan, additional, premium) for plan, additional, premium in basket]
+        buyer = Buyer(items, CATALOG)
+        expected.append((buyer.calculate_costs(), buyer.quote()))
+        incremental = IncrementalBuyer(catalog=CATALOG)
+        for item in items:
+            incremental.add(item)
+        for item in items[::2]:
+            incremental.remove(item)
+        assert incremental.quote() == Buyer(items[1::2], CATALOG).quote()
+        known = [item for item in items if item.plan_name in CATALOG.plans]
+        assert ItemStore.from_items(known, CATALOG).quote().costs == buyer.quote().costs
+    for batch in (_price_baskets_with_numpy(baskets, CATALOG),
+                  _price_baskets_with_buyer(baskets, CATALOG)):
+        for idx, (costs, quote) in enumerate(expected):
+            assert batch.basket_costs(idx) == costs
+            assert float(batch.totals[idx]) == quote.total
@@ -0,0 +1,68 @@
+"""Pruebas para la tabla de precios precompilada del catálogo (`price_table.py`)."""
+import random
+
+from catalog import get_catalog
+from price_table import PriceTable
+
+NAMES = ["Personal Training", "Group Classes", "Access to Pool", "Specialized Program",
+         "Exclusive Gym Facilities", "Specialized Training Programs", "Free Massage"]
+
+
+def _summed(catalog, plan_name, additional, premium):
+    plan_cents, feature_cents = catalog.cent_prices()
+    return plan_cents.get(plan_name, 0) + sum(feature_cents.get(name, 0)
+                                              for name in additional + premium)
+
+
+def test_table_matches_per_feature_summation():
+    """Every lookup, with repeated and unknown names too, equals adding prices."""
+    catalog = get_catalog()
+    table = catalog.price_table()
+    fallback = PriceTable(*catalog.cent_prices(), catalog.premium_features,
+                          max_table_features=0)
+    assert table.has_table and not fallback.has_table
+    rng = random.Random(21)
+    for _ in range(2000):
+        plan_name = rng.choice(list(catalog.plans) + ["Gold"])
+        additional = rng.choices(NAMES, k=rng.randint(0, 3))
+        premium = rng.choices(NAMES, k=rng.randint(0, 2))
+        expected = _summed(catalog, plan_name, additional, premium)
+        assert table.item_cents(plan_name, additional, premium) == expected
+        assert table.item_cents(plan_name, additional, premium) == expected
+        assert fallback.item_cents(plan_name, additional, premium) == expected
+        assert table.has_premium(premium) == any(
+            name in catalog.premium_features for name in premium)
+
+
+def test_catalog_with_many_plans_is_priced_without_table():
+    """Too many table entries fall back to adding prices, with the same costs."""
+    catalog = get_catalog()
+    plan_cents, feature_cents = catalog.cent_prices()
+    features = {f"Feature {n}": 100 + n for n in range(12)}
+    plans = {f"Plan {n}": 1000 * n for n in range(2000)}
+    table = PriceTable(plans, features, ["Feature 0"])
+    assert not table.has_table
+    assert table.item_cents("Plan 7", ["Feature 3"], ["Feature 0"]) == 7000 + 103 + 100
+    assert table.mask_cents(7, 0b1001) == 7000 + 103 + 100
+    small = PriceTable(plan_cents, feature_cents, catalog.premium_features)
+    assert small.has_table and len(getattr(small, "_table")) <= 65_536
+
+
+def test_only_clean_lines_are_remembered():
+    """Lines with unknown plans or features are priced but not kept."""
+    table = get_catalog().price_table()
+    table.item_cents("Gold", [], [])
+    table.item_cents("Basic", ["Free Massage"], [])
+    table.item_cents("Basic", ["Group Classes", "Group Classes"], [])
+    table.item_cents("Basic", ["Group Classes"], ["Exclusive Gym Facilities"])
+    lines = getattr(table, "_lines")
+    assert ("Basic", ("Group Classes",), ("Exclusive Gym Facilities",)) in lines
+    assert not any(line[0] == "Gold" or "Free Massage" in line[1] for line in lines)
+    assert ("Basic", ("Group Classes", "Group Classes"), ()) not in lines
+
+
+def test_table_is_shared_by_availability_copies():
+    """Availability changes do not rebuild the price table."""
+    catalog = get_catalog()
+    copy = catalog.with_availability({"Basic": False}, {}, catalog.version + 1)
+    assert copy.price_table() is catalog.price_table()
@@ -0,0 +1,147 @@
+"""Pruebas para las reglas de descuentos y recargos configurables (`pricing_rules.py`)."""
+import json
+import random
+
+import pytest
+
+import models
+from catalog import Catalog, CatalogStore
+from models import Item, Buyer, price_baskets
+from pricing_rules import compile_rules
+
+PLANS = {"Basic": {"benefits": "", "cost": 25}, "Family": {"benefits": "", "cost": 40}}
+PREMIUM = {"Exclusive Gym Facilities": 100}
+RULES = [
+    {"type": "quantity_discount", "breaks": [{"min_quantity": 2, "percent": 10},
+                                             {"min_quantity": 4, "percent": 20}],
+     "plans": {"Family": [{"min_quantity": 3, "percent": 25}]}},
+    {"type": "percentage", "effect": "surcharge", "when": "premium", "percent": 15},
+    {"type": "fixed", "effect": "discount", "amount": 5},
+    {"type": "tiered", "effect": "discount",
+     "tiers": [{"above": 100, "percent": 5}, {"above": 300, "amount": 40}]},
+]
+
+
+def _catalog(rules=None):
+    return Catalog({"plan": PLANS, "premium_features": PREMIUM,
+                    "pricing_rules": RULES if rules is None else rules})
+
+
+def test_default_rules_match_previous_behaviour():
+    """Without `pricing_rules` the 10% / 15% / $20-$50 rules apply."""
+    buyer = Buyer([Item("Family", [], ["Specialized Training Programs"])] * 2,
+                  Catalog({}))
+    assert buyer.calculate_costs()["Family"] == 216.0
+    assert buyer.sum_costs(buyer.calculate_costs()) == 228.4
+    assert buyer.special_discount_amount == 20.0
+
+
+def test_quantity_breaks_and_ordered_adjustments():
+    """Per-plan breaks, then surcharge, fixed and tiered rules in order."""
+    catalog = _catalog()
+    rules = catalog.pricing_rules
+    assert rules.quantity_discount("Basic", 1, 10000) == 0
+    assert rules.quantity_discount("Basic", 3, 10000) == 1000
+    assert rules.quantity_discount("Basic", 9, 10000) == 2000
+    assert rules.quantity_discount("Family", 2, 10000) == 0
+    assert rules.quantity_discount("Family", 3, 10000) == 2500
+
+    quote = Buyer([Item("Basic", [], [])] * 3 + [Item("Basic", [], list(PREMIUM))],
+                  catalog).quote()
+    # 4 Basic (una con premium): 200 - 20% = 160; + 24 = 184; - 5 = 179; - 5% = 170.05
+    assert quote.costs["Basic"] == 160.0
+    assert quote.premium_surcharge == 24.0
+    assert quote.special_discount == 13.95
+    assert quote.total == 170.05
+
+
+def test_step_labels_describe_the_configured_rules():
+    """Labels are built from the compiled rules, premium ones apart."""
+    rules = _catalog().pricing_rules
+    assert rules.step_labels(premium_only=True) == ["15% surcharge"]
+    assert rules.step_labels(premium_only=False) == [
+        "$5 discount", "discount of 5% above $100, $40 above $300"]
+
+
+def test_quantity_discount_matrix_matches_scalar():
+    """All plan columns priced at once equal `quantity_discount` per cell."""
+    np = pytest.importorskip("numpy")
+    rules = _catalog().pricing_rules
+    plans = ("Basic", "Family")
+    counts = np.array([[count, 9 - count] for count in range(10)])
+    costs = np.array([[1234 * count, 999 * (9 - count)] for count in range(10)])
+    matrix = rules.quantity_discount_matrix(plans, counts, costs)
+    for row in range(10):
+        for col, plan_name in enumerate(plans):
+            assert matrix[row, col] == rules.quantity_discount(
+                plan_name, int(counts[row, col]), int(costs[row, col]))
+
+
+def test_tier_lookup_matches_linear_scan():
+    """Binary search over many tiers picks the highest tier exceeded."""
+    tiers = [{"above": above, "amount": above // 10} for above in range(0, 5000, 37)]
+    rules = compile_rules([{"type": "tiered", "effect": "discount",
+                            "tiers": list(reversed(tiers))}])
+    for total in random.Random(2).sample(range(0, 600000), 500):
+        expected = max((t["amount"] * 100 for t in tiers if total > t["above"] * 100),
+                       default=0)
+        assert rules.adjust(total, False)[1] == min(expected, total)
+
+
+@pytest.mark.parametrize("has_premium", [False, True])
+def test_total_floor_bounds_every_larger_subtotal(has_premium):
+    """`total_floor(s)` never decreases and never exceeds the total of any t >= s."""
+    rules = compile_rules(RULES)
+    totals = [rules.adjust(subtotal, has_premium)[2] for subtotal in range(32000)]
+    lowest_from = totals[:]
+    for subtotal in range(len(totals) - 2, -1, -1):
+        lowest_from[subtotal] = min(totals[subtotal], lowest_from[subtotal + 1])
+    floors = [rules.total_floor(subtotal, has_premium) for subtotal in range(len(totals))]
+    assert floors == sorted(floors)
+    assert all(floor <= lowest for floor, lowest in zip(floors, lowest_from))
+
+
+def test_batch_pricing_uses_the_same_rules(monkeypatch):
+    """The NumPy path evaluates the compiled rules exactly like Buyer."""
+    catalog = _catalog()
+    monkeypatch.setattr(models, "get_catalog", lambda: catalog)
+    rng = random.Random(8)
+    baskets = [[(rng.choice(list(PLANS)), [], rng.sample(list(PREMIUM), rng.randint(0, 1)))
+                for _ in range(rng.randint(1, 6))] for _ in range(200)]
+    result = price_baskets(baskets)
+    for idx, basket in enumerate(baskets):
+        quote = Buyer([Item(*line) for line in basket], catalog).quote()
+        assert float(result.totals[idx]) == quote.total
+        assert float(result.special_discount[idx]) == quote.special_discount
+
+
+@pytest.mark.parametrize("rules", [
+    [{"type": "bogus"}],
+    [{"type": "percentage", "effect": "surcharge"}],
+    [{"type": "tiered", "effect": "discount", "tiers": []}],
+    [{"type": "fixed", "effect": "gift", "amount": 1}],
+    [{"type": "quantity_discount", "breaks": [{"min_quantity": 1.5, "percent": 1}]}],
+    "not a list",
+])
+def test_invalid_rules_are_rejected(rules):
+    """Malformed rules raise ValueError when compiled."""
+    with pytest.raises(ValueError):
+        compile_rules(rules)
+
+
+def test_store_keeps_snapshot_when_rules_are_invalid(tmp_path):
+    """A config with broken rules is not published."""
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"plan": PLANS, "pricing_rules": RULES}), encoding="utf-8")
+    store = CatalogStore(str(path))
+    first = store.current()
+    path.write_text(json.dumps({"plan": PLANS, "pricing_rules": [{"type": "bogus"}]}),
+                    encoding="utf-8")
+    assert store.refresh(force=True) is False
+    assert store.current() is first
+
+
+def test_notification_uses_configured_percent(capsys):
+    """The group discount message shows the highest configured percent."""
+    Buyer([], _catalog()).notify_discount()
+    assert "25%" in capsys.readouterr().out
@@ -0,0 +1,104 @@
+"""Pruebas para los items con cantidad (`Item(..., quantity=n)`)."""
+import json
+import random
+import sqlite3
+
+import pytest
+
+from analytics import add_purchase, new_partial
+from ledger import Ledger, record_from_quote
+from models import Item, Buyer, IncrementalBuyer
+from pipeline import quote_stream
+from quote_cache import canonical_basket
+
+PLANS = ["Basic", "Premium", "Student", "Family"]
+ADDITIONAL = ["Personal Training", "Group Classes", "Access to Pool"]
+PREMIUM = ["Exclusive Gym Facilities", "Specialized Training Programs"]
+
+
+def _random_lines(rng):
+    return [Item(rng.choice(PLANS), rng.sample(ADDITIONAL, rng.randint(0, 2)),
+                 rng.sample(PREMIUM, rng.randint(0, 1)), rng.randint(1, 40))
+            for _ in range(rng.randint(1, 6))]
+
+
+def _expanded(lines):
+    return [Item(line.plan_name, line.additional_features,
+                 line.premium_membership_features)
+            for line in lines for _ in range(line.quantity)]
+
+
+def test_lines_price_like_expanded_items():
+    """Costs, surcharge breakdown and total match one Item per member."""
+    rng = random.Random(20)
+    for _ in range(100):
+        lines = _random_lines(rng)
+        expanded = _expanded(lines)
+        quote = Buyer(lines).quote()
+        assert quote == Buyer(expanded).quote()
+        assert Buyer(lines).count_membership() == Buyer(expanded).count_membership()
+        assert canonical_basket(lines) == canonical_basket(expanded)
+
+        incremental = IncrementalBuyer(lines)
+        incremental.remove(lines[0])
+        incremental.add(lines[0])
+        assert incremental.total() == quote.total
+
+
+def test_corporate_order_is_one_line():
+    """20,000 members on one plan cost like 20,000 items, group discount included."""
+    quote = Buyer([Item("Basic", ["Group Classes"], ["Exclusive Gym Facilities"],
+                        quantity=20_000)]).quote()
+    # 20000 * 145 = 2.900.000 - 10% = 2.610.000 + 15% = 3.001.500 - 50
+    assert quote.costs["Basic"] == 2_610_000.0
+    assert quote.premium_surcharge_breakdown["Basic"] == 391_500.0
+    assert quote.total == 3_001_450.0
+
+
+@pytest.mark.parametrize("quantity", [0, -1, True, 2.5, "3"])
+def test_invalid_quantity_is_rejected(quantity):
+    """An Item refuses quantities that are not positive integers."""
+    with pytest.raises(ValueError, match="cantidad"):
+        Item("Basic", [], [], quantity=quantity)
+
+
+def test_pipeline_and_ledger_keep_quantities(tmp_path):
+    """`quantity` is read from orders, stored in the ledger and counted by analytics."""
+    orders = [json.dumps({"buyer": "ACME", "plan": "Family", "quantity": 3}),
+              json.dumps({"buyer": "ACME", "plan": "Basic"}),
+              json.dumps({"buyer": "X", "plan": "Basic", "quantity": 0})]
+    acme, invalid = list(quote_stream(orders))
+    assert acme["items"] == 4
+    assert acme["total"] == Buyer(_expanded([Item("Family", [], [], 3),
+                                             Item("Basic", [], [])])).quote().total
+    assert "error" in invalid
+
+    items = [Item("Family", [], [], 3), Item("Basic", [], [])]
+    with Ledger(str(tmp_path / "ledger.db")) as ledger:
+        purchase_id = ledger.record_purchase(record_from_quote(items, Buyer(items).quote()))
+        stored = ledger.get_purchase(purchase_id)
+    assert stored["items"][0]["quantity"] == 3
+    assert "quantity" not in stored["items"][1]
+
+    partial = new_partial()
+    add_purchase(partial, stored)
+    assert partial["totals"]["memberships"] == 4
+    assert partial["plan_memberships"]["Family"] == 3
+
+
+def test_old_ledger_gets_quantity_column(tmp_path):
+    """A ledger created before quantities existed is migrated on open."""
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE purchase_items (
+            purchase_id INTEGER NOT NULL, position INTEGER NOT NULL,
+            plan TEXT NOT NULL, additional_features TEXT NOT NULL,
+            premium_features TEXT NOT NULL, PRIMARY KEY (purchase_id, position)
+        ) WITHOUT ROWID;
+    """)
+    conn.close()
+    items = [Item("Student", [], [], 2)]
+    with Ledger(path) as ledger:
+        purchase_id = ledger.record_purchase(record_from_quote(items, Buyer(items).quote()))
+        assert ledger.get_purchase(purchase_id)["items"][0]["quantity"] == 2
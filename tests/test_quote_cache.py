@@ -0,0 +1,70 @@
+"""Pruebas para la caché LRU de cotizaciones (`quote_cache.py`)."""
+import pytest
+
+from catalog import Catalog
+from models import Item, Buyer
+from quote_cache import QuoteCache, canonical_basket
+
+
+def _basket():
+    """Two Premium + Personal Training and one Family with a premium feature."""
+    return [
+        Item("Premium", ["Personal Training", "Group Classes"], []),
+        Item("Family", [], ["Exclusive Gym Facilities"]),
+        Item("Premium", ["Personal Training", "Group Classes"], []),
+    ]
+
+
+def test_canonical_basket_ignores_order():
+    """Item order and feature order do not change the key."""
+    reordered = [
+        Item("Family", [], ["Exclusive Gym Facilities"]),
+        Item("Premium", ["Group Classes", "Personal Training"], []),
+        Item("Premium", ["Personal Training", "Group Classes"], []),
+    ]
+    assert canonical_basket(_basket()) == canonical_basket(reordered)
+    assert canonical_basket(_basket()) != canonical_basket(_basket()[:2])
+
+
+def test_cache_hits_match_buyer():
+    """A hit returns the same quote as pricing through Buyer."""
+    cache = QuoteCache()
+    first = cache.quote(_basket())
+    second = cache.quote(list(reversed(_basket())))
+
+    buyer = Buyer(_basket())
+    total = buyer.sum_costs(buyer.calculate_costs())
+    assert first.total == second.total == total
+    assert second.premium_surcharge_breakdown == buyer.premium_surcharge_breakdown
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    # La cotización cacheada es inmutable y se comparte tal cual
+    assert second is first
+    with pytest.raises(TypeError):
+        second.costs["Premium"] = 0
+    with pytest.raises(AttributeError):
+        second.total = 0
+
+
+def test_cache_evicts_least_recently_used():
+    """Only `maxsize` baskets are kept."""
+    cache = QuoteCache(maxsize=2)
+    for plan_name in ("Basic", "Premium", "Student"):
+        cache.quote([Item(plan_name, [], [])])
+    assert len(cache) == 2
+    assert cache.evictions == 1
+    cache.quote([Item("Basic", [], [])])
+    assert cache.misses == 4
+
+
+def test_cache_invalidated_by_new_catalog_version():
+    """A new catalog version clears the cache and reprices."""
+    cache = QuoteCache()
+    old = Catalog({"plan": {"Basic": {"benefits": "", "cost": 25}}}, version=1)
+    new = Catalog({"plan": {"Basic": {"benefits": "", "cost": 50}}}, version=2)
+    basket = [Item("Basic", [], [])]
+    assert cache.quote(basket, old).total == 25
+    assert cache.quote(basket, new).total == 50
+    assert cache.quote(basket, new).catalog_version == 2
+    assert len(cache) == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
@@ -0,0 +1,62 @@
+"""Pruebas para la reproducción de sesiones guionadas del menú (`replay.py`)."""
+import json
+
+import pytest
+
+from main import main
+from replay import ScriptedIO, ScriptExhausted, generate_sessions, load_sessions, run_sessions
+from menu import menu
+
+
+def test_scripted_io_times_every_step():
+    """Each answer's handling time is recorded under the step that asked for it."""
+    ticks = iter(range(100))
+    console = ScriptedIO(["Family", "", "2", "1"], clock=lambda: next(ticks))
+    assert menu(console=console) == 40.0
+    console.finish()
+    assert [step for step, _seconds in console.timings] == \
+        ["start", "plan", "features", "next_action", "confirmation"]
+    assert all(seconds == 1 for _step, seconds in console.timings)
+    assert console.lines > 0
+
+
+def test_exhausted_script_raises():
+    """A script that stops early cannot leave the menu waiting for input."""
+    with pytest.raises(ScriptExhausted):
+        menu(console=ScriptedIO(["Family"]))
+
+
+def test_generated_sessions_replay_without_mismatches():
+    """Generated scripts, including retries and cancellations, match Buyer."""
+    report = run_sessions(generate_sessions(300, seed=4))
+    assert report["sessions"] == 300
+    assert report["errors"] == report["mismatches"] == 0
+    assert report["cancelled"] > 0
+    assert report["actual_revenue"] == report["expected_revenue"]
+    assert set(report["steps"]) == {"start", "plan", "features", "next_action", "confirmation"}
+    assert report["session_latency"]["count"] == 300
+
+
+def test_mismatch_and_missing_answers_are_reported():
+    """Wrong expectations and short scripts are counted, not raised."""
+    sessions = load_sessions([
+        json.dumps({"answers": ["Basic", "", "2", "1"], "expected": 1.0}),
+        "",
+        json.dumps({"answers": ["Basic"], "expected": 25.0}),
+    ])
+    report = run_sessions(sessions)
+    assert report["mismatches"] == 1 and report["errors"] == 1
+    assert report["failures"][0] == {"session": 0, "expected": 1.0, "actual": 25.0}
+
+
+def test_replay_command(tmp_path, capsys):
+    """`main.py replay` saves the generated scripts and reports the run."""
+    script = tmp_path / "sesiones.jsonl"
+    output = tmp_path / "informe.json"
+    assert main(["replay", "--sessions", "50", "--save-script", str(script),
+                 "-o", str(output)]) == 0
+    assert json.loads(output.read_text(encoding="utf-8"))["sessions"] == 50
+    assert main(["replay", "-i", str(script), "-o", str(output)]) == 0
+    script.write_text('{"answers": "Basic"}\n', encoding="utf-8")
+    assert main(["replay", "-i", str(script)]) == 1
+    assert "ERROR" in capsys.readouterr().err
@@ -0,0 +1,123 @@
+"""Pruebas para el servidor HTTP de cotizaciones (`server.py`)."""
+import asyncio
+import json
+import signal
+
+from benchmarks.bench_server import read_response
+from quote_cache import price_items
+from models import Item
+from server import QuoteServer, serve
+
+
+def _request(method, target, payload=None, close=False):
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    head = f"{method} {target} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(body)}\r\n"
+    if close:
+        head += "Connection: close\r\n"
+    return (head + "\r\n").encode("latin-1") + body
+
+
+def _run(scenario, **server_args):
+    """Start a server on a free port, run `scenario(server)` and drain it."""
+    async def runner():
+        server = await QuoteServer(port=0, **server_args).start()
+        try:
+            return await scenario(server)
+        finally:
+            await server.shutdown(timeout=1)
+    return asyncio.run(runner())
+
+
+async def _exchange(server, *requests):
+    """Send pipelined requests on one connection and read every response."""
+    reader, writer = await asyncio.open_connection(server.host, server.port)
+    writer.write(b"".join(requests))
+    responses = [await read_response(reader) for _ in requests]
+    writer.close()
+    return responses
+
+
+def test_pipelined_quotes_match_buyer():
+    """Pipelined requests on one connection are answered in order."""
+    order = {"plan": "premium", "additional_features": ["personal training"],
+             "premium_features": ["Exclusive Gym Facilities"]}
+
+    async def scenario(server):
+        return await _exchange(
+            server,
+            _request("POST", "/quote", {"buyer": "A", "items": [order, order]}),
+            _request("POST", "/quote", {"buyer": "B", "items": [{"plan": "Basic"}]}),
+            _request("GET", "/health"),
+        )
+
+    (s1, b1), (s2, b2), (s3, b3) = _run(scenario)
+    expected = price_items([Item("Premium", ["Personal Training"],
+                                 ["Exclusive Gym Facilities"])] * 2)
+    assert s1 == 200 and json.loads(b1)["total"] == expected.total
+    assert s2 == 200 and json.loads(b2)["buyer"] == "B"
+    assert s3 == 200 and json.loads(b3)["requests"] == 3
+
+
+def test_errors_and_availability():
+    """Bad input gets 4xx responses and availability is reported per name."""
+    async def scenario(server):
+        return await _exchange(
+            server,
+            _request("POST", "/quote", {"items": []}),
+            _request("POST", "/quote", {"items": [{"plan": "Gold"}]}),
+            _request("GET", "/quote"),
+            _request("GET", "/nope"),
+            _request("GET", "/availability?plan=Basic&plan=Gold&feature=Group%20Classes"),
+        )
+
+    responses = _run(scenario)
+    assert [status for status, _ in responses] == [400, 422, 405, 404, 200]
+    availability = json.loads(responses[-1][1])
+    assert availability["plans"]["Basic"]["available"] is True
+    assert availability["plans"]["Gold"] == {"available": False, "reason": "El plan no existe"}
+    assert availability["features"]["Group Classes"]["available"] is True
+
+
+def test_connection_limit_rejects_with_503():
+    """Connections beyond max_connections are turned away with 503."""
+    async def scenario(server):
+        first = await asyncio.open_connection(server.host, server.port)
+        first[1].write(_request("GET", "/health"))
+        await read_response(first[0])  # la primera conexión ocupa el único hueco
+        reader, _writer = await asyncio.open_connection(server.host, server.port)
+        status, _body = await read_response(reader)
+        first[1].close()
+        return status, server.stats["rejected"]
+
+    assert _run(scenario, max_connections=1) == (503, 1)
+
+
+def test_shutdown_closes_idle_connections():
+    """Draining closes idle keep-alive connections without waiting for them."""
+    async def scenario():
+        server = await QuoteServer(port=0).start()
+        reader, writer = await asyncio.open_connection(server.host, server.port)
+        writer.write(_request("GET", "/health"))
+        await read_response(reader)
+        await asyncio.wait_for(server.shutdown(timeout=5), timeout=2)
+        closed = await reader.read() == b""
+        return closed, server.draining, server.open_connections
+
+    assert asyncio.run(scenario()) == (True, True, 0)
+
+
+def test_serve_stops_on_sigterm_without_loop_signal_handlers(monkeypatch):
+    """Where the loop has no `add_signal_handler` (Windows), SIGTERM still drains."""
+    def unsupported(*_args):
+        raise NotImplementedError
+
+    previous = signal.getsignal(signal.SIGTERM)
+
+    async def runner():
+        loop = asyncio.get_running_loop()
+        monkeypatch.setattr(type(loop), "add_signal_handler", unsupported)
+        loop.call_later(0.2, signal.raise_signal, signal.SIGTERM)
+        await asyncio.wait_for(serve(QuoteServer(port=0)), timeout=5)
+
+    asyncio.run(runner())
+    assert signal.getsignal(signal.SIGTERM) is previous
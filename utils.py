@@ -1,12 +1,13 @@
 """Validation and utility functions for gym membership system."""
-from models import Item
+from catalog import PREMIUM, get_catalog
 
 
-def validar_plan(plan_input):
+def validar_plan(plan_input, catalog=None):
     """Validate and normalize plan input.
 
     Args:
         plan_input: The plan name entered by the user.
+        catalog: Catalog snapshot to validate against (default: current one).
 
     Returns:
         Normalized plan name if valid, None otherwise.
@@ -16,7 +17,7 @@ def validar_plan(plan_input):
 
     normalized_plan = plan_input.strip().capitalize()
 
-    if normalized_plan in Item.plan:
+    if normalized_plan in (catalog or get_catalog()).plans:
         return normalized_plan
     return None
 
@@ -33,100 +34,144 @@ def select_features(features_input_list):
     selected_valid_features = []
     invalid_features = []
 
-    # Mapeo insensible a mayúsculas para facilitar la búsqueda
-    features_map = {k.lower(): k for k in Item.ADDITIONAL_FEATURES}
-    features_map.update({k.lower(): k for k in Item.PREMIUM_FEATURES})
+    # Índice insensible a mayúsculas, precompilado por versión del catálogo
+    features_map = get_catalog().feature_index()
 
     for item in features_input_list:
         clean_item = item.strip().lower()
         if clean_item in features_map:
-            selected_valid_features.append(features_map[clean_item])
+            selected_valid_features.append(features_map[clean_item][0])
         elif clean_item:  # Si no está vacío pero no coincide
             invalid_features.append(item.strip())
 
     return selected_valid_features, invalid_features
 
 
-def show_options():
-    """Display available membership plans and additional features."""
-    print("\n--- GYM MEMBERSHIP PLANS ---")
-    for plan_name, details in Item.plan.items():
-        print(f"===== {plan_name} Plan =====")
-        print(f"Benefits: {details['benefits']}")
-        print(f"Cost: ${details['cost']}")
-    print("\n--- ADDITIONAL FEATURES ---")
-    for feature, cost in Item.ADDITIONAL_FEATURES.items():
-        print(f"- {feature}: ${cost}")
+def classify_features(features_input_list, catalog=None):
+    """Validate raw feature inputs and split them by kind in one pass.
 
-    print("\n--- PREMIUM MEMBERSHIP FEATURES (15% surcharge applied) ---")
-    for feature, cost in Item.PREMIUM_FEATURES.items():
-        print(f"- {feature}: ${cost}")
+    Args:
+        features_input_list: Feature names entered by the user.
+        catalog: Catalog snapshot to validate against (default: current one).
+
+    Returns:
+        Tuple of (normal_features, premium_features, invalid_features),
+        with canonical names in input order.
+    """
+    normal_features = []
+    premium_features = []
+    invalid_features = []
+    features_map = (catalog or get_catalog()).feature_index()
+
+    for item in features_input_list:
+        clean_item = item.strip()
+        entry = features_map.get(clean_item.lower())
+        if entry is None:
+            if clean_item:
+                invalid_features.append(clean_item)
+        elif entry[1] == PREMIUM:
+            premium_features.append(entry[0])
+        else:
+            normal_features.append(entry[0])
 
+    return normal_features, premium_features, invalid_features
 
-def get_plan_cost(plan_name):
+
+def show_options(output=None, catalog=None):
+    """Display available membership plans and additional features.
+
+    The premium header names the premium-only rules of the catalog's
+    `pricing_rules` (by default "15% surcharge applied").
+
+    Args:
+        output: Function used to show each line (default: `print`).
+        catalog: Catalog snapshot to show (default: current one).
+    """
+    output = output or print
+    catalog = catalog or get_catalog()
+    output("\n--- GYM MEMBERSHIP PLANS ---")
+    for plan_name, details in catalog.plans.items():
+        output(f"===== {plan_name} Plan =====")
+        output(f"Benefits: {details['benefits']}")
+        output(f"Cost: ${details['cost']}")
+    output("\n--- ADDITIONAL FEATURES ---")
+    for feature, cost in catalog.additional_features.items():
+        output(f"- {feature}: ${cost}")
+
+    premium_rules = catalog.pricing_rules.step_labels(premium_only=True)
+    applied = f" ({', '.join(premium_rules)} applied)" if premium_rules else ""
+    output(f"\n--- PREMIUM MEMBERSHIP FEATURES{applied} ---")
+    for feature, cost in catalog.premium_features.items():
+        output(f"- {feature}: ${cost}")
+
+
+def get_plan_cost(plan_name, catalog=None):
     """Return the cost for a given plan name or 0 if not found."""
-    if plan_name in Item.plan:
-        return Item.plan[plan_name]["cost"]
-    return 0
+    return (catalog or get_catalog()).plan_cost(plan_name)
 
 
-def validate_plan_availability(plan_name):
+def validate_plan_availability(plan_name, catalog=None):
     """Validate that a membership plan is available.
 
     Args:
         plan_name: The plan name to check.
+        catalog: Catalog snapshot to check against (default: current one).
 
     Returns:
         bool: True if plan is available, False otherwise.
     """
-    return plan_name in Item.plan
+    return plan_name in (catalog or get_catalog()).plans
 
 
-def check_plan_availability(plan_name):
+def check_plan_availability(plan_name, catalog=None):
     """Check plan availability and provide a reason when unavailable.
 
+    Existence and availability are read from one catalog snapshot, so a
+    concurrent `catalog.set_availability` is seen entirely or not at all.
+
     Returns:
         tuple: (available: bool, reason: str|None)
     """
     if not plan_name:
         return False, "Nombre de plan vacío"
-    if plan_name in Item.plan:
-        # Si existe una mapping de disponibilidad, respetarla; por defecto True
-        available = getattr(Item, 'PLAN_AVAILABLE', {}).get(plan_name, True)
-        if available:
+    catalog = catalog or get_catalog()
+    if plan_name in catalog.plans:
+        # Sin entrada en el mapa de disponibilidad, el plan está disponible
+        if catalog.plan_available.get(plan_name, True):
             return True, None
         return False, "El plan está marcado como no disponible"
     return False, "El plan no existe"
 
 
-def validate_feature_availability(feature_name):
+def validate_feature_availability(feature_name, catalog=None):
     """Validate that a feature is available.
 
     Args:
         feature_name: The feature name to check.
+        catalog: Catalog snapshot to check against (default: current one).
 
     Returns:
         bool: True if feature is available, False otherwise.
     """
-    return (feature_name in Item.ADDITIONAL_FEATURES or
-            feature_name in Item.PREMIUM_FEATURES)
+    catalog = catalog or get_catalog()
+    return (feature_name in catalog.additional_features or
+            feature_name in catalog.premium_features)
 
 
-def check_feature_availability(feature_name):
+def check_feature_availability(feature_name, catalog=None):
     """Check feature availability and provide a reason when unavailable.
 
+    Like `check_plan_availability`, it reads a single catalog snapshot.
+
     Returns:
         tuple: (available: bool, reason: str|None)
     """
     if not feature_name:
         return False, "Nombre de característica vacío"
-    # Por compatibilidad, asumimos que ADDITIONAL_FEATURES y PREMIUM_FEATURES
-    # contienen valores de coste (int). La disponibilidad se puede controlar
-    # opcionalmente desde Item.FEATURE_AVAILABLE (dict de bool).
-    if (feature_name in Item.ADDITIONAL_FEATURES or
-            feature_name in Item.PREMIUM_FEATURES):
-        available = getattr(Item, 'FEATURE_AVAILABLE', {}).get(feature_name, True)
-        if available:
+    catalog = catalog or get_catalog()
+    if (feature_name in catalog.additional_features or
+            feature_name in catalog.premium_features):
+        if catalog.feature_available.get(feature_name, True):
             return True, None
         return False, "La característica está marcada como no disponible"
     return False, "La característica no existe"